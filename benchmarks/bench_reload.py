@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+Reload Benchmark:
+Times building instances from their to_dict() records, the bulk of
+FileStorage.reload(), through the former constructor path
+(uuid4, two now() and strptime per record), cls(**record) and
+cls.from_dict(record), then times a full FileStorage.reload().
+
+Usage: ./benchmarks/bench_reload.py [number of records]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def legacy_build(cls, record):
+    """Builds an instance the way BaseModel.__init__ used to"""
+
+    obj = cls.__new__(cls)
+    obj.__dict__["id"] = str(uuid.uuid4())
+    obj.__dict__["created_at"] = datetime.now()
+    obj.__dict__["updated_at"] = datetime.now()
+    for key, value in record.items():
+        if key != "__class__":
+            if key in ["created_at", "updated_at"]:
+                obj.__dict__[key] = datetime.strptime(
+                        value, "%Y-%m-%dT%H:%M:%S.%f")
+            else:
+                obj.__dict__[key] = value
+    return obj
+
+
+def timed(label, func, count):
+    """Runs func once and prints its duration"""
+
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print("{:<24}{:>9.3f} s{:>12.0f} records/s".format(
+        label, elapsed, count / elapsed))
+    return elapsed
+
+
+def main(count):
+    """Runs the benchmark on count Place records"""
+
+    records = []
+    for i in range(count):
+        place = Place.from_dict({"id": str(uuid.uuid4())})
+        place.__dict__.update(
+                name="Place {}".format(i), city_id=str(uuid.uuid4()),
+                user_id=str(uuid.uuid4()), number_rooms=i % 5,
+                max_guest=i % 8, price_by_night=i % 300,
+                latitude=15.5 + i % 100 / 100, longitude=32.5)
+        records.append(place.to_dict())
+
+    print("{} Place records".format(count))
+    legacy = timed("legacy __init__",
+                   lambda: [legacy_build(Place, r) for r in records], count)
+    timed("Place(**record)",
+          lambda: [Place(**r) for r in records], count)
+    fast = timed("Place.from_dict(record)",
+                 lambda: [Place.from_dict(r) for r in records], count)
+    print("from_dict speedup: {:.1f}x".format(legacy / fast))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "file.json")
+        storage = FileStorage(file_path=path, durability="none")
+        for record in records:
+            storage.new(Place.from_dict(record))
+        storage.save()
+        timed("FileStorage.reload()",
+              FileStorage(file_path=path).reload, count)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""
+Shards Benchmark:
+Times FileStorage.reload() of the same Place records stored in a single
+file and split in shards, the shards being decoded by 1, 2, 4... worker
+processes, up to one per shard. Then times the two halves of a sharded
+reload in this process: decoding the shards, and building and indexing
+the instances, which stays in the calling process however many
+processes decode.
+
+Usage: ./benchmarks/bench_shards.py [number of records] [shards]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.shards import read_shard, shard_paths  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def timed(label, func, count):
+    """Runs func once and prints its duration"""
+
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print("{:<28}{:>9.3f} s{:>12.0f} records/s".format(
+        label, elapsed, count / elapsed))
+    return elapsed
+
+
+def fill(storage, count):
+    """Adds count Place instances to storage and saves it"""
+
+    for i in range(count):
+        place = Place.from_dict({"id": str(uuid.uuid4())})
+        place.__dict__.update(
+                name="Place {}".format(i), city_id=str(uuid.uuid4()),
+                user_id=str(uuid.uuid4()), number_rooms=i % 5,
+                max_guest=i % 8, price_by_night=i % 300,
+                latitude=15.5 + i % 100 / 100, longitude=32.5)
+        storage.new(place)
+    storage.save()
+
+
+def main(count, shards):
+    """Runs the benchmark on count Place records split in shards"""
+
+    print("{} Place records, {} shards, {} CPUs".format(
+        count, shards, os.cpu_count()))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        single = os.path.join(tmpdir, "single.json")
+        sharded = os.path.join(tmpdir, "file.json")
+        fill(FileStorage(file_path=single, durability="none"), count)
+        fill(FileStorage(file_path=sharded, durability="none",
+                         shards=shards), count)
+
+        base = timed("single file",
+                     FileStorage(file_path=single).reload, count)
+        processes = 1
+        while processes <= shards:
+            elapsed = timed(
+                    "{} shards, {} processes".format(shards, processes),
+                    FileStorage(file_path=sharded, shards=shards,
+                                processes=processes).reload, count)
+            print("{:<28}{:>9.2f}x".format("  speedup", base / elapsed))
+            processes *= 2
+
+        paths = shard_paths(sharded, shards)
+        decode = timed("  decode only",
+                       lambda: [read_shard(path) for path in paths], count)
+        print("  build and index: {:.0f}% of a reload in one process"
+              .format(100 - 100 * decode / base))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4)
@@ -9,6 +9,8 @@ Attributes:
     - allclass (dict)
 Methods:
     - emptyline()
+    - default()
+    - precmd()
     - do_quit()
     - do_EOF()
     - do_create()
@@ -16,8 +18,26 @@ Methods:
     - do_destroy()
     - do_all()
     - do_update()
+    - do_near()
+    - do_within()
+    - do_search()
+    - do_begin()
+    - do_commit()
+    - postloop()
+    - run_batch(lines)
+Usage:
+    - ./console.py: interactive, or reads commands from stdin
+    - ./console.py --batch [<file> ...]: runs the commands of the files
+    (stdin when none) in one batch, saved once at the end, reporting
+    errors and throughput on stderr
 """
 import cmd
+import fileinput
+import io
+import math
+import re
+import sys
+import time
 from models.base_model import BaseModel
 from models import storage
 from models.user import User
@@ -35,10 +55,13 @@ class HBNBCommand(cmd.Cmd):
     Attributes:
         - prompt(str): command prompt display.
         - allclass (dict): dictionary for classnames and their objects.
+        - __batch: the storage batch started by begin, or None.
     """
 
     prompt = "(hbnb) "
 
+    condition = re.compile(r"^(\w+)(<=|>=|==|!=|=|<|>)(.+)$")
+
     allclass = {
             "BaseModel": BaseModel,
             "User": User,
@@ -49,10 +72,24 @@ class HBNBCommand(cmd.Cmd):
             "Review": Review
         }
 
+    __batch = None
+
     def emptyline(self):
         """Emptyline + ENTER doesnot execute anything"""
         pass
 
+    def default(self, line):
+        """Reports an unknown command as an error line, which a batch
+counts as failed"""
+
+        print("** unknown command: {} **".format(line.split()[0]))
+
+    def precmd(self, line):
+        """Loads the changes other processes saved before each command"""
+
+        storage.refresh()
+        return line
+
     def do_quit(self, line):
         """Quit command to exit the program"""
         return True
@@ -76,7 +113,7 @@ Usage: create <class name>"""
             print("** class doesn't exist **")
             return
 
-        new = self.allclass[classname]()
+        new = storage.model_class(classname)()
         new.save()
         print(new.id)
 
@@ -99,12 +136,10 @@ Usage: show <class name> <id>"""
             print("** instance id missing **")
             return
 
-        instance_key = "{}.{}".format(classname, args[1])
-        all_instances = storage.all()
-        if instance_key not in all_instances:
+        instance = storage.get(classname, args[1])
+        if instance is None:
             print("** no instance found **")
         else:
-            instance = all_instances[instance_key]
             print(instance)
 
     def do_destroy(self, line):
@@ -125,46 +160,79 @@ Usage: destroy <class name> <id>"""
             print("** instance id missing **")
             return
 
-        instance_key = "{}.{}".format(classname, args[1])
-        all_instances = storage.all()
-        if instance_key not in all_instances:
+        instance = storage.get(classname, args[1])
+        if instance is None:
             print("** no instance found **")
             return
 
-        del all_instances[instance_key]
+        storage.delete(instance)
         storage.save()
 
     def do_all(self, line):
         """Prints all string representation of all instances,
-based or not on the class name.
+based or not on the class name, one at a time as they are read.
+--limit and --offset select a page; when more instances follow a
+limited page, the --after cursor of the next page is printed.
 Usage: all
-Usage: all <class name>"""
+Usage: all <class name>
+Usage: all [<class name>] [--limit <n>] [--offset <n>] [--after <cursor>]"""
 
         args = line.split()
-        all_instances = storage.all()
-        if not args:
-            instances_list = []
-            for instance in all_instances.values():
-                instances_list.append(str(instance))
-            print(instances_list)
-
-        else:
-            classname = args[0]
+        classname = None
+        if args and not args[0].startswith("--"):
+            classname = args.pop(0)
             if classname not in self.allclass:
                 print("** class doesn't exist **")
                 return
 
-            cls_instances = []
-            for key, value in all_instances.items():
-                if key.startswith(classname):
-                    cls_instances.append(value)
-
-            instances_list = []
-            for element in cls_instances:
-                instances_list.append(str(element))
+        options = {"limit": None, "offset": 0, "after": None}
+        while args:
+            name, _, value = args.pop(0)[2:].partition("=")
+            if not value and args:
+                value = args.pop(0)
+            if name not in options or not value:
+                print("** invalid option: --{} **".format(name))
+                return
+            if name != "after":
+                try:
+                    value = int(value)
+                except ValueError:
+                    value = -1
+                if value < 0:
+                    print("** invalid option: --{} **".format(name))
+                    return
+            options[name] = value
+
+        limit = options["limit"]
+        try:
+            page = storage.scan(classname, options["offset"],
+                                None if limit is None else limit + 1,
+                                options["after"])
+        except KeyError:
+            print("** invalid cursor **")
+            return
 
-            for instance in instances_list:
-                print(instance)
+        write = sys.stdout.write
+        separator = "["
+        count = 0
+        last = None
+        for instance in page:
+            if count == limit:
+                break
+            if classname is None:
+                write(separator + repr(str(instance)))
+                separator = ", "
+            else:
+                write(str(instance) + "\n")
+            count += 1
+            last = instance
+        else:
+            last = None
+        if classname is None:
+            print("[]" if separator == "[" else "]")
+        if last is not None:
+            print("next page: --after {}.{}".format(
+                type(last).__name__, last.id))
 
     def do_update(self, line):
         """Updates an instance based on the class name and id,
@@ -185,9 +253,8 @@ Usage: update <class name> <id> <attribute name> "<attribute value>" """
             print("** instance id missing **")
             return
 
-        instance_key = "{}.{}".format(classname, args[1])
-        all_instances = storage.all()
-        if instance_key not in all_instances:
+        instance = storage.get(classname, args[1])
+        if instance is None:
             print("** no instance found **")
             return
 
@@ -199,10 +266,13 @@ Usage: update <class name> <id> <attribute name> "<attribute value>" """
             print("** value missing **")
             return
 
-        instance = all_instances[instance_key]
         attr_name = args[2]
         attr_value = args[3]
 
+        if isinstance(getattr(type(instance), attr_name, None), property):
+            print("** attribute is read-only **")
+            return
+
         if attr_value.startswith('"') and attr_value.endswith('"'):
             attr_value = attr_value[1:-1]
 
@@ -213,9 +283,194 @@ Usage: update <class name> <id> <attribute name> "<attribute value>" """
             except ValueError:
                 return
 
-        setattr(instance, attr_name, attr_value)
-        storage.save()
+        try:
+            setattr(instance, attr_name, attr_value)
+        except (AttributeError, ValueError) as error:
+            print("** {} **".format(error))
+            return
+        instance.save()
+
+    def do_near(self, line):
+        """Prints the places within a radius in kilometers of a point,
+the closest first.
+Usage: near <latitude> <longitude> <radius_km> [limit]"""
+
+        args = line.split()
+        if len(args) < 3:
+            print("** coordinates missing **")
+            return
+
+        try:
+            lat, lon, radius_km = (float(arg) for arg in args[:3])
+            limit = int(args[3]) if len(args) > 3 else None
+        except ValueError:
+            print("** invalid coordinates **")
+            return
+
+        if radius_km < 0 or not all(map(math.isfinite,
+                                        (lat, lon, radius_km))):
+            print("** invalid coordinates **")
+            return
+
+        for place in storage.near(lat, lon, radius_km, limit):
+            print(place)
+
+    def do_within(self, line):
+        """Prints the places located in a latitude and longitude box.
+Usage: within <south> <west> <north> <east>"""
+
+        args = line.split()
+        if len(args) < 4:
+            print("** coordinates missing **")
+            return
+
+        try:
+            south, west, north, east = (float(arg) for arg in args[:4])
+        except ValueError:
+            print("** invalid coordinates **")
+            return
+
+        if not all(map(math.isfinite, (south, west, north, east))):
+            print("** invalid coordinates **")
+            return
+
+        for place in storage.within(south, west, north, east):
+            print(place)
+
+    def do_search(self, line):
+        """Prints the instances of a class matching every condition,
+read from the indexes of the class when it has some.
+Words without an operator are looked up in the text of places
+(name, description) and reviews (text), the best matches first.
+Operators: < <= > >= = !=
+Usage: search <class name> <attribute><operator><value> ...
+Usage: search <class name> <word> ... [<attribute><operator><value> ...]"""
+
+        args = line.split()
+        if not args:
+            print("** class name missing **")
+            return
+
+        classname = args[0]
+        if classname not in self.allclass:
+            print("** class doesn't exist **")
+            return
+
+        conditions = []
+        words = []
+        for arg in args[1:]:
+            match = self.condition.match(arg)
+            if match is None:
+                words.append(arg.strip('"'))
+                continue
+            attr_name, operator, attr_value = match.groups()
+            if attr_value.startswith('"') and attr_value.endswith('"'):
+                attr_value = attr_value[1:-1]
+            cls = self.allclass[classname]
+            if hasattr(cls, attr_name):
+                attr_type = type(getattr(cls, attr_name))
+                try:
+                    attr_value = attr_type(attr_value)
+                except (TypeError, ValueError):
+                    print("** invalid condition: {} **".format(arg))
+                    return
+            conditions.append((attr_name, operator, attr_value))
+
+        text = " ".join(words) if words else None
+        try:
+            instances = storage.search(classname, *conditions, text=text)
+        except LookupError:
+            print("** no text index for {} **".format(classname))
+            return
+
+        for instance in instances:
+            print(instance)
+
+    def do_begin(self, line):
+        """Starts a batch: the saves of the next commands are coalesced
+into one write, made by commit (or when the console exits).
+Usage: begin"""
+
+        if self.__batch is not None:
+            print("** batch already started **")
+            return
+        self.__batch = storage.batch()
+        self.__batch.__enter__()
+
+    def do_commit(self, line):
+        """Ends the batch started by begin and saves its changes at once.
+Usage: commit"""
+
+        if self.__batch is None:
+            print("** no batch started **")
+            return
+        batch, self.__batch = self.__batch, None
+        batch.__exit__(None, None, None)
+
+    def postloop(self):
+        """Saves the changes of a batch left open when the console exits"""
+
+        if self.__batch is not None:
+            self.do_commit("")
+
+    def run_batch(self, lines, report=None):
+        """
+        Runs commands in one storage batch, so their changes are saved
+        once at the end instead of once per command. A command whose
+        output has a "** ... **" line, or that raises, counts as failed
+        and the run goes on with the next one.
+
+        Args:
+            - lines (iterable): The commands, one a line; empty lines
+            and lines starting with # are skipped
+            - report: Where the errors and the summary are written,
+            sys.stderr by default
+
+        Returns:
+            tuple: The number of commands run and of failed commands
+        """
+
+        if report is None:
+            report = sys.stderr
+        stdout = sys.stdout
+        count = failed = 0
+        start = time.perf_counter()
+        storage.refresh()
+        with storage.batch():
+            for number, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                count += 1
+                sys.stdout = output = io.StringIO()
+                try:
+                    stop = self.onecmd(line)
+                except Exception as error:
+                    print("** {}: {} **".format(type(error).__name__, error))
+                    stop = False
+                finally:
+                    sys.stdout = stdout
+                text = output.getvalue()
+                stdout.write(text)
+                errors = [message for message in text.splitlines()
+                          if message.startswith("** ")]
+                if errors:
+                    failed += 1
+                for message in errors:
+                    print("line {}: {}: {}".format(number, line, message),
+                          file=report)
+                if stop:
+                    break
+        elapsed = time.perf_counter() - start
+        print("{} commands, {} failed in {:.3f}s ({:.0f} commands/s)".format(
+            count, failed, elapsed, count / elapsed if elapsed else 0),
+            file=report)
+        return count, failed
 
 
 if __name__ == '__main__':
+    if sys.argv[1:2] == ["--batch"]:
+        with fileinput.input(sys.argv[2:]) as lines:
+            failed = HBNBCommand().run_batch(lines)[1]
+        sys.exit(1 if failed else 0)
     HBNBCommand().cmdloop()
@@ -1,7 +1,71 @@
 #!/usr/bin/python3
-"""__init__ method for models dir"""
+"""__init__ method for models dir
+
+Environment:
+    - HBNB_FILE_JOURNAL: set to 1 to append changes to a journal
+    instead of rewriting file.json on every save
+    - HBNB_FILE_LAZY: set to 1 to build instances on first access
+    instead of when file.json is loaded
+    - HBNB_FILE_FORMAT: set to ndjson to store one record per line
+    in file.ndjson, read back one line at a time
+    - HBNB_FILE_CACHE: set to 0 to encode every record on each save
+    instead of keeping the JSON text of clean instances in memory
+    - HBNB_FILE_DURABILITY: what a save flushes to disk, none, file
+    (fsync, the default) or dir (fsync of the file and its directory)
+    - HBNB_FILE_FLUSH_INTERVAL: defer saves and write them from a
+    background thread every given number of seconds
+    - HBNB_FILE_FLUSH_SIZE: defer saves and write them once the given
+    number of saves are waiting
+    - HBNB_FILE_SLOTS: set to 1 to reload instances as the slotted
+    classes of models.compact, which need less memory
+    - HBNB_FILE_THREAD_SAFE: set to 1 to guard the storage with a
+    reader/writer lock when threads share it
+    - HBNB_FILE_SHARED: set to 1 to lock the file between processes
+    and merge the changes of others before saving
+    - HBNB_FILE_BACKGROUND: set to 1 to write saves from a background
+    thread, from a snapshot taken when save() is called
+    - HBNB_FILE_SHARDS: split the store across the given number of
+    NDJSON files, decoded in parallel processes on reload
+    - HBNB_TYPE_STORAGE: set to db to store instances in a sqlite
+    database instead of file.json
+    - HBNB_DB_PATH: The path of the sqlite database, hbnb.db by default
+"""
+import os
 from models.engine.file_storage import FileStorage
 
 
-storage = FileStorage()
+def _getenv_number(name, convert):
+    """
+    Returns: The value of an environment variable converted
+    to a number, or None when it is not set
+
+    Args:
+        - name (str): The variable name
+        - convert (type): int or float
+    """
+
+    value = os.getenv(name)
+    return None if value is None else convert(value)
+
+
+if os.getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(db_path=os.getenv("HBNB_DB_PATH", "hbnb.db"))
+else:
+    file_format = os.getenv("HBNB_FILE_FORMAT", "json")
+    storage = FileStorage(
+            file_path="file." + file_format,
+            journal=os.getenv("HBNB_FILE_JOURNAL") == "1",
+            lazy=os.getenv("HBNB_FILE_LAZY") == "1",
+            file_format=file_format,
+            fragment_cache=os.getenv("HBNB_FILE_CACHE") != "0",
+            durability=os.getenv("HBNB_FILE_DURABILITY", "file"),
+            flush_interval=_getenv_number("HBNB_FILE_FLUSH_INTERVAL", float),
+            flush_size=_getenv_number("HBNB_FILE_FLUSH_SIZE", int),
+            slots=os.getenv("HBNB_FILE_SLOTS") == "1",
+            thread_safe=os.getenv("HBNB_FILE_THREAD_SAFE") == "1",
+            shared=os.getenv("HBNB_FILE_SHARED") == "1",
+            background=os.getenv("HBNB_FILE_BACKGROUND") == "1",
+            shards=_getenv_number("HBNB_FILE_SHARDS", int)
+        )
 storage.reload()
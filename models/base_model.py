@@ -9,6 +9,10 @@ Base Model class Module
         - created_at (datetime): Keeps track of when an instance was created.
         - updated_at (datetime): Keeps track of the last modification time.
     Methods:
+        - from_dict(cls, info): Builds an instance from its
+        to_dict() representation, the fast path used by the storage.
+        - __setattr__: Sets an attribute and flags the instance
+        as changed in the storage.
         - __str__: [<class name>] (<self.id>) <self.__dict__>
         - save(self): Updates the public instance attribute
         updated_at with the current datetime.
@@ -16,11 +20,16 @@ Base Model class Module
 """
 import models
 import uuid
+from abc import ABCMeta
 from datetime import datetime
 
 
-class BaseModel:
-    """Defines base class for all models"""
+class BaseModel(metaclass=ABCMeta):
+    """
+    Defines base class for all models. Its metaclass lets the compact
+    variants of models.compact register as virtual subclasses, so
+    isinstance() holds for them too.
+    """
 
     def __init__(self, *args, **kwargs):
         """
@@ -31,21 +40,80 @@ class BaseModel:
             - **kwargs: Keyword arguments
         """
 
-        self.id = str(uuid.uuid4())
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
-
         if kwargs:
             for key, value in kwargs.items():
                 if key != "__class__":
                     if key in ["created_at", "updated_at"]:
-                        self.__dict__[key] = datetime.strptime(
-                                value, "%Y-%m-%dT%H:%M:%S.%f")
+                        self.__dict__[key] = datetime.fromisoformat(value)
                     else:
                         self.__dict__[key] = value
-        else:
+
+        # defaults are only generated for what kwargs did not provide
+        if "id" not in self.__dict__:
+            self.id = str(uuid.uuid4())
+        if "created_at" not in self.__dict__:
+            self.created_at = datetime.now()
+        if "updated_at" not in self.__dict__:
+            self.updated_at = self.created_at
+
+        if not kwargs:
             models.storage.new(self)
 
+    @classmethod
+    def from_dict(cls, info):
+        """
+        Builds an instance from its to_dict() representation.
+        Unlike cls(**info) it skips __init__ and copies the attributes
+        in one step, it does not register the instance in the storage.
+
+        Args:
+            - info (dict): The to_dict() representation
+
+        Return:
+        BaseModel: The new instance of cls
+        """
+
+        obj = cls.__new__(cls)
+        attrs = obj.__dict__
+        attrs.update(info)
+        attrs.pop("__class__", None)
+        if "id" not in attrs:
+            attrs["id"] = str(uuid.uuid4())
+        if "created_at" in attrs:
+            attrs["created_at"] = datetime.fromisoformat(attrs["created_at"])
+        else:
+            attrs["created_at"] = datetime.now()
+        if "updated_at" in attrs:
+            attrs["updated_at"] = datetime.fromisoformat(attrs["updated_at"])
+        else:
+            attrs["updated_at"] = attrs["created_at"]
+        return obj
+
+    def __setattr__(self, name, value):
+        """
+        Sets an attribute and flags the instance as changed,
+        so the storage re-serializes and re-indexes it.
+        The storage may reject the value first, e.g. a duplicate email,
+        or once it is set, in which case the old value is restored.
+        Changes made in place (e.g. list.append) are not tracked.
+
+        Args:
+            - name (str): The attribute name
+            - value: The attribute value
+        """
+
+        storage = getattr(models, "storage", None)
+        if storage is not None:
+            storage.validate(self, name, value)
+        old = getattr(self, name, None)
+        super().__setattr__(name, value)
+        if storage is not None:
+            try:
+                storage.mark_dirty(self, name, old)
+            except ValueError:
+                super().__setattr__(name, old)
+                raise
+
     def __str__(self):
         """
         Returns a string representation
@@ -5,8 +5,12 @@ Defines a class City that inherits from BaseModel
     Attributes:
         - state_id (str)
         - name (str)
+    Properties:
+        - places (list)
 """
+import models
 from models.base_model import BaseModel
+from models.place import Place
 
 
 class City(BaseModel):
@@ -20,3 +24,9 @@ class City(BaseModel):
 
     state_id = ""
     name = ""
+
+    @property
+    def places(self):
+        """Returns: The list of Place instances in the city"""
+
+        return models.storage.related(Place, "city_id", self.id)
@@ -0,0 +1,269 @@
+#!/usr/bin/python3
+"""
+Compact Models Module:
+Slotted variants of the models for stores holding millions of instances.
+
+A compact class keeps the name, the attributes and their class defaults
+of the model it is made from, but stores id, the timestamps and the
+declared attributes in __slots__ instead of a per-instance __dict__.
+to_dict() returns the same dictionary and __str__ the same text as the
+model, so compact instances save to and reload from the same file.
+Each compact class is registered as a virtual subclass of its model:
+isinstance(obj, models.user.User) holds for a compact User, although
+it does not inherit the model's methods.
+
+Attributes that are not declared on the model, such as those the console
+update command may add, go to an overflow dictionary. The overflow is
+opt-in: without it setting such an attribute raises AttributeError.
+
+Classes:
+    - CompactModel: Base class of the compact variants
+    - BaseModel, User, State, City, Amenity, Place, Review: The compact
+    variants of the models, with the overflow dictionary
+
+Functions:
+    - compact(cls, overflow): Makes the compact variant of a model class
+"""
+import models
+import uuid
+from datetime import datetime
+from models import base_model, user, state, city, amenity, place, review
+
+
+class CompactModel:
+    """
+    Base class of the compact variants of the models
+
+    Attributes:
+        - _fields (tuple): The slotted attributes, in to_dict() order
+        - _defaults (dict): The class defaults of the declared attributes
+        - _overflow (bool): Whether undeclared attributes are accepted
+    """
+
+    __slots__ = ("id", "created_at", "updated_at")
+    _fields = ("id", "created_at", "updated_at")
+    _defaults = {}
+    _overflow = False
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a new instance of class, like BaseModel.__init__
+
+        Args:
+            - *args: Arguments list
+            - **kwargs: Keyword arguments
+        """
+
+        if self._overflow:
+            object.__setattr__(self, "_extra", None)
+        if kwargs:
+            for key, value in kwargs.items():
+                if key != "__class__":
+                    if key in ["created_at", "updated_at"]:
+                        value = datetime.fromisoformat(value)
+                    self._store(key, value)
+
+        if not hasattr(self, "id"):
+            self.id = str(uuid.uuid4())
+        if not hasattr(self, "created_at"):
+            self.created_at = datetime.now()
+        if not hasattr(self, "updated_at"):
+            self.updated_at = self.created_at
+
+        if not kwargs:
+            models.storage.new(self)
+
+    @classmethod
+    def from_dict(cls, info):
+        """
+        Builds an instance from its to_dict() representation,
+        like BaseModel.from_dict
+
+        Args:
+            - info (dict): The to_dict() representation
+
+        Return:
+        CompactModel: The new instance of cls
+        """
+
+        obj = cls.__new__(cls)
+        if cls._overflow:
+            object.__setattr__(obj, "_extra", None)
+        for key, value in info.items():
+            if key != "__class__":
+                obj._store(key, value)
+        if not hasattr(obj, "id"):
+            obj._store("id", str(uuid.uuid4()))
+        if hasattr(obj, "created_at"):
+            obj._store("created_at", datetime.fromisoformat(obj.created_at))
+        else:
+            obj._store("created_at", datetime.now())
+        if hasattr(obj, "updated_at"):
+            obj._store("updated_at", datetime.fromisoformat(obj.updated_at))
+        else:
+            obj._store("updated_at", obj.created_at)
+        return obj
+
+    def _store(self, name, value):
+        """
+        Stores an attribute in its slot or in the overflow dictionary,
+        without flagging the instance as changed
+
+        Args:
+            - name (str): The attribute name
+            - value: The attribute value
+        """
+
+        if name in self._defaults or name in CompactModel._fields:
+            object.__setattr__(self, name, value)
+        elif self._overflow and name != "_extra":
+            if self._extra is None:
+                object.__setattr__(self, "_extra", {})
+            self._extra[name] = value
+        else:
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                self.__class__.__name__, name))
+
+    def __setattr__(self, name, value):
+        """
+        Sets an attribute and flags the instance as changed,
+        like BaseModel.__setattr__
+
+        Args:
+            - name (str): The attribute name
+            - value: The attribute value
+        """
+
+        storage = getattr(models, "storage", None)
+        if storage is not None:
+            storage.validate(self, name, value)
+        old = getattr(self, name, None)
+        self._store(name, value)
+        if storage is not None:
+            try:
+                storage.mark_dirty(self, name, old)
+            except ValueError:
+                self._store(name, old)
+                raise
+
+    def __getattr__(self, name):
+        """
+        Returns: The class default of a declared attribute not set yet,
+        or an attribute from the overflow dictionary
+
+        Args:
+            - name (str): The attribute name
+        """
+
+        if name in self._defaults:
+            return self._defaults[name]
+        if self._overflow and name != "_extra":
+            extra = self._extra
+            if extra is not None and name in extra:
+                return extra[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            self.__class__.__name__, name))
+
+    @property
+    def __dict__(self):
+        """
+        Returns: A new dictionary of the attributes set on the instance,
+        the same the model's __dict__ would hold
+        """
+
+        attrs = {}
+        for name in self._fields:
+            try:
+                attrs[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        if self._overflow and self._extra:
+            attrs.update(self._extra)
+        return attrs
+
+    def __reduce__(self):
+        """
+        Returns: How pickle and copy rebuild the instance,
+        through from_dict() and its to_dict() representation
+        """
+
+        return self.__class__.from_dict, (self.to_dict(),)
+
+    def __str__(self):
+        """
+        Returns a string representation
+
+        Return:
+        str: A string containing classname, id, and attributes
+        """
+
+        classname = self.__class__.__name__
+        return "[{}] ({}) {}".format(classname, self.id, self.__dict__)
+
+    def save(self):
+        """Saves the instance with updated current time"""
+
+        self.updated_at = datetime.now()
+        models.storage.save()
+
+    def to_dict(self):
+        """
+        Converts the class instance to dict representation
+
+        Return:
+        dict: A dictionary containing all attributes and their values
+        """
+
+        info = self.__dict__
+        info["__class__"] = self.__class__.__name__
+        info["created_at"] = self.created_at.isoformat()
+        info["updated_at"] = self.updated_at.isoformat()
+        return info
+
+
+def compact(cls, overflow=False):
+    """
+    Makes the compact variant of a model class
+
+    Args:
+        - cls: A BaseModel subclass, or BaseModel itself
+        - overflow (bool): Accept attributes the model does not declare
+
+    Return:
+    type: A CompactModel subclass with the name of cls, registered as
+    a virtual subclass of cls
+    """
+
+    defaults = {}
+    namespace = {}
+    for klass in reversed(cls.__mro__[:-1]):
+        for name, value in vars(klass).items():
+            if name.startswith("_") or klass is base_model.BaseModel:
+                continue
+            if isinstance(value, property):
+                namespace[name] = value
+            elif not callable(value):
+                defaults[name] = value
+    slots = tuple(defaults)
+    if overflow:
+        slots += ("_extra",)
+    namespace.update({
+            "__slots__": slots,
+            "__module__": __name__,
+            "__doc__": "Compact variant of {}".format(cls.__name__),
+            "_fields": CompactModel._fields + tuple(defaults),
+            "_defaults": defaults,
+            "_overflow": overflow
+        })
+    variant = type(cls.__name__, (CompactModel,), namespace)
+    cls.register(variant)
+    return variant
+
+
+BaseModel = compact(base_model.BaseModel, overflow=True)
+User = compact(user.User, overflow=True)
+State = compact(state.State, overflow=True)
+City = compact(city.City, overflow=True)
+Amenity = compact(amenity.Amenity, overflow=True)
+Place = compact(place.Place, overflow=True)
+Review = compact(review.Review, overflow=True)
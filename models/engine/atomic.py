@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""
+Atomic Module:
+Writes storage files so that a crash never leaves them
+empty or half-written.
+
+A file is written to a temporary file next to it, which is then
+renamed over the original. The durability level decides what is
+flushed to disk before returning:
+    - "none": nothing, the rename only protects against a process crash
+    - "file": the content of the file (os.fsync)
+    - "dir": the content and the rename itself (fsync of the directory)
+
+Attributes:
+    - DURABILITY (tuple): The durability levels, from fastest to safest
+
+Functions:
+    - check_durability(durability): Rejects unknown durability levels
+    - atomic_write(path, durability): Context manager yielding the
+    text file that replaces path when the block exits
+    - sync(f, durability): Flushes an open file for a durability level
+    - sync_dir(path): Flushes the directory entry of path
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+
+DURABILITY = ("none", "file", "dir")
+
+
+def check_durability(durability):
+    """
+    Rejects unknown durability levels
+
+    Args:
+        - durability (str): One of DURABILITY
+    """
+
+    if durability not in DURABILITY:
+        raise ValueError("Unknown durability: {}".format(durability))
+
+
+def sync(f, durability):
+    """
+    Flushes an open file as the durability level asks
+
+    Args:
+        - f: The open file
+        - durability (str): One of DURABILITY
+    """
+
+    f.flush()
+    if durability != "none":
+        os.fsync(f.fileno())
+
+
+def sync_dir(path):
+    """
+    Flushes the directory holding path, making a rename
+    or a file creation in it durable
+
+    Args:
+        - path (str): A path in the directory
+    """
+
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path, durability="file"):
+    """
+    Yields a text file that replaces path when the block exits.
+    If the block raises, path is left untouched.
+
+    Args:
+        - path (str): The path of the file to replace
+        - durability (str): One of DURABILITY
+    """
+
+    check_durability(durability)
+    tmp_path = "{}.{}.{}.tmp".format(
+            path, os.getpid(), threading.get_ident())
+    try:
+        with open(tmp_path, 'w') as f:
+            yield f
+            sync(f, durability)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    if durability == "dir":
+        sync_dir(path)
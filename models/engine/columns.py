@@ -0,0 +1,274 @@
+#!/usr/bin/python3
+"""
+Columns Module:
+Defines the ColumnView class, a column-oriented snapshot of the
+instances of one class for reports that scan many instances.
+
+Each attribute is copied once into its own column. The attributes
+whose class default is a number go to array("q") when every value is
+an int, and to array("d") otherwise; numeric strings are converted and
+any other value is stored as NaN, which the aggregations skip. Other
+attributes go to a list. Aggregations then run over the columns in C
+loops (min, max, sum, sorted) instead of reading attributes instance
+by instance, and numeric columns can be handed to NumPy without a copy
+through the buffer protocol (numpy.frombuffer(view.column(name), ...)).
+
+Attributes:
+    - TYPECODES (dict): The array typecode of each numeric type
+
+Functions:
+    - percentile(values, q): Returns the q-th percentile of values
+    - numeric_column(values): Returns the array holding numbers
+
+Classes:
+    - ColumnView: The columns of the attributes of one class
+"""
+import math
+from array import array
+from models.engine.indexes import value_of
+
+
+TYPECODES = {int: "q", float: "d"}
+
+
+def percentile(values, q):
+    """
+    Returns: The q-th percentile of values, interpolated linearly
+    between the two closest ranks (the NumPy default)
+
+    Args:
+        - values (iterable): Numbers, at least one
+        - q (float): The percentile, between 0 and 100
+    """
+
+    if not 0 <= q <= 100:
+        raise ValueError("Percentile out of range: {}".format(q))
+    ordered = sorted(values)
+    if not ordered:
+        raise ValueError("percentile() of an empty column")
+    position = (len(ordered) - 1) * q / 100
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _number(value):
+    """
+    Returns: value as an int or a float, None if it is not a number
+
+    Args:
+        - value: An attribute value
+    """
+
+    if type(value) is str:
+        for kind in (int, float):
+            try:
+                return kind(value)
+            except ValueError:
+                pass
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    return None
+
+
+def numeric_column(values):
+    """
+    Returns: The array of values, array("q") if they are all ints and
+    array("d") otherwise, where what is not a number becomes NaN
+
+    Args:
+        - values (list): The values of a numeric attribute
+    """
+
+    numbers = [_number(value) for value in values]
+    if all(type(number) is int for number in numbers):
+        try:
+            return array("q", numbers)
+        except OverflowError:
+            pass
+    column = array("d")
+    for number in numbers:
+        try:
+            column.append(math.nan if number is None else number)
+        except OverflowError:
+            column.append(math.nan)
+    return column
+
+
+def _present(values):
+    """
+    Returns: values without the NaN standing for missing numbers
+
+    Args:
+        - values (sequence): A column
+    """
+
+    if isinstance(values, array) and values.typecode == "d":
+        return array("d", (value for value in values if value == value))
+    return values
+
+
+def _mean(values):
+    """
+    Returns: The arithmetic mean of values
+
+    Args:
+        - values (sequence): Numbers, at least one
+    """
+
+    if not len(values):
+        raise ValueError("mean() of an empty column")
+    return sum(values) / len(values)
+
+
+class ColumnView:
+    """
+    ColumnView class: a snapshot of some attributes of the instances
+    of one class, stored column by column.
+
+    Attributes:
+        - classname (str): The name of the class
+        - ids (list): The id of each row
+        - fields (tuple): The names of the attribute columns
+    """
+
+    AGGREGATES = {
+            "count": len,
+            "sum": sum,
+            "min": min,
+            "max": max,
+            "mean": _mean,
+            "median": lambda values: percentile(values, 50)
+        }
+
+    def __init__(self, cls, fields, objects):
+        """
+        Initializes the ColumnView instance
+
+        Args:
+            - cls: The class of the instances
+            - fields (iterable): The attribute names to copy
+            - objects (iterable): The instances, or their to_dict() records
+        """
+
+        self.classname = cls.__name__
+        self.fields = tuple(fields)
+        self.ids = []
+        self.__columns = {field: [] for field in self.fields}
+        columns = [(self.__columns[field].append, field,
+                    getattr(cls, field, None)) for field in self.fields]
+        for obj in objects:
+            self.ids.append(value_of(obj, "id"))
+            for append, field, default in columns:
+                append(value_of(obj, field, default))
+        for field in self.fields:
+            if type(getattr(cls, field, None)) in TYPECODES:
+                self.__columns[field] = numeric_column(self.__columns[field])
+
+    def __len__(self):
+        """Returns: The number of rows"""
+
+        return len(self.ids)
+
+    def column(self, field):
+        """
+        Returns: The column of an attribute, an array for numbers
+        and a list otherwise
+
+        Args:
+            - field (str): The attribute name
+        """
+
+        try:
+            return self.__columns[field]
+        except KeyError:
+            raise KeyError("No column {} in the {} view".format(
+                field, self.classname)) from None
+
+    def missing(self, field):
+        """
+        Returns: The number of rows of a numeric column whose value
+        was not a number, stored as NaN and skipped by the aggregations
+
+        Args:
+            - field (str): The attribute name
+        """
+
+        values = self.column(field)
+        return len(values) - len(_present(values))
+
+    def min(self, field):
+        """
+        Returns: The smallest value of a column
+
+        Args:
+            - field (str): The attribute name
+        """
+
+        return min(_present(self.column(field)))
+
+    def max(self, field):
+        """
+        Returns: The largest value of a column
+
+        Args:
+            - field (str): The attribute name
+        """
+
+        return max(_present(self.column(field)))
+
+    def mean(self, field):
+        """
+        Returns: The mean of a numeric column
+
+        Args:
+            - field (str): The attribute name
+        """
+
+        return _mean(_present(self.column(field)))
+
+    def percentile(self, field, q):
+        """
+        Returns: The q-th percentile of a numeric column
+
+        Args:
+            - field (str): The attribute name
+            - q (float): The percentile, between 0 and 100
+        """
+
+        return percentile(_present(self.column(field)), q)
+
+    def group_by(self, by, field, agg="mean"):
+        """
+        Returns: A dictionary mapping each value of column by
+        to the aggregate of column field over its rows, leaving out
+        the values that were not numbers
+
+        Args:
+            - by (str): The attribute to group on, e.g. city_id
+            - field (str): The attribute to aggregate, e.g. price_by_night
+            - agg: The name of one of AGGREGATES, or a function
+            taking the column of a group
+        """
+
+        if not callable(agg):
+            try:
+                agg = self.AGGREGATES[agg]
+            except KeyError:
+                raise ValueError("Unknown aggregate: {}".format(agg)) from None
+        values = self.column(field)
+        groups = {}
+        if isinstance(values, array):
+            typecode = values.typecode
+            for group, value in zip(self.column(by), values):
+                if value != value:
+                    continue
+                column = groups.get(group)
+                if column is None:
+                    column = groups[group] = array(typecode)
+                column.append(value)
+        else:
+            for group, value in zip(self.column(by), values):
+                groups.setdefault(group, []).append(value)
+        return {group: agg(column) for group, column in groups.items()}
@@ -0,0 +1,739 @@
+#!/usr/bin/python3
+"""
+DB Storage Module:
+Defines the DBStorage class, a storage engine on top of sqlite3
+with the same interface as FileStorage.
+
+Each model class has its own table with an indexed id column and
+the to_dict() representation of the instance as JSON text. The foreign
+keys of City, Place and Review, and the latitude, price_by_night and
+max_guest of Place, are indexed through json_extract(). The text
+attributes of Place and Review are kept in FTS5 tables for text search.
+Instances are read on demand, so point reads and writes do not
+depend on the size of the store.
+
+Attributes:
+    - __db_path (str): The path to the sqlite database file
+    - __conn (sqlite3.Connection): The open connection
+    - __objects (dict): The instances read or added so far
+    - __changed (set): Keys of instances added, modified or deleted
+    since the last flush
+    - __allclass (dict): A dictionary mapping class names to their classes
+
+Methods:
+    - all(self, cls): Returns the dictionary of all stored instances,
+    or of the instances of one class
+    - scan(self, cls, offset, limit, after): Returns an iterator over
+    one page of the stored instances, read as it is consumed
+    - count(self, cls): Returns the number of stored instances
+    - get(self, cls, id): Returns one instance by class and id
+    - model_class(self, cls): Returns the class new instances of a
+    class are built with
+    - get_by(self, cls, **fields): Returns one instance by attribute
+    values, e.g. a user by email
+    - related(self, cls, field, value): Returns the instances of a class
+    whose attribute holds a value
+    - search(self, cls, *conditions, text, limit): Returns the instances
+    of a class matching comparisons such as ("price_by_night", "<", 120),
+    or ranked by the words of a text
+    - near(self, lat, lon, radius_km, limit): Returns the places
+    around a point, the closest first
+    - within(self, south, west, north, east): Returns the places
+    in a latitude and longitude box
+    - new(self, obj): Adds a new instance
+    - delete(self, obj): Removes an instance
+    - validate(self, obj, name, value): Rejects a change that would
+    duplicate a unique attribute
+    - mark_dirty(self, obj, name, old): Flags a stored instance as changed
+    - save(self): Commits the pending changes to the database
+    - batch(self): Context manager committing once for the saves
+    made inside it
+    - reload(self): Opens the database and creates the tables
+    - is_stale(self), refresh(self): FileStorage interface,
+    nothing to do for a database
+    - asave(self), areload(self), aall(self, cls, chunk_size):
+    FileStorage interface, run on the event loop
+    - close(self): Closes the database, dropping unsaved changes
+"""
+import asyncio
+import heapq
+import json
+import sqlite3
+from contextlib import contextmanager
+from itertools import islice
+from models.engine.fulltext import TextIndex, tokenize
+from models.engine.indexes import OPERATORS, matches, value_of
+from models.engine.indexes import bounding_box, distance_km, in_box
+from models.engine.indexes import check_coordinates
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.amenity import Amenity
+from models.place import Place
+from models.review import Review
+
+
+class DBStorage:
+    """
+    DBStorage class responsible for storing
+    instances in a sqlite database.
+    """
+
+    def __init__(self, *, db_path="hbnb.db"):
+        """
+        Initializes the DBStorage instance
+
+        Args:
+            - db_path (str): The path of the sqlite database file
+        """
+
+        self.__db_path = db_path
+        self.__conn = None
+        self.__objects = {}
+        self.__changed = set()
+        self.__batch_depth = 0
+        self.__fts = False
+        self.__allclass = {
+                "BaseModel": BaseModel,
+                "User": User,
+                "State": State,
+                "City": City,
+                "Amenity": Amenity,
+                "Place": Place,
+                "Review": Review
+            }
+        self.__indexed = (
+                ("City", "state_id"), ("Place", "city_id"),
+                ("Place", "user_id"), ("Review", "place_id"),
+                ("Review", "user_id"), ("Place", "latitude"),
+                ("Place", "price_by_night"), ("Place", "max_guest")
+            )
+        self.__unique = {"User": ("email",)}
+        self.__texts = {
+                "Place": ("name", "description"),
+                "Review": ("text",)
+            }
+
+    def all(self, cls=None):
+        """
+        Returns: A dictionary containing all stored instances,
+        or only the instances of cls
+
+        Args:
+            - cls: A class or class name, None for every class
+        """
+
+        self.__flush()
+        if cls is None:
+            classnames = list(self.__allclass)
+        else:
+            classnames = [self.__classname(cls)]
+        objects = {}
+        for classname in classnames:
+            if classname not in self.__allclass:
+                continue
+            rows = self.__conn.execute(
+                    'SELECT id, data FROM "{}"'.format(classname))
+            for obj_id, data in rows:
+                obj = self.__build(classname, obj_id, data)
+                objects["{}.{}".format(classname, obj_id)] = obj
+        return objects
+
+    def scan(self, cls=None, offset=0, limit=None, after=None):
+        """
+        Returns: An iterator over the stored instances, or the instances
+        of cls, ordered by class then id and read from the database
+        as they are consumed. A page resumes after the key of the last
+        instance of the previous page, which need not still exist.
+
+        Args:
+            - cls: A class or class name, None for every class
+            - offset (int): The number of instances to skip
+            - limit (int): The maximum number of instances, None for all
+            - after (str): The <class name>.<id> key to resume after
+        """
+
+        self.__flush()
+        if cls is None:
+            classnames = list(self.__allclass)
+        else:
+            classnames = [self.__classname(cls)]
+        classnames = [name for name in classnames if name in self.__allclass]
+        start = None
+        if after is not None:
+            classname, _, start = after.partition(".")
+            if classname not in classnames:
+                raise KeyError(after)
+            classnames = classnames[classnames.index(classname):]
+        stop = None if limit is None else offset + limit
+        rows = islice(self.__scan_rows(classnames, start), offset, stop)
+        return (self.__build(*row) for row in rows)
+
+    def count(self, cls=None):
+        """
+        Returns: The number of stored instances, or of instances of cls
+
+        Args:
+            - cls: A class or class name, None for every class
+        """
+
+        self.__flush()
+        if cls is None:
+            return sum(self.count(classname) for classname in self.__allclass)
+        classname = self.__classname(cls)
+        if classname not in self.__allclass:
+            return 0
+        query = 'SELECT COUNT(*) FROM "{}"'.format(classname)
+        return self.__conn.execute(query).fetchone()[0]
+
+    def get(self, cls, id):
+        """
+        Returns: The instance of cls with the given id, or None
+
+        Args:
+            - cls: A class or class name
+            - id (str): The id of the instance
+        """
+
+        classname = self.__classname(cls)
+        key = "{}.{}".format(classname, id)
+        if key in self.__objects:
+            return self.__objects[key]
+        if classname not in self.__allclass or key in self.__changed:
+            return None
+        query = 'SELECT data FROM "{}" WHERE id = ?'.format(classname)
+        row = self.__conn.execute(query, (id,)).fetchone()
+        if row is None:
+            return None
+        return self.__build(classname, id, row[0])
+
+    def model_class(self, cls):
+        """
+        Returns: The class instances of cls are built with
+
+        Args:
+            - cls: A class or class name
+        """
+
+        return self.__allclass[self.__classname(cls)]
+
+    def get_by(self, cls, **fields):
+        """
+        Returns: The instance of cls whose attributes hold the given
+        values, or None. Unique attributes such as User.email are
+        compared regardless of case.
+
+        Args:
+            - cls: A class or class name
+            - **fields: Attribute names and values, e.g. email="a@b.c"
+        """
+
+        self.__flush()
+        classname = self.__classname(cls)
+        if classname not in self.__allclass:
+            return None
+        clauses = []
+        params = []
+        for field, value in fields.items():
+            if not field.isidentifier():
+                return None
+            column = "json_extract(data, '$.{}')".format(field)
+            if field in self.__unique.get(classname, ()) and \
+                    isinstance(value, str):
+                column = "lower({})".format(column)
+                value = value.lower()
+            clauses.append("{} = ?".format(column))
+            params.append(value)
+        query = 'SELECT id, data FROM "{}"'.format(classname)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        row = self.__conn.execute(query + " LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        return self.__build(classname, *row)
+
+    def related(self, cls, field, value):
+        """
+        Returns: A list of the instances of cls whose attribute field
+        equals value
+
+        Args:
+            - cls: A class or class name
+            - field (str): The attribute name, e.g. state_id
+            - value: The attribute value, e.g. the id of a state
+        """
+
+        self.__flush()
+        classname = self.__classname(cls)
+        if classname not in self.__allclass or not field.isidentifier():
+            return []
+        # the path is inlined so the query matches the expression index
+        query = 'SELECT id, data FROM "{}" ' \
+            'WHERE json_extract(data, \'$.{}\') = ?'.format(classname, field)
+        rows = self.__conn.execute(query, (value,))
+        return [self.__build(classname, obj_id, data)
+                for obj_id, data in rows]
+
+    def search(self, cls, *conditions, text=None, limit=None):
+        """
+        Returns: A list of the instances of cls matching every condition.
+        With text, the instances using its words ranked by relevance,
+        read from the full text table of the class.
+
+        Args:
+            - cls: A class or class name
+            - *conditions: (field, operator, value) triples,
+            the operator one of OPERATORS
+            - text (str): Words to look for in the text attributes
+            - limit (int): The maximum number of instances, None for all
+        """
+
+        self.__flush()
+        classname = self.__classname(cls)
+        model = self.__allclass.get(classname)
+        clauses = []
+        params = []
+        for field, op, value in conditions:
+            if op not in OPERATORS:
+                raise ValueError("Unknown operator: {}".format(op))
+            if model is None or not field.isidentifier():
+                return []
+            # the path is inlined so the query matches the expression index
+            column = "json_extract(data, '$.{}')".format(field)
+            clause = "{} {} ?".format(column, "=" if op == "==" else op)
+            default = getattr(model, field, None)
+            if matches({}, field, op, value, default):
+                clause = "({} OR {} IS NULL)".format(clause, column)
+            clauses.append(clause)
+            params.append(value)
+        if text is not None:
+            objects = self.__text_search(classname, text,
+                                         None if conditions else limit)
+        else:
+            query = 'SELECT id, data FROM "{}"'.format(classname)
+            if clauses:
+                query += " WHERE " + " AND ".join(clauses)
+            objects = (self.__build(classname, obj_id, data) for obj_id, data
+                       in self.__conn.execute(query, params).fetchall())
+        found = (obj for obj in objects
+                 if all(matches(obj, field, op, value)
+                        for field, op, value in conditions))
+        return list(islice(found, limit))
+
+    def near(self, lat, lon, radius_km, limit=None):
+        """
+        Returns: A list of the places within radius_km of a point,
+        the closest first
+
+        Args:
+            - lat, lon (float): The point, in degrees
+            - radius_km (float): The search radius in kilometers
+            - limit (int): The maximum number of places, None for all
+        """
+
+        check_coordinates(lat, lon, radius_km)
+        if radius_km < 0:
+            raise ValueError("Negative radius: {}".format(radius_km))
+        found = []
+        for place in self.within(*bounding_box(lat, lon, radius_km)):
+            distance = distance_km(lat, lon, float(place.latitude),
+                                   float(place.longitude))
+            if distance <= radius_km:
+                found.append((distance, id(place), place))
+        if limit is not None:
+            found = heapq.nsmallest(limit, found)
+        return [place for _, _, place in sorted(found)]
+
+    def within(self, south, west, north, east):
+        """
+        Returns: A list of the places located in a box,
+        which crosses the 180th meridian when west is greater than east
+
+        Args:
+            - south, west, north, east (float): The box, in degrees
+        """
+
+        check_coordinates(south, west, north, east)
+        self.__flush()
+        query = 'SELECT id, data FROM "Place" WHERE ' \
+            'json_extract(data, \'$.latitude\') BETWEEN ? AND ?'
+        places = []
+        for obj_id, data in self.__conn.execute(query, (south, north)):
+            place = self.__build("Place", obj_id, data)
+            try:
+                point = float(place.latitude), float(place.longitude)
+            except (TypeError, ValueError):
+                continue
+            if point != (0.0, 0.0) and \
+                    in_box(*point, south, west, north, east):
+                places.append(place)
+        return places
+
+    def new(self, obj):
+        """
+        Adds a new instance
+
+        Args:
+            - obj: The instance to add.
+        """
+
+        classname = obj.__class__.__name__
+        for field in self.__unique.get(classname, ()):
+            self.__reject(classname, obj.id, field,
+                          getattr(obj, field, None))
+        key = "{}.{}".format(classname, obj.id)
+        self.__objects[key] = obj
+        self.__changed.add(key)
+
+    def delete(self, obj=None):
+        """
+        Removes an instance
+
+        Args:
+            - obj: The instance to remove, nothing is done if None
+        """
+
+        if obj is None:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__objects.pop(key, None)
+        self.__changed.add(key)
+
+    def validate(self, obj, name, value):
+        """
+        Rejects a change that would give a stored instance the value
+        of a unique attribute held by another instance. Called before
+        the attribute is set.
+
+        Args:
+            - obj: The instance about to change
+            - name (str): The attribute about to change
+            - value: The new value of the attribute
+        """
+
+        classname = obj.__class__.__name__
+        if name not in self.__unique.get(classname, ()):
+            return
+        key = "{}.{}".format(classname, getattr(obj, "id", None))
+        if self.__objects.get(key) is obj:
+            self.__reject(classname, obj.id, name, value)
+
+    def mark_dirty(self, obj, name=None, old=None):
+        """
+        Flags a stored instance as changed
+
+        Args:
+            - obj: The instance whose attributes changed
+            - name (str): The changed attribute
+            - old: The value of the attribute before the change
+        """
+
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        if self.__objects.get(key) is obj:
+            self.__changed.add(key)
+
+    def save(self):
+        """
+        Writes the pending changes and commits them,
+        inside batch() the commit waits for the batch to exit
+        """
+
+        self.__flush()
+        if self.__batch_depth == 0:
+            self.__conn.commit()
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager committing once, when the outermost batch exits,
+        for every save made inside it
+        """
+
+        self.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.__batch_depth -= 1
+            if self.__batch_depth == 0:
+                self.save()
+
+    def reload(self):
+        """Opens the database and creates the missing tables and indexes"""
+
+        if self.__conn is not None:
+            self.__conn.close()
+        self.__conn = sqlite3.connect(self.__db_path)
+        self.__objects = {}
+        self.__changed = set()
+        self.__conn.execute("BEGIN")
+        for classname in self.__allclass:
+            self.__conn.execute(
+                    'CREATE TABLE IF NOT EXISTS "{}" '
+                    '(id TEXT PRIMARY KEY, data TEXT NOT NULL)'
+                    .format(classname))
+        for classname, field in self.__indexed:
+            self.__conn.execute(
+                    'CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" '
+                    '(json_extract(data, \'$.{1}\'))'
+                    .format(classname, field))
+        for classname, fields in self.__unique.items():
+            for field in fields:
+                self.__conn.execute(
+                        'CREATE INDEX IF NOT EXISTS "{0}_{1}_lower" ON "{0}" '
+                        '(lower(json_extract(data, \'$.{1}\')))'
+                        .format(classname, field))
+        self.__fts = True
+        for classname in self.__texts:
+            try:
+                self.__create_text_table(classname)
+            except sqlite3.OperationalError:
+                # sqlite built without FTS5, text search scans instead
+                self.__fts = False
+                break
+        self.__conn.commit()
+
+    def __create_text_table(self, classname):
+        """
+        Creates the full text table of a class, filled from the rows
+        already stored, unless it exists
+
+        Args:
+            - classname (str): The class name
+        """
+
+        table = "{}_text".format(classname)
+        exists = self.__conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?",
+                (table,)).fetchone()
+        if exists:
+            return
+        self.__conn.execute(
+                'CREATE VIRTUAL TABLE "{}" USING fts5(id UNINDEXED, body)'
+                .format(table))
+        rows = self.__conn.execute(
+                'SELECT id, data FROM "{}"'.format(classname)).fetchall()
+        self.__conn.executemany(
+                'INSERT INTO "{}" (id, body) VALUES (?, ?)'.format(table),
+                ((obj_id, self.__text_of(classname, json.loads(data)))
+                 for obj_id, data in rows))
+
+    def is_stale(self):
+        """
+        Returns: False, rows are read from the database on demand and
+        sqlite already locks it between processes
+        """
+
+        return False
+
+    def refresh(self):
+        """
+        Does nothing, see is_stale()
+
+        Returns:
+            bool: False
+        """
+
+        return False
+
+    async def asave(self):
+        """
+        FileStorage interface: saves on the loop, since the sqlite
+        connection belongs to the thread that opened it and a commit
+        only writes the pending changes
+        """
+
+        self.save()
+
+    async def areload(self):
+        """FileStorage interface: reloads on the loop, see asave()"""
+
+        self.reload()
+
+    async def aall(self, cls=None, chunk_size=1000):
+        """
+        Asynchronous iterator over the stored instances, or the
+        instances of cls, read chunk_size at a time on the loop,
+        giving it back between chunks
+
+        Args:
+            - cls: A class or class name, None for every class
+            - chunk_size (int): The number of instances per chunk
+        """
+
+        after = None
+        while True:
+            chunk = list(self.scan(cls, limit=chunk_size, after=after))
+            for obj in chunk:
+                yield obj
+            if len(chunk) < chunk_size:
+                return
+            after = "{}.{}".format(type(chunk[-1]).__name__, chunk[-1].id)
+            await asyncio.sleep(0)
+
+    def close(self):
+        """Closes the database, changes not saved are dropped"""
+
+        if self.__conn is None:
+            return
+        self.__conn.close()
+        self.__conn = None
+
+    def __flush(self):
+        """Writes the pending changes without committing them"""
+
+        for key in self.__changed:
+            classname, obj_id = key.split(".", 1)
+            if classname not in self.__allclass:
+                continue
+            obj = self.__objects.get(key)
+            if obj is None:
+                self.__conn.execute(
+                        'DELETE FROM "{}" WHERE id = ?'.format(classname),
+                        (obj_id,))
+            else:
+                self.__conn.execute(
+                        'INSERT OR REPLACE INTO "{}" (id, data) '
+                        'VALUES (?, ?)'.format(classname),
+                        (obj_id, json.dumps(obj.to_dict())))
+            if self.__fts and classname in self.__texts:
+                self.__conn.execute(
+                        'DELETE FROM "{}_text" WHERE id = ?'.format(classname),
+                        (obj_id,))
+                if obj is not None:
+                    self.__conn.execute(
+                            'INSERT INTO "{}_text" (id, body) VALUES (?, ?)'
+                            .format(classname),
+                            (obj_id, self.__text_of(classname, obj)))
+        self.__changed.clear()
+
+    def __reject(self, classname, obj_id, field, value):
+        """
+        Raises ValueError if another instance of a class holds value
+        in a unique attribute
+
+        Args:
+            - classname (str): The class name
+            - obj_id (str): The id of the instance about to hold value
+            - field (str): The unique attribute
+            - value: The value of the attribute
+        """
+
+        if value is None or value == "":
+            return
+        self.__flush()
+        column = "json_extract(data, '$.{}')".format(field)
+        compared = value
+        if isinstance(value, str):
+            column = "lower({})".format(column)
+            compared = value.lower()
+        row = self.__conn.execute(
+                'SELECT id FROM "{}" WHERE {} = ? AND id != ? LIMIT 1'
+                .format(classname, column), (compared, obj_id)).fetchone()
+        if row is not None:
+            raise ValueError("{}.{} {!r} is already used by {}.{}".format(
+                classname, field, value, classname, row[0]))
+
+    def __text_search(self, classname, text, limit):
+        """
+        Returns: The instances of a class using the words of text,
+        the most relevant first
+
+        Args:
+            - classname (str): The class name
+            - text (str): The words to look for
+            - limit (int): The maximum number of instances, None for all
+        """
+
+        if classname not in self.__texts:
+            raise LookupError("{} has no TextIndex".format(classname))
+        words = set(tokenize(text))
+        if not words:
+            return []
+        if not self.__fts:
+            index = TextIndex(self.__allclass[classname],
+                              self.__texts[classname])
+            for key, obj in self.all(classname).items():
+                index.add(key, obj)
+            return [self.get(classname, key.split(".", 1)[1])
+                    for _, key in index.search(text, limit)]
+        query = 'SELECT t.id, c.data FROM "{0}_text" AS t ' \
+            'JOIN "{0}" AS c ON c.id = t.id WHERE "{0}_text" MATCH ? ' \
+            'ORDER BY rank LIMIT ?'.format(classname)
+        match = " OR ".join('"{}"'.format(word) for word in words)
+        rows = self.__conn.execute(
+                query, (match, -1 if limit is None else limit)).fetchall()
+        return [self.__build(classname, obj_id, data)
+                for obj_id, data in rows]
+
+    def __text_of(self, classname, obj):
+        """
+        Returns: The words of the text attributes of an instance,
+        as stored in the full text table of its class
+
+        Args:
+            - classname (str): The class name
+            - obj: The instance or its to_dict() record
+        """
+
+        words = []
+        for field in self.__texts[classname]:
+            value = value_of(obj, field)
+            if value is not None:
+                words.extend(tokenize(str(value)))
+        return " ".join(words)
+
+    def __scan_rows(self, classnames, start):
+        """
+        Yields: The (class name, id, JSON text) rows of some classes,
+        ordered by class then id
+
+        Args:
+            - classnames (list): The class names, in order
+            - start (str): The id the rows of the first class
+            come after, None for all of them
+        """
+
+        for classname in classnames:
+            if start is None:
+                rows = self.__conn.execute(
+                        'SELECT id, data FROM "{}" ORDER BY id'
+                        .format(classname))
+            else:
+                rows = self.__conn.execute(
+                        'SELECT id, data FROM "{}" WHERE id > ? ORDER BY id'
+                        .format(classname), (start,))
+                start = None
+            for obj_id, data in rows:
+                yield classname, obj_id, data
+
+    def __build(self, classname, obj_id, data):
+        """
+        Returns: The instance read before under this key,
+        or a new one built from its JSON text
+
+        Args:
+            - classname (str): The class name of the instance
+            - obj_id (str): The id of the instance
+            - data (str): The JSON text of its to_dict() representation
+        """
+
+        key = "{}.{}".format(classname, obj_id)
+        obj = self.__objects.get(key)
+        if obj is None:
+            obj = self.__allclass[classname].from_dict(json.loads(data))
+            self.__objects[key] = obj
+        return obj
+
+    @staticmethod
+    def __classname(cls):
+        """
+        Returns: The name of cls
+
+        Args:
+            - cls: A class or class name
+        """
+
+        if isinstance(cls, str):
+            return cls
+        return cls.__name__
@@ -5,16 +5,110 @@ Defines the FileStorage class responsible for serializing and deserializing.
 
 Attributes:
     - __file_path (str): The path to the JSON file where instances are stored
-    - __objects (dict): A dictionary to store instances
+    - __objects (dict): A dictionary to store instances, in lazy mode
+    a LazyObjects that builds each instance on first access
     - __allclass (dict): A dictionary mapping class names to their classes
+    - __layout (dict): The classes new instances and reloaded records
+    are built with, the compact variants of models.compact when slots
+    is set
+    - __journal (Journal): The append-only log used in journaled mode
+    - __changed (set): Keys of instances added, modified or deleted
+    since the last save
+    - __fragments (dict): The JSON text of every clean instance
+    holding no list or dictionary, None when the cache is turned off
+    - __order (OrderedKeys): The keys of the stored instances,
+    in storage order
+    - __classes (dict): The OrderedKeys of the stored instances
+    of each class
+    - __indexes (dict): The secondary indexes of each class
+    - __unique (dict): The unique indexes of each class
+    - __unbuilt (dict): The indexes of each class registered as lazy,
+    filled the first time a query of the class needs them
+    - __deferred (int): The number of saves waiting for a flush,
+    guarded by __defer_lock
+    - __lock (RWLock): Guards the instances and indexes of a
+    thread-safe storage, a NullLock otherwise
+    - __file_lock (FileLock): Locks the file of a shared storage
+    - __seen: The signature of the file when it was last read
+    or written
+    - __shards (int): The number of NDJSON files the store is split
+    across, None for a single file
 
 Methods:
-    - all(self): Returns the dictionary of all stored instances
+    - all(self, cls): Returns the dictionary of all stored instances,
+    or of the instances of one class
+    - scan(self, cls, offset, limit, after): Returns an iterator over
+    one page of the stored instances, built as it is consumed
+    - count(self, cls): Returns the number of stored instances
+    - get(self, cls, id): Returns one instance by class and id
+    - model_class(self, cls): Returns the class new instances of a
+    class are built with
+    - get_by(self, cls, **fields): Returns one instance by attribute
+    values, e.g. a user by email
+    - related(self, cls, field, value): Returns the instances of a class
+    whose attribute holds a value, e.g. the cities of a state
+    - columns(self, cls, fields): Returns a column-oriented snapshot
+    of the instances of a class
+    - query(self, cls): Returns a lazy, chainable Query over the
+    instances of a class, planned over its indexes
+    - search(self, cls, *conditions, text, limit): Returns the instances
+    of a class matching comparisons such as ("price_by_night", "<", 120),
+    or ranked by the words of a text
+    - near(self, lat, lon, radius_km, limit): Returns the places
+    around a point, the closest first
+    - within(self, south, west, north, east): Returns the places
+    in a latitude and longitude box
+    - add_index(self, index, lazy): Registers a secondary index
     - new(self, obj): Adds a new instance to the dictionary
+    - delete(self, obj): Removes an instance from the dictionary
+    - validate(self, obj, name, value): Rejects a change that would
+    break a unique index
+    - mark_dirty(self, obj, name, old): Flags a stored instance as changed
     - save(self): Serializes instances to JSON and saves them to the file
+    - flush(self): Writes the changes to the file now
+    - bgsave(self): Snapshots the instances and writes them from a
+    background thread
+    - save_status(self): Tells if a save is running and how the last
+    one went
+    - asave(self): Saves without blocking the event loop, coalescing
+    concurrent calls
+    - areload(self): Reloads without blocking the event loop
+    - aall(self, cls, chunk_size): Asynchronous iterator over the
+    stored instances
+    - batch(self): Context manager coalescing the saves made inside it
     - reload(self): Deserializes JSON from the file and loads instances
+    - is_stale(self): Tells if another process saved the file since
+    it was last read or written
+    - refresh(self): Loads the changes other processes saved
+    - compact(self): Folds the journal into a fresh JSON snapshot
 """
+import asyncio
+import atexit
 import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from copy import deepcopy
+from functools import partial
+from itertools import islice
+from models.engine.atomic import atomic_write, check_durability
+from models.engine.filelock import FileLock, signature
+from models.engine.columns import ColumnView
+from models.engine.fulltext import TextIndex
+from models.engine.indexes import GeoIndex, HashIndex, SortedIndex
+from models.engine.indexes import UniqueIndex
+from models.engine.indexes import matches, value_of
+from models.engine.journal import Journal
+from models.engine.json_stream import iter_lines, iter_object
+from models.engine.json_stream import write_lines, write_object
+from models.engine.lazy import LazyObjects, to_record
+from models.engine.ordered_keys import OrderedKeys
+from models.engine.query import Query
+from models.engine.rwlock import NullLock, RWLock
+from models.engine.shards import find_shards, read_shards, shard_of
+from models.engine.shards import shard_paths
+from models import compact as compact_models
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -31,11 +125,120 @@ class FileStorage:
     to and from JSON files.
     """
 
-    def __init__(self):
-        """Initializes the FileStorage instance"""
+    def __init__(self, *, file_path="file.json", journal=False,
+                 compact_size=4 * 1024 * 1024, lazy=False,
+                 file_format="json", fragment_cache=True,
+                 durability="file", flush_interval=None, flush_size=None,
+                 slots=False, thread_safe=False, shared=False,
+                 background=False, shards=None, processes=None):
+        """
+        Initializes the FileStorage instance
+
+        Args:
+            - file_path (str): The path of the JSON file
+            - journal (bool): Append changes to a log instead of
+            rewriting the whole file on every save
+            - compact_size (int): Size in bytes past which the log is
+            folded into the JSON file in the background
+            - lazy (bool): Keep reloaded records as dictionaries and
+            build each instance the first time it is looked up
+            - file_format (str): "json" for one JSON object mapping keys
+            to records, "ndjson" for one record per line
+            - fragment_cache (bool): Keep the JSON text of clean instances
+            between saves, trading memory for save time. Instances
+            holding a list or a dictionary, which can change in place
+            without being flagged, are encoded on every save.
+            - durability (str): What a save flushes to disk: "none",
+            "file" (fsync) or "dir" (fsync of the file and its directory)
+            - flush_interval (float): Defer saves and write them from a
+            background thread every flush_interval seconds, which makes
+            the storage thread-safe
+            - flush_size (int): Defer saves and write them once
+            flush_size saves are waiting
+            - slots (bool): Build reloaded records with the slotted
+            classes of models.compact, which need less memory
+            - thread_safe (bool): Guard the instances and indexes with
+            a reader/writer lock, for storages shared by threads
+            - shared (bool): Lock the file while it is read or written
+            and merge the changes other processes saved before writing,
+            for files shared by processes
+            - background (bool): Make save() return at once and write
+            a snapshot of the instances from a background thread,
+            which makes the storage thread-safe
+            - shards (int): Split the store across shards NDJSON files,
+            read back in parallel by reload() and rewritten only when
+            they hold changed instances
+            - processes (int): The number of processes reading shards,
+            None for os.cpu_count()
+        """
+
+        if file_format not in ("json", "ndjson"):
+            raise ValueError("Unknown file format: {}".format(file_format))
+        check_durability(durability)
+        if shared and journal:
+            raise ValueError("A journaled file cannot be shared")
+        if shards is not None:
+            if shards < 1:
+                raise ValueError("Invalid shard count: {}".format(shards))
+            if journal or shared:
+                raise ValueError("Shards cannot be journaled or shared")
 
-        self.__file_path = "file.json"
+        self.__file_path = file_path
+        self.__file_format = file_format
+        self.__records = iter_lines if file_format == "ndjson" else iter_object
+        self.__file_lock = FileLock(file_path) if shared else None
+        self.__seen = None
+        self.__shards = shards
+        self.__processes = processes
+        self.__durability = durability
+        # the flusher and background saves take the changed keys while
+        # this thread adds to them, a NullLock would lose changes
+        thread_safe = thread_safe or flush_interval is not None or \
+            background
+        self.__thread_safe = thread_safe
+        if thread_safe:
+            self.__lock = RWLock()
+            self.__writing = self.__guarded_write
+        else:
+            self.__lock = NullLock()
+            self.__writing = self.__lock.write
         self.__objects = {}
+        if lazy:
+            self.__objects = LazyObjects(
+                    self.__build, threading.Lock() if thread_safe else None)
+        self.__changed = set()
+        self.__fragments = {} if fragment_cache else None
+        self.__order = OrderedKeys()
+        self.__classes = {}
+        self.__indexes = {}
+        self.__unique = {}
+        self.__unbuilt = {}
+        self.__journal = None
+        if journal:
+            self.__journal = Journal(file_path + ".journal", durability)
+        self.__compact_size = compact_size
+        self.__journal_lock = threading.Lock()
+        self.__compactor = None
+        self.__flush_lock = threading.RLock()
+        self.__background = background
+        self.__bg_lock = threading.Lock()
+        self.__last_save = {"time": None, "status": None, "error": None,
+                            "duration": None}
+        self.__next_save = None
+        self.__saver = None
+        self.__batch_depth = 0
+        self.__deferred = 0
+        self.__defer_lock = threading.Lock()
+        self.__exit_hook = False
+        self.__flush_interval = flush_interval
+        self.__flush_size = flush_size
+        self.__write_behind = flush_interval is not None or \
+            flush_size is not None
+        self.__flusher = None
+        if flush_interval is not None:
+            self.__flusher = threading.Thread(
+                    target=self.__flush_periodically, daemon=True)
+            self.__flusher.start()
         self.__allclass = {
                 "BaseModel": BaseModel,
                 "User": User,
@@ -45,11 +248,281 @@ class FileStorage:
                 "Place": Place,
                 "Review": Review
             }
+        self.__layout = self.__allclass
+        if slots:
+            self.__layout = {classname: getattr(compact_models, classname)
+                             for classname in self.__allclass}
+        for cls, field in ((City, "state_id"), (Place, "city_id"),
+                           (Place, "user_id"), (Review, "place_id"),
+                           (Review, "user_id")):
+            self.add_index(HashIndex(cls, field))
+        self.add_index(UniqueIndex(User, "email", normalize=str.lower))
+        # only queries read these, a reload does not pay for them
+        self.add_index(GeoIndex(Place), lazy=True)
+        for field in ("price_by_night", "max_guest"):
+            self.add_index(SortedIndex(Place, field), lazy=True)
+        self.add_index(TextIndex(Place, ("name", "description")), lazy=True)
+        self.add_index(TextIndex(Review, ("text",)), lazy=True)
+
+    def all(self, cls=None):
+        """
+        Returns: A dictionary containing all stored instances,
+        or only the instances of cls. A thread-safe storage returns
+        a copy of its dictionary instead of the dictionary itself.
+
+        Args:
+            - cls: A class or class name, None for every class
+        """
+
+        if cls is None:
+            if not self.__thread_safe:
+                return self.__objects
+            with self.__lock.read():
+                return dict(self.__objects.items())
+        objects = self.__objects
+        with self.__lock.read():
+            keys = self.__classes.get(self.__classname(cls), ())
+            return {key: objects[key] for key in keys if key in objects}
+
+    def scan(self, cls=None, offset=0, limit=None, after=None):
+        """
+        Returns: An iterator over the stored instances, or the instances
+        of cls, in storage order and built as they are consumed.
+        A page resumes after the key of the last instance of the
+        previous page, found from its position in the storage order,
+        so every page costs the same however far it starts.
+        The store must not change during the iteration, unless it is
+        thread-safe: the keys are then copied first.
+
+        Args:
+            - cls: A class or class name, None for every class
+            - offset (int): The number of instances to skip
+            - limit (int): The maximum number of instances, None for all
+            - after (str): The <class name>.<id> key to resume after
+        """
+
+        with self.__lock.read():
+            if cls is None:
+                keys = self.__order
+            else:
+                keys = self.__classes.get(self.__classname(cls))
+                if keys is None:
+                    keys = OrderedKeys()
+            if after is None:
+                keys = iter(keys)
+            elif after in keys:
+                keys = keys.after(after)
+            else:
+                raise KeyError(after)
+            stop = None if limit is None else offset + limit
+            keys = islice(keys, offset, stop)
+            if self.__thread_safe:
+                keys = list(keys)
+        objects = self.__objects
+        if self.__thread_safe:
+            return (obj for obj in map(objects.get, keys) if obj is not None)
+        return (objects[key] for key in keys)
+
+    def count(self, cls=None):
+        """
+        Returns: The number of stored instances, or of instances of cls
+
+        Args:
+            - cls: A class or class name, None for every class
+        """
+
+        if cls is None:
+            return len(self.__objects)
+        return len(self.__classes.get(self.__classname(cls), ()))
+
+    def get(self, cls, id):
+        """
+        Returns: The instance of cls with the given id, or None
 
-    def all(self):
-        """Returns: A dictionary containing all stored instances"""
+        Args:
+            - cls: A class or class name
+            - id (str): The id of the instance
+        """
 
-        return self.__objects
+        key = "{}.{}".format(self.__classname(cls), id)
+        return self.__objects.get(key)
+
+    def model_class(self, cls):
+        """
+        Returns: The class instances of cls are built with, its compact
+        variant of models.compact when slots is set. Building new
+        instances with it keeps one class per class name in the store.
+
+        Args:
+            - cls: A class or class name
+        """
+
+        return self.__layout[self.__classname(cls)]
+
+    def get_by(self, cls, **fields):
+        """
+        Returns: The instance of cls whose attributes hold the given
+        values, or None. A unique index compares its field the way it
+        normalizes it, e.g. emails regardless of case.
+
+        Args:
+            - cls: A class or class name
+            - **fields: Attribute names and values, e.g. email="a@b.c"
+        """
+
+        classname = self.__classname(cls)
+        model = self.__allclass.get(classname)
+        conditions = [(field, "=", value) for field, value in fields.items()]
+        # the fallback query runs under the read lock, fill its indexes now
+        self.__build_indexes(classname)
+        with self.__lock.read():
+            for index in self.__unique.get(classname, ()):
+                if index.field in fields:
+                    keys = index.lookup(fields[index.field])
+                    conditions.remove((index.field, "=", fields[index.field]))
+                    break
+            else:
+                return self.query(classname).filter(*conditions).first()
+            objects = self.__objects
+            for key in keys:
+                if all(matches(dict.__getitem__(objects, key), field, op,
+                               value, getattr(model, field, None))
+                       for field, op, value in conditions):
+                    return objects[key]
+            return None
+
+    def related(self, cls, field, value):
+        """
+        Returns: A list of the instances of cls whose attribute field
+        equals value, looked up through an index when there is one
+
+        Args:
+            - cls: A class or class name
+            - field (str): The attribute name, e.g. state_id
+            - value: The attribute value, e.g. the id of a state
+        """
+
+        classname = self.__classname(cls)
+        for index in self.__indexes.get(classname, ()):
+            if isinstance(index, HashIndex) and index.field == field:
+                with self.__lock.read():
+                    return [self.__objects[key]
+                            for key in index.lookup(value)]
+        return [obj for obj in self.all(classname).values()
+                if getattr(obj, field, None) == value]
+
+    def query(self, cls):
+        """
+        Returns: A Query over the instances of cls, refined with
+        where(), order_by() and limit() and evaluated when iterated
+
+        Args:
+            - cls: A class or class name
+        """
+
+        classname = self.__classname(cls)
+        self.__build_indexes(classname)
+        return Query(classname, self.__allclass.get(classname),
+                     self.__indexes.get(classname, []),
+                     lambda: list(self.__classes.get(classname, ())),
+                     partial(dict.get, self.__objects),
+                     self.__objects.get,
+                     self.__lock if self.__thread_safe else None)
+
+    def search(self, cls, *conditions, text=None, limit=None):
+        """
+        Returns: A list of the instances of cls matching every condition,
+        the query(cls).filter(*conditions) shortcut. With text, the
+        instances using its words ranked by relevance, read from the
+        full text index of the class.
+
+        Args:
+            - cls: A class or class name
+            - *conditions: (field, operator, value) triples,
+            the operator one of OPERATORS
+            - text (str): Words to look for in the text attributes
+            - limit (int): The maximum number of instances, None for all
+        """
+
+        query = self.query(cls).filter(*conditions).limit(limit)
+        if text is not None:
+            query = query.text(text)
+        return list(query)
+
+    def near(self, lat, lon, radius_km, limit=None):
+        """
+        Returns: A list of the places within radius_km of a point,
+        the closest first
+
+        Args:
+            - lat, lon (float): The point, in degrees
+            - radius_km (float): The search radius in kilometers
+            - limit (int): The maximum number of places, None for all
+        """
+
+        index = self.__find_index("Place", GeoIndex)
+        with self.__lock.read():
+            return [self.__objects[key]
+                    for _, key in index.near(lat, lon, radius_km, limit)]
+
+    def within(self, south, west, north, east):
+        """
+        Returns: A list of the places located in a box,
+        which crosses the 180th meridian when west is greater than east
+
+        Args:
+            - south, west, north, east (float): The box, in degrees
+        """
+
+        index = self.__find_index("Place", GeoIndex)
+        with self.__lock.read():
+            return [self.__objects[key]
+                    for key in index.within(south, west, north, east)]
+
+    def columns(self, cls, fields=None):
+        """
+        Returns: A ColumnView of the instances of cls, read from the
+        records in lazy mode so no instance is built
+
+        Args:
+            - cls: A class or class name
+            - fields (iterable): The attributes to copy, by default
+            every int, float and str attribute the class declares
+        """
+
+        classname = self.__classname(cls)
+        cls = self.__allclass[classname]
+        if fields is None:
+            fields = [name for name, value in vars(cls).items()
+                      if not name.startswith("_") and
+                      type(value) in (int, float, str)]
+        keys = self.__classes.get(classname, ())
+        with self.__lock.read():
+            return ColumnView(cls, fields, (dict.__getitem__(self.__objects,
+                                                             key)
+                                            for key in keys))
+
+    def add_index(self, index, lazy=False):
+        """
+        Registers a secondary index and fills it with
+        the instances already stored
+
+        Args:
+            - index: The index, e.g. a HashIndex
+            - lazy (bool): Fill and maintain the index only from the
+            first query of its class that may use it, e.g. an index
+            that is costly to maintain and only read by queries
+        """
+
+        if lazy:
+            self.__unbuilt.setdefault(index.classname, []).append(index)
+            return
+        with self.__writing():
+            self.__indexes.setdefault(index.classname, []).append(index)
+            if isinstance(index, UniqueIndex):
+                self.__unique.setdefault(index.classname, []).append(index)
+            for key in self.__classes.get(index.classname, ()):
+                index.add(key, dict.__getitem__(self.__objects, key))
 
     def new(self, obj):
         """
@@ -60,26 +533,904 @@ class FileStorage:
         """
 
         objclsname = obj.__class__.__name__
-        self.__objects["{}.{}".format(objclsname, obj.id)] = obj
+        key = "{}.{}".format(objclsname, obj.id)
+        with self.__writing():
+            for index in self.__unique.get(objclsname, ()):
+                self.__reject(index, key,
+                              value_of(obj, index.field, index.default))
+            self.__store(key, obj)
+            self.__changed.add(key)
+
+    def delete(self, obj=None):
+        """
+        Removes an instance from the dictionary
+
+        Args:
+            - obj: The instance to remove, nothing is done if None
+        """
+
+        if obj is None:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        with self.__writing():
+            if key in self.__objects:
+                self.__remove(key)
+                self.__changed.add(key)
+
+    def validate(self, obj, name, value):
+        """
+        Rejects a change that would give a stored instance the value
+        of a unique index held by another instance. Called before
+        the attribute is set.
+
+        Args:
+            - obj: The instance about to change
+            - name (str): The attribute about to change
+            - value: The new value of the attribute
+        """
+
+        indexes = self.__unique.get(obj.__class__.__name__)
+        if not indexes:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, "id", None))
+        with self.__lock.read():
+            if dict.get(self.__objects, key) is not obj:
+                return
+            for index in indexes:
+                if index.field == name:
+                    self.__reject(index, key, value)
+
+    def mark_dirty(self, obj, name=None, old=None):
+        """
+        Flags a stored instance as changed and moves it
+        in the indexes watching the changed attribute.
+        The unique indexes are checked again under the write lock,
+        since another thread may have taken the value after validate();
+        the caller then restores the old value.
+
+        Args:
+            - obj: The instance whose attributes changed
+            - name (str): The changed attribute
+            - old: The value of the attribute before the change
+        """
+
+        objclsname = obj.__class__.__name__
+        key = "{}.{}".format(objclsname, obj.id)
+        with self.__writing():
+            if dict.get(self.__objects, key) is not obj:
+                return
+            for index in self.__unique.get(objclsname, ()):
+                if index.field == name:
+                    self.__reject(index, key,
+                                  value_of(obj, name, index.default))
+            self.__changed.add(key)
+            for index in self.__indexes.get(objclsname, ()):
+                if name in index.fields:
+                    index.changed(key, obj, name, old)
 
     def save(self):
-        """Serializes instances to JSON and saves them to the file"""
+        """
+        Serializes instances to JSON and saves them to the file.
+        Inside batch(), or with a write-behind flush_interval, the write
+        is deferred and coalesced with the saves that follow it.
+        In background mode it starts a bgsave() instead; if one is
+        already running, another starts once it is done.
+        """
+
+        deferred = self.__batch_depth > 0 or self.__write_behind
+        if not deferred and not self.__background:
+            self.flush()
+            return
+        # counted before bgsave() is tried, so a save ending meanwhile
+        # sees it and starts the next one
+        with self.__defer_lock:
+            self.__deferred += 1
+        if not self.__exit_hook:
+            atexit.register(self.__flush_deferred)
+            self.__exit_hook = True
+        if not deferred:
+            self.bgsave()
+        elif self.__batch_depth == 0 and self.__flush_size is not None \
+                and self.__deferred >= self.__flush_size:
+            self.flush()
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager coalescing every save made inside it
+        into one write when the outermost batch exits
+        """
+
+        self.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.__batch_depth -= 1
+            if self.__batch_depth == 0:
+                self.__flush_deferred()
+
+    def flush(self):
+        """
+        Writes the changes to the file now.
+        Records are written one by one as they are encoded to a
+        temporary file renamed over the old one once complete.
+        Only the instances changed since the last save are encoded,
+        the JSON text of the others is reused from the previous save.
+        A thread-safe storage takes a snapshot of the records under
+        the read lock, then encodes and writes it without the lock.
+        A shared storage holds the file lock and first merges the
+        changes other processes saved, so it does not overwrite them.
+        A background save still running is waited for first.
+        """
+
+        self.__bg_lock.acquire()
+        try:
+            self.__flush()
+        finally:
+            self.__bg_release()
+
+    def __flush(self):
+        """Writes the changes to the file now, as flush() does"""
+
+        started = time.time()
+        with self.__flush_lock, self.__locked(exclusive=True):
+            if self.__file_lock is not None and self.is_stale():
+                self.__merge()
+            with self.__lock.read(), self.__defer_lock:
+                self.__deferred = 0
+                changed, self.__changed = self.__changed, set()
+                if self.__journal is None:
+                    items = self.__snapshot(changed)
+                else:
+                    records = self.__journal_records(changed)
+            if self.__journal is None:
+                self.__write(items, changed)
+            else:
+                self.__append(records)
+        self.__saved(started)
+
+    def bgsave(self):
+        """
+        Saves in the background, like the BGSAVE of Redis: a snapshot
+        of the instances is taken at once, then encoded and written by
+        a worker thread while the caller goes on. The snapshot holds
+        the cached JSON text of clean instances and a to_dict() copy of
+        the others, so later changes do not reach the file being written.
+        A journaled or shared storage saves in the foreground instead,
+        since its write cannot be split from the snapshot.
+
+        Returns:
+            bool: False if a background save is already running,
+            in which case nothing is done
+        """
+
+        if not self.__bg_lock.acquire(blocking=False):
+            return False
+        try:
+            if self.__journal is not None or self.__file_lock is not None:
+                try:
+                    self.__flush()
+                finally:
+                    self.__bg_release()
+                return True
+            worker = threading.Thread(target=self.__background_write,
+                                      args=self.__take_snapshot())
+            worker.start()
+        except BaseException:
+            self.__bg_lock.release()
+            raise
+        return True
+
+    def save_status(self):
+        """
+        Returns: A dictionary describing the saves:
+            - in_progress (bool): Whether a save is being written
+            - last_save_time (float): When the last save ended,
+            as a time.time() timestamp, None before any save
+            - last_status (str): "ok" or "failed", None before any save
+            - last_error (str): Why the last save failed, or None
+            - last_duration (float): How long it took, in seconds
+            - changes (int): The instances changed since the last save
+        """
+
+        last = self.__last_save
+        return {"in_progress": self.__bg_lock.locked(),
+                "last_save_time": last["time"],
+                "last_status": last["status"],
+                "last_error": last["error"],
+                "last_duration": last["duration"],
+                "changes": len(self.__changed)}
+
+    async def asave(self):
+        """
+        Saves without blocking the event loop: the file is encoded and
+        written in the default executor of the running loop. Calls made
+        while a save is running share the save that follows it, which
+        covers all their changes, so a burst of calls writes at most twice.
+        A storage that is not thread-safe takes its snapshot on the loop,
+        as bgsave() does; a journaled or shared one then flushes on the
+        loop, since its write cannot be split from the snapshot.
+        """
+
+        if self.__next_save is None:
+            self.__next_save = asyncio.get_running_loop().create_future()
+            if self.__saver is None:
+                self.__saver = asyncio.ensure_future(self.__save_pending())
+        await asyncio.shield(self.__next_save)
+
+    async def areload(self):
+        """
+        Reloads in the default executor of the running loop, so parsing
+        the file does not block it. Unless the storage is thread-safe,
+        the instances must not be used before it returns.
+        """
+
+        await asyncio.get_running_loop().run_in_executor(None, self.reload)
+
+    async def aall(self, cls=None, chunk_size=1000):
+        """
+        Asynchronous iterator over the stored instances, or the
+        instances of cls, in storage order. The keys are copied first,
+        then the instances are fetched chunk_size at a time, giving the
+        loop back between chunks. A thread-safe storage fetches them
+        in the default executor, where lazy instances get built.
+
+        Args:
+            - cls: A class or class name, None for every class
+            - chunk_size (int): The number of instances per chunk
+        """
+
+        loop = asyncio.get_running_loop()
+        with self.__lock.read():
+            if cls is None:
+                keys = list(self.__objects)
+            else:
+                keys = list(self.__classes.get(self.__classname(cls), ()))
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            if self.__thread_safe:
+                chunk = await loop.run_in_executor(None, self.__fetch, chunk)
+            else:
+                chunk = self.__fetch(chunk)
+                await asyncio.sleep(0)
+            for obj in chunk:
+                yield obj
+
+    def __fetch(self, keys):
+        """
+        Returns: The list of the instances still stored under keys
+
+        Args:
+            - keys (list): <class name>.<id> keys
+        """
+
+        get = self.__objects.get
+        with self.__lock.read():
+            return [obj for obj in map(get, keys) if obj is not None]
+
+    async def __save_pending(self):
+        """
+        Body of the task behind asave(): saves while calls are waiting,
+        then resolves the future they wait on
+        """
+
+        try:
+            while self.__next_save is not None:
+                waiting, self.__next_save = self.__next_save, None
+                try:
+                    await self.__save_once()
+                except Exception as error:
+                    waiting.set_exception(error)
+                else:
+                    waiting.set_result(None)
+        finally:
+            self.__saver = None
+
+    async def __save_once(self):
+        """Makes one save for asave(), offloaded where it can be"""
+
+        loop = asyncio.get_running_loop()
+        if self.__thread_safe:
+            await loop.run_in_executor(None, self.flush)
+            return
+        if self.__journal is not None or self.__file_lock is not None:
+            self.flush()
+            return
+        if not self.__bg_lock.acquire(blocking=False):
+            await loop.run_in_executor(None, self.__bg_lock.acquire)
+        try:
+            snapshot = self.__take_snapshot()
+            await loop.run_in_executor(None, self.__write_snapshot,
+                                       *snapshot)
+        finally:
+            self.__bg_release()
+
+    def __write(self, items, changed):
+        """
+        Writes a snapshot to the file or, in a sharded storage,
+        to the shards holding changed instances, instances holding
+        lists or dictionaries, and the missing shards
+
+        Args:
+            - items (iterable): (key, instance, record or JSON text) pairs
+            - changed (set): The keys changed since the previous save
+        """
+
+        if self.__shards is None:
+            with atomic_write(self.__file_path, self.__durability) as f:
+                self.__dump(f, self.__encode(items))
+            self.__seen = signature(self.__file_path)
+            return
+        count = self.__shards
+        paths = shard_paths(self.__file_path, count)
+        groups = {shard_of(key, count): [] for key in changed}
+        # lists and dictionaries change in place without flagging their
+        # instance, so the shards holding some are always rewritten
+        for key, obj in items:
+            if type(obj) is not str and self.__mutable(to_record(obj)):
+                groups.setdefault(shard_of(key, count), [])
+        for number, path in enumerate(paths):
+            if number not in groups and not os.path.exists(path):
+                groups[number] = []
+        if groups:
+            for key, obj in items:
+                group = groups.get(shard_of(key, count))
+                if group is not None:
+                    group.append((key, obj))
+        for number, group in groups.items():
+            with atomic_write(paths[number], self.__durability) as f:
+                write_lines(f, self.__encode(group))
+
+    def __take_snapshot(self):
+        """
+        Returns: The (items, changed keys, start time) of a save whose
+        records are copied, for a write made by another thread
+        """
+
+        with self.__flush_lock, self.__lock.read(), self.__defer_lock:
+            started = time.time()
+            self.__deferred = 0
+            changed, self.__changed = self.__changed, set()
+            return self.__snapshot(changed, copy=True), changed, started
+
+    def __background_write(self, items, changed, started):
+        """
+        Body of the background save thread: writes a snapshot, then
+        a new one while saves were requested meanwhile
+
+        Args:
+            - items (list): The (key, record or JSON text) pairs to write
+            - changed (set): The keys changed since the previous save
+            - started (float): When the save started
+        """
+
+        while True:
+            try:
+                self.__write_snapshot(items, changed, started)
+            except Exception:
+                pass
+            finally:
+                self.__bg_lock.release()
+            # a save() that failed to start counted itself first, so it is
+            # seen here unless a save started since holds the lock
+            if not self.__background or not self.__deferred or \
+                    not self.__bg_lock.acquire(blocking=False):
+                return
+            try:
+                items, changed, started = self.__take_snapshot()
+            except BaseException:
+                self.__bg_lock.release()
+                raise
+
+    def __bg_release(self):
+        """
+        Releases the lock of the background saves, then starts a
+        bgsave() for the saves requested while it was held
+        """
+
+        self.__bg_lock.release()
+        if self.__background and self.__deferred:
+            self.bgsave()
+
+    def __write_snapshot(self, items, changed, started):
+        """
+        Writes a snapshot taken by __take_snapshot(), and flags its
+        changed instances again if the write fails. The outcome is
+        recorded for save_status().
+
+        Args:
+            - items (list): The (key, record or JSON text) pairs to write
+            - changed (set): The keys changed since the previous save
+            - started (float): When the save started
+        """
+
+        try:
+            with self.__flush_lock:
+                self.__write(items, changed)
+        except Exception as error:
+            self.__changed.update(changed)
+            self.__saved(started, error)
+            raise
+        self.__saved(started)
+
+    def __saved(self, started, error=None):
+        """
+        Records the outcome of a save for save_status()
+
+        Args:
+            - started (float): When the save started
+            - error (Exception): Why it failed, None if it succeeded
+        """
 
-        objdict = {key: obj.to_dict() for key, obj in self.__objects.items()}
-        with open(self.__file_path, 'w') as f:
-            json.dump(objdict, f)
+        now = time.time()
+        self.__last_save = {
+                "time": now,
+                "status": "ok" if error is None else "failed",
+                "error": None if error is None else str(error),
+                "duration": now - started
+            }
+
+    def __snapshot(self, changed, copy=False):
+        """
+        Returns: The (key, instance, record or JSON text) pairs to write,
+        a list in a thread-safe storage and a view of the dictionary
+        otherwise
+
+        Args:
+            - changed (set): Keys of the instances changed since last time
+            - copy (bool): Return a list of records and JSON texts
+            that later changes cannot reach, as a thread-safe storage does
+        """
+
+        fragments = self.__fragments
+        if fragments is not None:
+            for key in changed:
+                fragments.pop(key, None)
+        # dict.items skips building the records of a lazy store
+        items = dict.items(self.__objects)
+        if self.__thread_safe or copy:
+            if fragments is None:
+                return [(key, self.__copy(obj)) for key, obj in items]
+            return [(key, fragments.get(key) or self.__copy(obj))
+                    for key, obj in items]
+        return items
+
+    @classmethod
+    def __copy(cls, obj):
+        """
+        Returns: The record of an instance, copied deeply when it holds
+        lists or dictionaries, which it shares with the instance
+
+        Args:
+            - obj: The instance or, in lazy mode, its record
+        """
+
+        record = to_record(obj)
+        if cls.__mutable(record):
+            return deepcopy(record)
+        return record
+
+    @staticmethod
+    def __mutable(record):
+        """
+        Returns: True if a record holds a list or a dictionary, which can
+        change in place without the instance being flagged as changed
+
+        Args:
+            - record (dict): The to_dict() representation of an instance
+        """
+
+        return any(type(value) in (list, dict) for value in record.values())
+
+    def __journal_records(self, changed):
+        """
+        Returns: The journal records of the changed instances
+
+        Args:
+            - changed (set): Keys of the instances changed since last time
+        """
+
+        records = []
+        for key in changed:
+            obj = self.__objects.get(key)
+            if obj is None:
+                records.append({"op": "del", "key": key})
+            else:
+                records.append({"op": "put", "key": key, "obj": obj.to_dict()})
+        return records
+
+    def __append(self, records):
+        """
+        Appends records to the journal
+
+        Args:
+            - records (list): The records of the changed instances
+        """
+
+        with self.__journal_lock:
+            self.__journal.append(records)
+        if self.__journal.size() > self.__compact_size:
+            if self.__compactor is None or not self.__compactor.is_alive():
+                self.__compactor = threading.Thread(
+                        target=self.compact, daemon=True)
+                self.__compactor.start()
+
+    def compact(self):
+        """
+        Folds the journal into a fresh snapshot of the JSON file.
+        The snapshot is written to a temporary file and renamed over
+        the old one, so a crash never leaves a half-written store.
+        Changes saved while the snapshot is written go to a new log.
+        """
+
+        if self.__journal is None:
+            return
+        with self.__journal_lock, self.__lock.read():
+            self.__journal.rotate()
+            objects = list(dict.items(self.__objects))
+        with atomic_write(self.__file_path, self.__durability) as f:
+            self.__dump(f, ((key, json.dumps(to_record(obj)))
+                            for key, obj in objects))
+        self.__journal.discard()
+
+    def __flush_deferred(self):
+        """Flushes if saves are waiting, at batch and interpreter exit"""
+
+        if self.__deferred:
+            self.flush()
+
+    def __flush_periodically(self):
+        """Body of the write-behind thread"""
+
+        while True:
+            time.sleep(self.__flush_interval)
+            self.__flush_deferred()
+
+    def __encode(self, items):
+        """
+        Yields the (key, JSON text) pair of each instance,
+        from the fragment cache when the instance is clean.
+        Instances holding lists or dictionaries are not cached, since
+        appending to a list does not flag its instance as changed.
+
+        Args:
+            - items (iterable): (key, instance, record or JSON text) pairs
+        """
+
+        fragments = self.__fragments
+        for key, obj in items:
+            if type(obj) is str:
+                yield key, obj
+                continue
+            fragment = None if fragments is None else fragments.get(key)
+            if fragment is None:
+                record = to_record(obj)
+                fragment = json.dumps(record)
+                if fragments is not None and not self.__mutable(record):
+                    fragments[key] = fragment
+            yield key, fragment
+
+    def __dump(self, f, parts):
+        """
+        Writes encoded records to f in the configured format
+
+        Args:
+            - f: The text file to write
+            - parts (iterable): (key, JSON text of the record) pairs
+        """
+
+        if self.__file_format == "ndjson":
+            write_lines(f, parts)
+        else:
+            write_object(f, parts)
 
     def reload(self):
-        """Deserializes JSON from the file and loads instances into memory"""
+        """
+        Deserializes JSON from the file and loads instances into memory.
+        The file is parsed one record at a time and each record is
+        released once its instance is built. The shards of a sharded
+        storage are decoded in parallel by worker processes.
+        A store found in another layout, such as the shards of another
+        count, a single file for a sharded storage or a journal for
+        one that is not journaled, is read and rewritten at once in the
+        layout of this storage, and its old files are removed. When a
+        single file and shards are both found, the last written wins.
+        """
+
+        foreign = [path for paths in self.__on_disk() for path in paths
+                   if path != self.__file_path]
+        with self.__flush_lock, self.__locked(exclusive=bool(foreign)), \
+                self.__writing():
+            single, shards = self.__on_disk()
+            dropped = []
+            if single and shards:
+                if self.__written(single) >= self.__written(shards):
+                    dropped, shards = shards, []
+                else:
+                    dropped, single = single, []
+            self.__seen = None
+            if shards:
+                for key, value in read_shards(shards, self.__processes):
+                    self.__load(key, value)
+            else:
+                self.__read_file()
+
+            if self.__shards is None:
+                written = [self.__file_path]
+            else:
+                written = shard_paths(self.__file_path, self.__shards)
+            own = written
+            if self.__journal is not None:
+                own = written + [self.__journal.frozen_path,
+                                 self.__journal.path]
+            stale = [path for path in single + shards if path not in own]
+            if stale:
+                keys = set(self.__objects)
+                self.__write(self.__snapshot(keys), keys)
+            for path in dropped + stale:
+                if path in written:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def __read_file(self):
+        """
+        Loads the single file, then replays the journal logged next to
+        it, by this storage or by a journaled one
+        """
 
         try:
             with open(self.__file_path, 'r') as f:
-                info = json.load(f)
-                for key, value in info.items():
-                    classname, obj_id = key.split(".")
-                    if classname in self.__allclass:
-                        classobj = self.__allclass[classname]
-                        instance = classobj(**value)
-                        self.__objects[key] = instance
+                self.__seen = signature(f.fileno())
+                for key, value in self.__records(f):
+                    self.__load(key, value)
         except FileNotFoundError:
+            pass
+        journal = self.__journal or Journal(self.__file_path + ".journal")
+        for record in journal.replay():
+            if record["op"] == "put":
+                self.__load(record["key"], record["obj"])
+            elif record["key"] in self.__objects:
+                self.__remove(record["key"])
+
+    def __on_disk(self):
+        """
+        Returns: The paths of the store found on disk, as a list of the
+        single file and its journal logs and a list of the shards,
+        those of the count of this storage last
+        """
+
+        log = Journal(self.__file_path + ".journal")
+        single = [path for path in (self.__file_path, log.frozen_path,
+                                    log.path) if os.path.exists(path)]
+        found = find_shards(self.__file_path)
+        counts = sorted(found, key=lambda count: (count == self.__shards,
+                                                  count))
+        return single, [path for count in counts for path in found[count]]
+
+    @staticmethod
+    def __written(paths):
+        """
+        Returns: When the last of some files was modified
+
+        Args:
+            - paths (list): The paths of the files
+        """
+
+        return max(os.stat(path).st_mtime_ns for path in paths)
+
+    def is_stale(self):
+        """
+        Returns: True if the file was saved by another process since this
+        storage last read or wrote it, from its signature without
+        reading it. Always False for a journaled or sharded storage.
+        """
+
+        if self.__journal is not None or self.__shards is not None:
+            return False
+        return signature(self.__file_path) != self.__seen
+
+    def refresh(self):
+        """
+        Loads the changes other processes saved since the file was
+        last read or written. The instances this storage changed and
+        did not save yet keep their changes, the others are added,
+        replaced or removed to match the file.
+
+        Returns:
+            bool: True if the file had changed
+        """
+
+        with self.__flush_lock, self.__locked():
+            if not self.is_stale():
+                return False
+            self.__merge()
+            return True
+
+    def __merge(self):
+        """Loads the file as refresh() does, with the file lock held"""
+
+        found = set()
+        with self.__writing():
+            try:
+                with open(self.__file_path, 'r') as f:
+                    seen = signature(f.fileno())
+                    for key, value in self.__records(f):
+                        found.add(key)
+                        if key in self.__changed:
+                            continue
+                        current = dict.get(self.__objects, key)
+                        if current is None or to_record(current) != value:
+                            self.__load(key, value)
+            except FileNotFoundError:
+                seen = None
+            gone = [key for key in self.__objects
+                    if key not in found and key not in self.__changed]
+            for key in gone:
+                self.__remove(key)
+                if self.__fragments is not None:
+                    self.__fragments.pop(key, None)
+            self.__seen = seen
+
+    def __locked(self, exclusive=False):
+        """
+        Returns: A context manager holding the file lock of a shared
+        storage, doing nothing otherwise
+
+        Args:
+            - exclusive (bool): Lock for writing instead of reading
+        """
+
+        if self.__file_lock is None:
+            return nullcontext()
+        if exclusive:
+            return self.__file_lock.exclusive()
+        return self.__file_lock.shared()
+
+    @contextmanager
+    def __guarded_write(self):
+        """
+        Holds the write side of the lock of a thread-safe storage, then
+        merges the sorted indexes so queries made under the read side
+        never modify them
+        """
+
+        with self.__lock.write():
+            try:
+                yield
+            finally:
+                for indexes in self.__indexes.values():
+                    for index in indexes:
+                        if isinstance(index, SortedIndex):
+                            index.merge()
+
+    def __load(self, key, value):
+        """
+        Builds an instance from its dictionary and stores it,
+        in lazy mode the dictionary itself is stored
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - value (dict): The to_dict() representation of the instance
+        """
+
+        classname, obj_id = key.split(".")
+        if classname in self.__allclass:
+            if type(self.__objects) is dict:
+                value = self.__build(key, value)
+            self.__store(key, value)
+            if self.__fragments is not None:
+                self.__fragments.pop(key, None)
+
+    def __store(self, key, obj):
+        """
+        Stores an instance and adds it to the class and secondary indexes
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance or, in lazy mode, its record
+        """
+
+        classname = key.split(".")[0]
+        if key in self.__objects:
+            self.__remove(key)
+        self.__objects[key] = obj
+        self.__order.add(key)
+        keys = self.__classes.get(classname)
+        if keys is None:
+            keys = self.__classes[classname] = OrderedKeys()
+        keys.add(key)
+        for index in self.__indexes.get(classname, ()):
+            index.add(key, obj)
+
+    def __remove(self, key):
+        """
+        Removes a stored instance and its class index entry
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+        """
+
+        classname = key.split(".")[0]
+        obj = dict.__getitem__(self.__objects, key)
+        for index in self.__indexes.get(classname, ()):
+            index.remove(key, obj)
+        del self.__objects[key]
+        self.__order.discard(key)
+        keys = self.__classes.get(classname)
+        if keys is not None:
+            keys.discard(key)
+
+    @staticmethod
+    def __reject(index, key, value):
+        """
+        Raises ValueError if another instance holds value in a unique index
+
+        Args:
+            - index (UniqueIndex): The unique index
+            - key (str): The key of the instance about to hold value
+            - value: The value of the indexed attribute
+        """
+
+        other = index.conflict(key, value)
+        if other is not None:
+            raise ValueError("{}.{} {!r} is already used by {}".format(
+                index.classname, index.field, value, other))
+
+    def __build_indexes(self, classname):
+        """
+        Fills the lazy indexes of a class, which are then maintained
+        like the others
+
+        Args:
+            - classname (str): The class name
+        """
+
+        if classname not in self.__unbuilt:
             return
+        with self.__writing():
+            for index in self.__unbuilt.pop(classname, ()):
+                self.add_index(index)
+
+    def __find_index(self, classname, kind):
+        """
+        Returns: The first index of a kind registered for a class,
+        filled first if it is lazy
+
+        Args:
+            - classname (str): The class name
+            - kind (type): The index class, e.g. GeoIndex
+        """
+
+        self.__build_indexes(classname)
+        for index in self.__indexes.get(classname, ()):
+            if isinstance(index, kind):
+                return index
+        raise LookupError("{} has no {}".format(classname, kind.__name__))
+
+    @staticmethod
+    def __classname(cls):
+        """
+        Returns: The name of cls
+
+        Args:
+            - cls: A class or class name
+        """
+
+        if isinstance(cls, str):
+            return cls
+        return cls.__name__
+
+    def __build(self, key, value):
+        """
+        Returns: The instance built from its dictionary
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - value (dict): The to_dict() representation of the instance
+        """
+
+        classobj = self.__layout[key.split(".")[0]]
+        return classobj.from_dict(value)
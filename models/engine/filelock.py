@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+"""
+File Lock Module:
+Advisory locks and change detection for storage files shared by
+several processes.
+
+A FileLock takes fcntl.flock() locks on a small companion file
+(<path>.lock), so the storage file itself can still be replaced by a
+rename while it is held. The locks are advisory: they only exclude
+processes that take them too. fcntl is not available on Windows.
+
+The signature of a file (its inode, size and modification time) changes
+whenever it is rewritten, since a save renames a new file over it.
+Comparing signatures tells whether another process saved without
+reading the file.
+
+Functions:
+    - signature(path): Returns the signature of a file, None if missing
+
+Classes:
+    - FileLock: Shared and exclusive locks on a storage file
+"""
+import os
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def signature(path):
+    """
+    Returns: The (inode, size, modification time) of a file,
+    or None if it does not exist
+
+    Args:
+        - path (str or int): The path of the file,
+        or the descriptor of an open file
+    """
+
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (info.st_ino, info.st_size, info.st_mtime_ns)
+
+
+class FileLock:
+    """
+    FileLock class: shared and exclusive advisory locks on a file,
+    held on <path>.lock. shared() and exclusive() are context managers.
+    The locks belong to the FileLock, not to a thread: the threads of
+    a process must not take them at the same time.
+
+    Attributes:
+        - path (str): The path of the lock file
+    """
+
+    def __init__(self, path):
+        """
+        Initializes the FileLock instance
+
+        Args:
+            - path (str): The path of the locked file
+        """
+
+        if fcntl is None:
+            raise OSError("File locks need fcntl, not available here")
+        self.path = path + ".lock"
+        self.__fd = None
+
+    @contextmanager
+    def shared(self):
+        """Holds a shared lock, for reading, for the with block"""
+
+        with self.__hold(fcntl.LOCK_SH):
+            yield
+
+    @contextmanager
+    def exclusive(self):
+        """Holds an exclusive lock, for writing, for the with block"""
+
+        with self.__hold(fcntl.LOCK_EX):
+            yield
+
+    def close(self):
+        """Closes the lock file, releasing any lock held"""
+
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+    @contextmanager
+    def __hold(self, operation):
+        """Holds a lock of the given fcntl operation for the with block"""
+
+        if self.__fd is None:
+            self.__fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.__fd, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.__fd, fcntl.LOCK_UN)
@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+"""
+Full Text Module:
+Defines the TextIndex class, an inverted index over the text
+attributes of one class, ranking matches with BM25.
+
+A query only reads the postings of its own words, so its cost grows
+with the number of matches and not with the number of instances.
+
+Functions:
+    - tokenize(text): Splits a text into lowercase words
+
+Classes:
+    - TextIndex: Maps each word to the keys of the instances using it
+"""
+import heapq
+import math
+import re
+from collections import Counter
+from models.engine.indexes import value_of
+
+
+_word = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Returns: The list of the lowercase words of text
+
+    Args:
+        - text (str): The text to split
+    """
+
+    return _word.findall(text.lower())
+
+
+class TextIndex:
+    """
+    TextIndex class: an inverted index over some text attributes of a
+    class. The attributes of an instance are indexed as one document.
+
+    Attributes:
+        - classname (str): The name of the indexed class
+        - fields (tuple): The names of the indexed attributes
+        - k1 (float): The BM25 term frequency saturation
+        - b (float): The BM25 document length normalization
+    """
+
+    def __init__(self, cls, fields, k1=1.2, b=0.75):
+        """
+        Initializes the TextIndex instance
+
+        Args:
+            - cls: The indexed class
+            - fields (iterable): The indexed attributes
+            - k1 (float): The BM25 term frequency saturation
+            - b (float): The BM25 document length normalization
+        """
+
+        self.classname = cls.__name__
+        self.fields = tuple(fields)
+        self.k1 = k1
+        self.b = b
+        self.__postings = {}
+        self.__documents = {}
+        self.__total_length = 0
+
+    def __len__(self):
+        """Returns: The number of indexed instances"""
+
+        return len(self.__documents)
+
+    def add(self, key, obj):
+        """
+        Indexes an instance
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance or its record
+        """
+
+        words = []
+        for field in self.fields:
+            value = value_of(obj, field)
+            if value is not None:
+                words.extend(tokenize(str(value)))
+        if not words:
+            return
+        counts = Counter(words)
+        for word, frequency in counts.items():
+            self.__postings.setdefault(word, {})[key] = frequency
+        self.__documents[key] = (len(words), tuple(counts))
+        self.__total_length += len(words)
+
+    def remove(self, key, obj):
+        """
+        Removes an instance from the index
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance or its record
+        """
+
+        document = self.__documents.pop(key, None)
+        if document is None:
+            return
+        length, words = document
+        self.__total_length -= length
+        for word in words:
+            postings = self.__postings[word]
+            del postings[key]
+            if not postings:
+                del self.__postings[word]
+
+    def changed(self, key, obj, name, old):
+        """
+        Reindexes a stored instance after one of its fields changed
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance
+            - name (str): The changed field
+            - old: The previous value of the field
+        """
+
+        self.remove(key, obj)
+        self.add(key, obj)
+
+    def search(self, query, limit=None):
+        """
+        Returns: A list of (score, key) pairs of the instances using
+        any word of query, the most relevant first
+
+        Args:
+            - query (str): The words to look for
+            - limit (int): The maximum number of results, None for all
+        """
+
+        count = len(self.__documents)
+        if not count:
+            return []
+        average = self.__total_length / count
+        scores = {}
+        for word in set(tokenize(query)):
+            postings = self.__postings.get(word)
+            if postings is None:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) /
+                           (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                length = self.__documents[key][0]
+                norm = self.k1 * (1 - self.b + self.b * length / average)
+                score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                scores[key] = scores.get(key, 0.0) + score
+        ranked = ((-score, key) for key, score in scores.items())
+        if limit is None:
+            ranked = sorted(ranked)
+        else:
+            ranked = heapq.nsmallest(limit, ranked)
+        return [(-score, key) for score, key in ranked]
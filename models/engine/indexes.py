@@ -0,0 +1,716 @@
+#!/usr/bin/python3
+"""
+Indexes Module:
+Defines the secondary indexes FileStorage maintains over
+the attributes of the stored instances.
+
+An index watches some attributes (fields) of one class and is kept up
+to date by FileStorage through add(), remove() and changed().
+
+Attributes:
+    - EARTH_RADIUS_KM (float): The mean radius of the Earth
+    - OPERATORS (dict): The comparison operators of search conditions
+
+Functions:
+    - value_of(obj, name, default): Reads an attribute of an instance
+    or of a record not yet built
+    - distance_km(lat1, lon1, lat2, lon2): Great-circle distance
+    - bounding_box(lat, lon, radius_km): The box around a circle
+    - in_box(lat, lon, south, west, north, east): Tests a point
+    - check_coordinates(*values): Rejects NaN and infinite coordinates
+    - matches(obj, field, op, value): Tests a search condition
+    - range_of(op, value): The between() arguments of a condition
+
+Classes:
+    - HashIndex: Maps each value of an attribute to the keys holding it
+    - UniqueIndex: HashIndex whose values may be held by one key only
+    - GeoIndex: Grid of the instances by latitude and longitude
+    - SortedIndex: The instances ordered by the value of an attribute
+"""
+import bisect
+import heapq
+import math
+import operator
+
+
+EARTH_RADIUS_KM = 6371.0088
+OPERATORS = {
+        "<": operator.lt,
+        "<=": operator.le,
+        ">": operator.gt,
+        ">=": operator.ge,
+        "=": operator.eq,
+        "==": operator.eq,
+        "!=": operator.ne
+    }
+
+
+def value_of(obj, name, default=None):
+    """
+    Returns: The value of attribute name of obj
+
+    Args:
+        - obj: A model instance or its to_dict() record
+        - name (str): The attribute name
+        - default: The value of an unset attribute
+    """
+
+    if type(obj) is dict:
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def matches(obj, field, op, value, default=None):
+    """
+    Returns: True if an attribute of obj compares to value as op says,
+    False when the two cannot be compared
+
+    Args:
+        - obj: A model instance or its to_dict() record
+        - field (str): The attribute name
+        - op (str): One of OPERATORS
+        - value: The value to compare the attribute to
+        - default: The value of an unset attribute
+    """
+
+    try:
+        return OPERATORS[op](value_of(obj, field, default), value)
+    except TypeError:
+        return False
+
+
+def range_of(op, value):
+    """
+    Returns: The SortedIndex.between() keyword arguments selecting
+    the values that compare to value as op says, None for "!="
+
+    Args:
+        - op (str): One of OPERATORS
+        - value: The value of the condition
+    """
+
+    if op in ("=", "=="):
+        return {"low": value, "high": value}
+    if op in ("<", "<="):
+        return {"high": value, "include_high": op == "<="}
+    if op in (">", ">="):
+        return {"low": value, "include_low": op == ">="}
+    return None
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """
+    Returns: The great-circle distance between two points in kilometers
+
+    Args:
+        - lat1, lon1 (float): The first point, in degrees
+        - lat2, lon2 (float): The second point, in degrees
+    """
+
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _wrap(lon):
+    """Returns: lon brought back between -180 and 180"""
+
+    if -180 <= lon <= 180:
+        return lon
+    return (lon + 180) % 360 - 180
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Returns: (south, west, north, east), the smallest box holding the
+    points within radius_km of a point. west is greater than east
+    when the box crosses the 180th meridian.
+
+    Args:
+        - lat, lon (float): The center, in degrees
+        - radius_km (float): The radius in kilometers
+    """
+
+    angle = radius_km / EARTH_RADIUS_KM
+    south = lat - math.degrees(angle)
+    north = lat + math.degrees(angle)
+    if south <= -90 or north >= 90:
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+    ratio = math.sin(angle) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return south, -180.0, north, 180.0
+    dlon = math.degrees(math.asin(ratio))
+    return south, _wrap(lon - dlon), north, _wrap(lon + dlon)
+
+
+def in_box(lat, lon, south, west, north, east):
+    """
+    Returns: True if a point lies in a box made by bounding_box()
+
+    Args:
+        - lat, lon (float): The point, in degrees
+        - south, west, north, east (float): The box, in degrees
+    """
+
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lon <= east
+    return lon >= west or lon <= east
+
+
+def check_coordinates(*values):
+    """
+    Raises ValueError unless every value is a finite number:
+    NaN and infinities fall in no cell of a grid
+
+    Args:
+        - values (float): Latitudes, longitudes or radiuses
+    """
+
+    for value in values:
+        if not math.isfinite(value):
+            raise ValueError("Invalid coordinate: {}".format(value))
+
+
+class HashIndex:
+    """
+    HashIndex class: maps each value of an attribute
+    to the keys of the instances holding it.
+
+    Attributes:
+        - classname (str): The name of the indexed class
+        - field (str): The name of the indexed attribute
+        - default: The class default of the attribute
+    """
+
+    def __init__(self, cls, field):
+        """
+        Initializes the HashIndex instance
+
+        Args:
+            - cls: The indexed class
+            - field (str): The indexed attribute
+        """
+
+        self.classname = cls.__name__
+        self.field = field
+        self.fields = (field,)
+        self.default = getattr(cls, field, None)
+        self.__buckets = {}
+
+    def add(self, key, obj):
+        """
+        Indexes an instance
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance or its record
+        """
+
+        self._insert(key, value_of(obj, self.field, self.default))
+
+    def remove(self, key, obj):
+        """
+        Removes an instance from the index
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance or its record
+        """
+
+        self._discard(key, value_of(obj, self.field, self.default))
+
+    def update(self, key, old, new):
+        """
+        Moves an instance whose attribute changed
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - old: The previous value of the attribute
+            - new: The new value of the attribute
+        """
+
+        self._discard(key, old)
+        self._insert(key, new)
+
+    def changed(self, key, obj, name, old):
+        """
+        Moves a stored instance after one of its fields changed
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance
+            - name (str): The changed field
+            - old: The previous value of the field
+        """
+
+        self.update(key, old, value_of(obj, name, self.default))
+
+    def lookup(self, value):
+        """Returns: The keys of the instances whose attribute is value"""
+
+        return list(self.__buckets.get(value, ()))
+
+    def _insert(self, key, value):
+        """Adds key under value, empty values are not indexed"""
+
+        if value is None or value == "":
+            return
+        self.__buckets.setdefault(value, {})[key] = None
+
+    def _discard(self, key, value):
+        """Removes key from under value"""
+
+        bucket = self.__buckets.get(value)
+        if bucket is None:
+            return
+        bucket.pop(key, None)
+        if not bucket:
+            del self.__buckets[value]
+
+
+class UniqueIndex(HashIndex):
+    """
+    UniqueIndex class: a HashIndex whose values identify one instance,
+    e.g. the email of a user. Values are compared after normalize().
+
+    The index itself accepts duplicates, so a file written before the
+    index existed still loads; FileStorage calls conflict() to reject
+    the writes that would add new ones.
+    """
+
+    def __init__(self, cls, field, normalize=None):
+        """
+        Initializes the UniqueIndex instance
+
+        Args:
+            - cls: The indexed class
+            - field (str): The indexed attribute
+            - normalize (function): Maps a str value to the form compared,
+            e.g. str.lower, None to compare values as they are
+        """
+
+        super().__init__(cls, field)
+        self.__normalize = normalize
+
+    def normalize(self, value):
+        """Returns: The form of value the index compares"""
+
+        if self.__normalize is not None and isinstance(value, str):
+            return self.__normalize(value)
+        return value
+
+    def conflict(self, key, value):
+        """
+        Returns: The key of another instance holding value, None if
+        value is free or empty
+
+        Args:
+            - key (str): The key of the instance about to hold value
+            - value: The value of the attribute
+        """
+
+        for other in self.lookup(value):
+            if other != key:
+                return other
+        return None
+
+    def lookup(self, value):
+        """Returns: The keys of the instances whose attribute is value"""
+
+        return super().lookup(self.normalize(value))
+
+    def _insert(self, key, value):
+        """Adds key under the normalized value"""
+
+        super()._insert(key, self.normalize(value))
+
+    def _discard(self, key, value):
+        """Removes key from under the normalized value"""
+
+        super()._discard(key, self.normalize(value))
+
+
+class GeoIndex:
+    """
+    GeoIndex class: a grid of square cells over latitude and longitude,
+    each holding the keys of the instances located in it. A query only
+    reads the cells overlapping its box.
+
+    Instances whose coordinates are unset (still the class defaults),
+    not numbers or out of range are not indexed.
+
+    Attributes:
+        - classname (str): The name of the indexed class
+        - fields (tuple): The latitude and longitude attribute names
+        - cell_size (float): The side of a cell in degrees
+    """
+
+    def __init__(self, cls, lat_field="latitude", lon_field="longitude",
+                 cell_size=0.1):
+        """
+        Initializes the GeoIndex instance
+
+        Args:
+            - cls: The indexed class
+            - lat_field (str): The latitude attribute, in degrees
+            - lon_field (str): The longitude attribute, in degrees
+            - cell_size (float): The side of a cell in degrees, 0.1 is
+            about 11 km
+        """
+
+        self.classname = cls.__name__
+        self.fields = (lat_field, lon_field)
+        self.cell_size = cell_size
+        self.__defaults = (getattr(cls, lat_field, None),
+                           getattr(cls, lon_field, None))
+        self.__columns = math.ceil(360 / cell_size)
+        self.__rows = math.ceil(180 / cell_size)
+        self.__cells = {}
+        self.__points = {}
+
+    def __len__(self):
+        """Returns: The number of indexed instances"""
+
+        return len(self.__points)
+
+    def add(self, key, obj):
+        """
+        Indexes an instance
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance or its record
+        """
+
+        point = self.__point(obj)
+        if point is None:
+            return
+        self.__points[key] = point
+        self.__cells.setdefault(self.__cell(*point), {})[key] = point
+
+    def remove(self, key, obj):
+        """
+        Removes an instance from the index
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance or its record
+        """
+
+        point = self.__points.pop(key, None)
+        if point is None:
+            return
+        cell = self.__cell(*point)
+        bucket = self.__cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self.__cells[cell]
+
+    def changed(self, key, obj, name, old):
+        """
+        Moves a stored instance after its latitude or longitude changed
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance
+            - name (str): The changed field
+            - old: The previous value of the field
+        """
+
+        self.remove(key, obj)
+        self.add(key, obj)
+
+    def within(self, south, west, north, east):
+        """
+        Returns: The keys of the instances located in a box,
+        which crosses the 180th meridian when west is greater than east.
+        Raises ValueError if a coordinate is NaN or infinite.
+
+        Args:
+            - south, west, north, east (float): The box, in degrees
+        """
+
+        check_coordinates(south, west, north, east)
+        keys = []
+        for bucket in self.__buckets(south, west, north, east):
+            for key, (lat, lon) in bucket.items():
+                if in_box(lat, lon, south, west, north, east):
+                    keys.append(key)
+        return keys
+
+    def near(self, lat, lon, radius_km, limit=None):
+        """
+        Returns: A list of (distance in km, key) pairs of the instances
+        within radius_km of a point, the closest first. Raises ValueError
+        if the radius is negative, or it or a coordinate is NaN or infinite.
+
+        Args:
+            - lat, lon (float): The point, in degrees
+            - radius_km (float): The search radius in kilometers
+            - limit (int): The maximum number of results, None for all
+        """
+
+        check_coordinates(lat, lon, radius_km)
+        if radius_km < 0:
+            raise ValueError("Negative radius: {}".format(radius_km))
+        box = bounding_box(lat, lon, radius_km)
+        found = []
+        for bucket in self.__buckets(*box):
+            for key, point in bucket.items():
+                distance = distance_km(lat, lon, *point)
+                if distance <= radius_km:
+                    found.append((distance, key))
+        if limit is None:
+            return sorted(found)
+        return heapq.nsmallest(limit, found)
+
+    def __buckets(self, south, west, north, east):
+        """Yields the non-empty cells overlapping a box"""
+
+        first_row = self.__row(max(south, -90.0))
+        last_row = self.__row(min(north, 90.0))
+        if west <= east:
+            columns = range(self.__column(west), self.__column(east) + 1)
+        else:
+            columns = list(range(self.__column(west), self.__columns)) + \
+                list(range(0, self.__column(east) + 1))
+        cells = self.__cells
+        if (last_row - first_row + 1) * len(columns) > len(cells):
+            wanted = set(columns)
+            for (column, row), bucket in cells.items():
+                if first_row <= row <= last_row and column in wanted:
+                    yield bucket
+            return
+        for row in range(first_row, last_row + 1):
+            for column in columns:
+                bucket = cells.get((column, row))
+                if bucket is not None:
+                    yield bucket
+
+    def __column(self, lon):
+        """Returns: The grid column of a longitude"""
+
+        return min(int((lon + 180) // self.cell_size), self.__columns - 1)
+
+    def __row(self, lat):
+        """Returns: The grid row of a latitude"""
+
+        return min(int((lat + 90) // self.cell_size), self.__rows - 1)
+
+    def __cell(self, lat, lon):
+        """Returns: The grid cell of a point"""
+
+        return self.__column(lon), self.__row(lat)
+
+    def __point(self, obj):
+        """
+        Returns: The (latitude, longitude) of an instance,
+        None if it cannot be indexed
+        """
+
+        lat = value_of(obj, self.fields[0], self.__defaults[0])
+        lon = value_of(obj, self.fields[1], self.__defaults[1])
+        if (lat, lon) == self.__defaults:
+            return None
+        try:
+            lat = float(lat)
+            lon = float(lon)
+        except (TypeError, ValueError):
+            return None
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return None
+        return lat, lon
+
+
+class SortedIndex:
+    """
+    SortedIndex class: the keys of the instances ordered by the value
+    of a numeric attribute, for range conditions such as price < 120.
+
+    Keys added in bulk (e.g. by a reload) are queued and sorted in one
+    pass by the next query, other changes are applied in place.
+    int and float values are indexed as they are, numeric strings as
+    floats; other values and NaN are not indexed.
+
+    Attributes:
+        - classname (str): The name of the indexed class
+        - field (str): The name of the indexed attribute
+        - fields (tuple): The watched attributes, (field,)
+        - default: The class default of the attribute
+    """
+
+    BULK_SIZE = 64
+
+    def __init__(self, cls, field):
+        """
+        Initializes the SortedIndex instance
+
+        Args:
+            - cls: The indexed class
+            - field (str): The indexed attribute, int or float
+        """
+
+        self.classname = cls.__name__
+        self.field = field
+        self.fields = (field,)
+        self.default = getattr(cls, field, None)
+        self.__entries = []
+        self.__pending = []
+        self.__values = {}
+
+    def __len__(self):
+        """Returns: The number of indexed instances"""
+
+        return len(self.__values)
+
+    def add(self, key, obj):
+        """
+        Indexes an instance
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance or its record
+        """
+
+        value = self.__convert(value_of(obj, self.field, self.default))
+        if value is None:
+            return
+        self.__values[key] = value
+        self.__pending.append((value, key))
+
+    def remove(self, key, obj):
+        """
+        Removes an instance from the index
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance or its record
+        """
+
+        value = self.__values.pop(key, None)
+        if value is None:
+            return
+        self.merge()
+        entries = self.__entries
+        del entries[bisect.bisect_left(entries, (value, key))]
+
+    def changed(self, key, obj, name, old):
+        """
+        Moves a stored instance after its attribute changed
+
+        Args:
+            - key (str): The <class name>.<id> key of the instance
+            - obj: The instance
+            - name (str): The changed field
+            - old: The previous value of the field
+        """
+
+        self.remove(key, obj)
+        self.add(key, obj)
+
+    def between(self, low=None, high=None, include_low=True,
+                include_high=True, reverse=False):
+        """
+        Returns: The keys of the instances whose value is between
+        low and high, in ascending order of value
+
+        Args:
+            - low: The lower bound, None for no bound
+            - high: The upper bound, None for no bound
+            - include_low (bool): Whether low itself matches
+            - include_high (bool): Whether high itself matches
+            - reverse (bool): Return the keys in descending order
+        """
+
+        start, end = self.__bounds(low, high, include_low, include_high)
+        keys = [key for _, key in self.__entries[start:end]]
+        if reverse:
+            keys.reverse()
+        return keys
+
+    def count_between(self, low=None, high=None, include_low=True,
+                      include_high=True):
+        """
+        Returns: The number of instances between() would return,
+        without building the list
+
+        Args:
+            - low, high, include_low, include_high: As for between()
+        """
+
+        start, end = self.__bounds(low, high, include_low, include_high)
+        return max(end - start, 0)
+
+    def __bounds(self, low, high, include_low, include_high):
+        """Returns: The (start, end) slice of the entries in range"""
+
+        self.merge()
+        entries = self.__entries
+        first = operator.itemgetter(0)
+        try:
+            if low is None:
+                start = 0
+            elif include_low:
+                start = bisect.bisect_left(entries, low, key=first)
+            else:
+                start = bisect.bisect_right(entries, low, key=first)
+            if high is None:
+                end = len(entries)
+            elif include_high:
+                end = bisect.bisect_right(entries, high, key=first)
+            else:
+                end = bisect.bisect_left(entries, high, key=first)
+        except TypeError:
+            return 0, 0
+        return start, end
+
+    def merge(self):
+        """
+        Moves the queued entries into the sorted entries, which the
+        next query does otherwise. A storage shared by threads merges
+        after each change so queries never modify the index.
+        """
+
+        pending = self.__pending
+        if not pending:
+            return
+        if len(pending) < self.BULK_SIZE:
+            for entry in pending:
+                bisect.insort(self.__entries, entry)
+        else:
+            self.__entries.extend(pending)
+            self.__entries.sort()
+        self.__pending = []
+
+    @staticmethod
+    def holds(value):
+        """
+        Returns: True if value can be looked up in the index,
+        a number that is not NaN
+
+        Args:
+            - value: The value of a condition
+        """
+
+        return isinstance(value, (int, float)) and value == value
+
+    def __convert(self, value):
+        """
+        Returns: The value to index, numbers unchanged and numeric
+        strings as floats, None if value cannot be indexed
+        """
+
+        if isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                return None
+        if not self.holds(value):
+            return None
+        return value
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+"""
+Journal Module:
+Defines the Journal class, an append-only log of storage changes.
+
+Each line of the log is one JSON record:
+    - {"op": "put", "key": <key>, "obj": <to_dict() of the instance>}
+    - {"op": "del", "key": <key>}
+
+Attributes:
+    - path (str): The path of the live log file
+    - frozen_path (str): The path of the log being compacted
+    - durability (str): What an append flushes to disk,
+    see models/engine/atomic.py
+
+Methods:
+    - size(self): Returns the size in bytes of the live log
+    - append(self, records): Appends records to the live log
+    - replay(self): Yields every logged record in order
+    - rotate(self): Freezes the live log so it can be compacted
+    - discard(self): Removes the frozen log once it is compacted
+"""
+import json
+import os
+import shutil
+from models.engine.atomic import check_durability, sync, sync_dir
+
+
+class Journal:
+    """
+    Journal class responsible for appending and replaying
+    put/delete records of a FileStorage.
+    """
+
+    def __init__(self, path, durability="file"):
+        """
+        Initializes the Journal instance
+
+        Args:
+            - path (str): The path of the live log file
+            - durability (str): "none", "file" or "dir"
+        """
+
+        check_durability(durability)
+        self.path = path
+        self.frozen_path = path + ".old"
+        self.durability = durability
+
+    def size(self):
+        """Returns: The size in bytes of the live log"""
+
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, records):
+        """
+        Appends records to the live log
+
+        Args:
+            - records (iterable): The records to append
+        """
+
+        lines = [json.dumps(record) + "\n" for record in records]
+        if not lines:
+            return
+        created = not os.path.exists(self.path)
+        with open(self.path, 'a') as f:
+            f.writelines(lines)
+            sync(f, self.durability)
+        if created and self.durability == "dir":
+            sync_dir(self.path)
+
+    def replay(self):
+        """
+        Yields the records of the frozen log, then of the live log.
+        A torn last line, as left by a crash mid-append,
+        is cut off so later appends start on a clean line.
+        """
+
+        for path in (self.frozen_path, self.path):
+            if not os.path.exists(path):
+                continue
+            offset = 0
+            torn = False
+            with open(path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        torn = True
+                        break
+                    yield json.loads(line)
+                    offset += len(line)
+            if torn:
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+
+    def rotate(self):
+        """
+        Freezes the live log so it can be compacted.
+        A frozen log left over by an interrupted compaction
+        is extended instead of overwritten.
+        """
+
+        if not os.path.exists(self.path):
+            return
+        if not os.path.exists(self.frozen_path):
+            os.replace(self.path, self.frozen_path)
+            return
+        with open(self.path, 'rb') as src, \
+                open(self.frozen_path, 'ab') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(self.path)
+
+    def discard(self):
+        """Removes the frozen log once its records are in the snapshot"""
+
+        try:
+            os.remove(self.frozen_path)
+        except FileNotFoundError:
+            return
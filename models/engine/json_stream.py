@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+"""
+JSON Stream Module:
+Reads and writes the records of a storage file one at a time, so
+neither a reload nor a save holds a second copy of the whole store.
+
+Two layouts are supported:
+    - json: one JSON object mapping "<class name>.<id>" keys to records,
+    the layout of file.json
+    - ndjson: one record per line, the key is read from the
+    "__class__" and "id" of the record
+
+Functions:
+    - iter_object(f): Yields the (key, record) pairs of a JSON object
+    - iter_lines(f): Yields the (key, record) pairs of a NDJSON file
+    - write_object(f, parts): Writes encoded records as a JSON object
+    - write_lines(f, parts): Writes encoded records as NDJSON lines
+"""
+import json
+
+
+_decoder = json.JSONDecoder()
+_whitespace = " \t\n\r"
+
+
+class _Reader:
+    """
+    _Reader class: a buffer over a text file
+    that is refilled as values are decoded from it.
+    """
+
+    def __init__(self, f, chunk_size):
+        """
+        Initializes the _Reader instance
+
+        Args:
+            - f: The text file to read
+            - chunk_size (int): The number of characters read at a time
+        """
+
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Reads one more chunk, returns False at the end of the file"""
+
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Returns: The next non-whitespace character, "" at the end"""
+
+        while True:
+            while self.pos < len(self.buf) and \
+                    self.buf[self.pos] in _whitespace:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        """Consumes the next character, which must be one of chars"""
+
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(
+                    "Expecting one of {!r}".format(chars), self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decodes and returns the next JSON value"""
+
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # a number cut by the end of the buffer decodes too early
+            if end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_object(f, chunk_size=1 << 16):
+    """
+    Yields the (key, record) pairs of the JSON object stored in f
+
+    Args:
+        - f: The text file to read
+        - chunk_size (int): The number of characters read at a time
+    """
+
+    reader = _Reader(f, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            if reader.peek() != '"':
+                reader.expect('"')
+            key = reader.value()
+            reader.expect(":")
+            yield key, reader.value()
+            if reader.expect(",}") == "}":
+                break
+    if reader.peek():
+        raise json.JSONDecodeError("Extra data", reader.buf, reader.pos)
+
+
+def iter_lines(f):
+    """
+    Yields the (key, record) pairs of the NDJSON file f
+
+    Args:
+        - f: The text file to read
+    """
+
+    for line in f:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        yield "{}.{}".format(record["__class__"], record["id"]), record
+
+
+def write_object(f, parts):
+    """
+    Writes encoded records as one JSON object, in the layout of json.dump
+
+    Args:
+        - f: The text file to write
+        - parts (iterable): (key, JSON text of the record) pairs
+    """
+
+    f.write("{")
+    separator = ""
+    for key, fragment in parts:
+        f.write(separator + json.dumps(key) + ": " + fragment)
+        separator = ", "
+    f.write("}")
+
+
+def write_lines(f, parts):
+    """
+    Writes encoded records one per line
+
+    Args:
+        - f: The text file to write
+        - parts (iterable): (key, JSON text of the record) pairs
+    """
+
+    for key, fragment in parts:
+        f.write(fragment + "\n")
@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+"""
+Lazy Objects Module:
+Defines the LazyObjects class, the dictionary of instances used by
+FileStorage in lazy mode.
+
+Records read from the JSON file are kept as plain dictionaries
+and only turned into model instances the first time they are
+looked up, so starting the console does not build the whole store.
+With a lock, two threads looking up the same record get the same
+instance. Every method returning values, and dict(), update() and
+{**objects} copying them, returns instances, never records.
+
+Functions:
+    - to_record(value): Returns the to_dict() form of a stored value
+
+Methods:
+    - __getitem__(self, key): Returns the instance, building it if needed
+    - get(self, key, default): Returns the instance or default
+    - pop(self, key, default): Removes and returns the instance
+    - values(self): Returns a view of the instances
+    - items(self): Returns a view of the (key, instance) pairs
+    - __iter__(self): Returns an iterator over the keys
+    - copy(self): Returns a dictionary of the instances
+    - popitem(self): Removes and returns the last (key, instance) pair
+    - setdefault(self, key, default): Returns the instance, storing
+    default if there is none
+    - is_loaded(self, key): Tells if the instance is already built
+"""
+from collections.abc import ItemsView, ValuesView
+
+
+_missing = object()
+
+
+def to_record(value):
+    """
+    Returns the to_dict() form of a stored value
+
+    Args:
+        - value: A model instance or a record not yet built
+    """
+
+    if type(value) is dict:
+        return value
+    return value.to_dict()
+
+
+class LazyObjects(dict):
+    """
+    LazyObjects class: a dictionary of instances
+    that builds each instance on first access.
+    """
+
+    def __init__(self, build, lock=None):
+        """
+        Initializes the LazyObjects instance
+
+        Args:
+            - build (callable): Builds an instance from its key
+            and its to_dict() record
+            - lock (threading.Lock): Held while an instance is built,
+            None when a single thread looks instances up
+        """
+
+        super().__init__()
+        self.__build = build
+        self.__lock = lock
+
+    def __getitem__(self, key):
+        """Returns the instance stored under key, building it if needed"""
+
+        value = super().__getitem__(key)
+        if type(value) is dict:
+            if self.__lock is None:
+                value = self.__build(key, value)
+                super().__setitem__(key, value)
+                return value
+            with self.__lock:
+                value = super().__getitem__(key)
+                if type(value) is dict:
+                    value = self.__build(key, value)
+                    super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        """Returns the instance stored under key, or default"""
+
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, default=_missing):
+        """Removes the instance stored under key and returns it"""
+
+        if key in self:
+            value = self[key]
+            super().pop(key)
+            return value
+        if default is _missing:
+            raise KeyError(key)
+        return default
+
+    def __iter__(self):
+        """
+        Returns an iterator over the keys. Overriding it makes dict(),
+        update() and {**objects} look the values up through __getitem__,
+        where a plain dict subclass has its records copied as they are.
+        """
+
+        return super().__iter__()
+
+    def __eq__(self, other):
+        """Compares the instances, not the records, with a mapping"""
+
+        if not isinstance(other, dict):
+            return NotImplemented
+        return dict(self) == other
+
+    def __ne__(self, other):
+        """Compares the instances, not the records, with a mapping"""
+
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __or__(self, other):
+        """Returns a dictionary of the instances updated with other"""
+
+        return dict(self).__or__(other)
+
+    def __repr__(self):
+        """Returns the representation of the instances"""
+
+        return repr(dict(self))
+
+    def copy(self):
+        """Returns a dictionary of the instances, built if needed"""
+
+        return dict(self)
+
+    def popitem(self):
+        """Removes the last stored instance and returns its key and it"""
+
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        """Returns the instance stored under key, storing default first
+        if there is none"""
+
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def values(self):
+        """Returns a view of the instances, built as they are reached"""
+
+        return ValuesView(self)
+
+    def items(self):
+        """Returns a view of the (key, instance) pairs"""
+
+        return ItemsView(self)
+
+    def is_loaded(self, key):
+        """Tells if the instance stored under key is already built"""
+
+        return type(super().__getitem__(key)) is not dict
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""
+Ordered Keys Module:
+Defines the OrderedKeys class, the storage order of the keys FileStorage
+pages through with scan().
+
+A dictionary keeps its keys in order but cannot start an iteration
+in the middle: resuming after a key means walking every key before it.
+OrderedKeys appends the keys to a list and maps each key to its
+position, so an iteration resumes right after any key. A removed key
+leaves a hole, skipped by iterations, and the list is rebuilt without
+its holes once they outnumber the keys.
+
+Classes:
+    - OrderedKeys: Keys in the order they were added, seekable by key
+"""
+
+
+class OrderedKeys:
+    """
+    OrderedKeys class: keys in the order they were added, with the
+    position of each. As in a dictionary, a key added again keeps its
+    position, and a key removed then added again moves to the end.
+    """
+
+    def __init__(self):
+        """Initializes the OrderedKeys instance"""
+
+        self.__keys = []
+        self.__positions = {}
+
+    def __len__(self):
+        """Returns: The number of keys"""
+
+        return len(self.__positions)
+
+    def __contains__(self, key):
+        """Returns: True if key is one of the keys"""
+
+        return key in self.__positions
+
+    def __iter__(self):
+        """Returns: An iterator over the keys, in order"""
+
+        return filter(None, self.__keys)
+
+    def after(self, key):
+        """
+        Returns: An iterator over the keys following key, in order,
+        without walking the keys before it. Keys added during the
+        iteration are not reached.
+
+        Args:
+            - key (str): One of the keys
+        """
+
+        keys = self.__keys
+        start = self.__positions[key] + 1
+        return filter(None, map(keys.__getitem__, range(start, len(keys))))
+
+    def add(self, key):
+        """
+        Adds a key at the end, unless it is already there
+
+        Args:
+            - key (str): The key, a non-empty string
+        """
+
+        if key in self.__positions:
+            return
+        self.__positions[key] = len(self.__keys)
+        self.__keys.append(key)
+
+    def discard(self, key):
+        """
+        Removes a key if it is there
+
+        Args:
+            - key (str): The key
+        """
+
+        position = self.__positions.pop(key, None)
+        if position is None:
+            return
+        self.__keys[position] = None
+        if len(self.__keys) > 2 * len(self.__positions) + 16:
+            # a new list, so iterations over the old one go on unchanged
+            self.__keys = list(filter(None, self.__keys))
+            self.__positions = {key: position for position, key
+                                in enumerate(self.__keys)}
@@ -0,0 +1,340 @@
+#!/usr/bin/python3
+"""
+Query Module:
+Defines the Query class, a chainable query over the instances
+of one class of a FileStorage:
+
+    storage.query(Place).where(city_id=city.id, price_by_night__lt=120)
+                        .order_by("-price_by_night").limit(10)
+
+A query is evaluated when it is iterated, one instance at a time.
+Its candidates are read from the index of the most selective condition,
+from the sorted index of the order_by field when a limit makes reading
+it in order cheaper, or from a scan of the class. Conditions are checked
+on the stored records, so in lazy mode only the instances returned
+are built. explain() describes the plan chosen.
+
+With the lock of a thread-safe storage, the matching keys are
+collected under its read side when the iteration starts, and the
+instances are then returned without holding it.
+
+Attributes:
+    - SUFFIXES (dict): The where() suffixes and their operators
+
+Classes:
+    - Query: A query over the instances of one class
+"""
+from functools import partial
+from itertools import islice
+from models.engine.fulltext import TextIndex
+from models.engine.indexes import HashIndex, SortedIndex
+from models.engine.indexes import OPERATORS, matches, range_of, value_of
+
+
+SUFFIXES = {
+        "eq": "=",
+        "ne": "!=",
+        "lt": "<",
+        "lte": "<=",
+        "gt": ">",
+        "gte": ">="
+    }
+
+
+class Query:
+    """
+    Query class: the conditions, order and bounds of a query over
+    the instances of one class. Every method returns a new query.
+
+    Attributes:
+        - classname (str): The name of the queried class
+    """
+
+    def __init__(self, classname, model, indexes, keys, record, build,
+                 lock=None):
+        """
+        Initializes the Query instance, made by FileStorage.query()
+
+        Args:
+            - classname (str): The name of the queried class
+            - model: The queried class, None if unknown
+            - indexes (list): The indexes of the class
+            - keys (function): Returns the keys of the class
+            - record (function): Returns the stored instance or record
+            of a key, None if it is gone
+            - build (function): Returns the instance of a key,
+            None if it is gone
+            - lock (RWLock): The lock of the storage, None if the
+            storage is used by a single thread
+        """
+
+        self.classname = classname
+        self.__model = model
+        self.__indexes = indexes
+        self.__keys = keys
+        self.__record = record
+        self.__build = build
+        self.__lock = lock
+        self.__conditions = ()
+        self.__text = None
+        self.__order = ()
+        self.__limit = None
+        self.__offset = 0
+
+    def where(self, **filters):
+        """
+        Returns: A query also matching the filters, each an attribute
+        name with an optional suffix: __eq (the default), __ne, __lt,
+        __lte, __gt or __gte, e.g. price_by_night__lt=120
+
+        Args:
+            - **filters: The attribute names and values
+        """
+
+        conditions = []
+        for name, value in filters.items():
+            field, _, suffix = name.rpartition("__")
+            if not field or suffix not in SUFFIXES:
+                field, suffix = name, "eq"
+            conditions.append((field, SUFFIXES[suffix], value))
+        return self.filter(*conditions)
+
+    def filter(self, *conditions):
+        """
+        Returns: A query also matching the conditions
+
+        Args:
+            - *conditions: (field, operator, value) triples,
+            the operator one of OPERATORS
+        """
+
+        for field, op, value in conditions:
+            if op not in OPERATORS:
+                raise ValueError("Unknown operator: {}".format(op))
+        return self.__copy(conditions=self.__conditions + tuple(conditions))
+
+    def text(self, words):
+        """
+        Returns: A query matching the instances using any of the words,
+        ranked by relevance unless order_by() is used
+
+        Args:
+            - words (str): The words to look for
+        """
+
+        return self.__copy(text=words)
+
+    def order_by(self, *fields):
+        """
+        Returns: A query returning the instances ordered by the fields,
+        a field starting with "-" in descending order
+
+        Args:
+            - *fields (str): The attribute names
+        """
+
+        return self.__copy(order=tuple(
+            (field[1:], True) if field.startswith("-") else (field, False)
+            for field in fields))
+
+    def limit(self, count):
+        """
+        Returns: A query returning at most count instances
+
+        Args:
+            - count (int): The maximum number of instances, None for all
+        """
+
+        return self.__copy(limit=count)
+
+    def offset(self, count):
+        """
+        Returns: A query skipping the first count instances
+
+        Args:
+            - count (int): The number of instances to skip
+        """
+
+        return self.__copy(offset=count)
+
+    def __iter__(self):
+        """Yields the matching instances one at a time"""
+
+        if self.__lock is None:
+            keys = self.__select()
+        else:
+            with self.__lock.read():
+                keys = list(self.__select())
+        for key in keys:
+            obj = self.__build(key)
+            if obj is not None:
+                yield obj
+
+    def __select(self):
+        """Returns: An iterator over the keys of the matching instances"""
+
+        plan = self.__plan()
+        keys = (key for key in plan["keys"]() if self.__matches(key))
+        if plan["sort"]:
+            keys = self.__sorted(keys)
+        stop = None
+        if self.__limit is not None:
+            stop = self.__offset + self.__limit
+        return islice(keys, self.__offset, stop)
+
+    def first(self):
+        """Returns: The first matching instance, or None"""
+
+        return next(iter(self.limit(1)), None)
+
+    def explain(self):
+        """Returns: A description of the plan of the query, one step a line"""
+
+        if self.__lock is None:
+            plan = self.__plan()
+        else:
+            with self.__lock.read():
+                plan = self.__plan()
+        lines = ["{}: {}".format(self.classname, plan["source"])]
+        for field, op, value in self.__conditions:
+            lines.append("filter: {} {} {!r}".format(field, op, value))
+        if self.__order:
+            fields = ", ".join(("-" if reverse else "") + field
+                               for field, reverse in self.__order)
+            how = "sort" if plan["sort"] else "index order"
+            lines.append("order by: {} ({})".format(fields, how))
+        if self.__offset:
+            lines.append("offset: {}".format(self.__offset))
+        if self.__limit is not None:
+            lines.append("limit: {}".format(self.__limit))
+        return "\n".join(lines)
+
+    def __plan(self):
+        """
+        Returns: A dictionary describing where the candidates are read:
+            - keys: A function returning the candidate keys
+            - source: The description of the candidates
+            - sort: Whether the candidates must be sorted
+        """
+
+        if self.__text is not None:
+            return self.__text_plan()
+        wanted = None
+        if self.__limit is not None:
+            wanted = self.__offset + self.__limit
+
+        best = None
+        for field, op, value in self.__conditions:
+            for index in self.__indexes:
+                if isinstance(index, SortedIndex) and index.field == field \
+                        and op != "!=" and index.holds(value):
+                    bounds = range_of(op, value)
+                    size = index.count_between(**bounds)
+                    keys = partial(index.between, **bounds)
+                    kind = "sorted index"
+                elif isinstance(index, HashIndex) and index.field == field \
+                        and op in ("=", "=="):
+                    size = len(index.lookup(value))
+                    keys = partial(index.lookup, value)
+                    kind = "hash index"
+                else:
+                    continue
+                if best is None or size < best["size"]:
+                    best = {"size": size, "keys": keys, "sort": True,
+                            "source": "{} on {} {} {!r} (~{} candidates)"
+                            .format(kind, field, op, value, size)}
+
+        ordered = self.__ordered_plan()
+        if ordered is not None:
+            if best is None:
+                return ordered
+            # reading the order index stops after wanted matches, which
+            # takes about wanted * total / best["size"] candidates
+            total = len(self.__keys())
+            if wanted is not None and wanted * total < best["size"] ** 2:
+                return ordered
+        if best is not None:
+            best["sort"] = bool(self.__order)
+            return best
+        return {"keys": self.__keys, "sort": bool(self.__order),
+                "source": "scan of {} instances".format(len(self.__keys()))}
+
+    def __ordered_plan(self):
+        """
+        Returns: The plan reading the sorted index of the only
+        order_by field in order, None if there is no such index
+        """
+
+        if len(self.__order) != 1:
+            return None
+        field, reverse = self.__order[0]
+        for index in self.__indexes:
+            if isinstance(index, SortedIndex) and index.field == field:
+                break
+        else:
+            return None
+        if len(index) != len(self.__keys()):
+            # instances with a value the index cannot hold are missing
+            return None
+        bounds = {}
+        for name, op, value in self.__conditions:
+            if name == field and op != "!=" and index.holds(value):
+                bounds = range_of(op, value)
+                break
+        size = index.count_between(**bounds)
+        return {"keys": partial(index.between, reverse=reverse, **bounds),
+                "sort": False,
+                "source": "sorted index on {} in order (~{} candidates)"
+                .format(field, size)}
+
+    def __text_plan(self):
+        """Returns: The plan reading the full text index of the class"""
+
+        for index in self.__indexes:
+            if isinstance(index, TextIndex):
+                break
+        else:
+            raise LookupError("{} has no TextIndex".format(self.classname))
+        count = None
+        if not self.__conditions and self.__limit is not None:
+            count = self.__offset + self.__limit
+
+        def keys():
+            return [key for _, key in index.search(self.__text, count)]
+
+        return {"keys": keys, "sort": bool(self.__order),
+                "source": "text index on {} for {!r}".format(
+                    ", ".join(index.fields), self.__text)}
+
+    def __matches(self, key):
+        """Returns: True if the record of key matches every condition"""
+
+        record = self.__record(key)
+        if record is None:
+            return False
+        return all(matches(record, field, op, value,
+                           getattr(self.__model, field, None))
+                   for field, op, value in self.__conditions)
+
+    def __sorted(self, keys):
+        """Returns: The list of keys sorted by the order_by fields"""
+
+        keys = list(keys)
+        for field, reverse in reversed(self.__order):
+            default = getattr(self.__model, field, None)
+            keys.sort(key=lambda key: value_of(self.__record(key), field,
+                                               default),
+                      reverse=reverse)
+        return keys
+
+    def __copy(self, **changes):
+        """Returns: A copy of the query with some parts replaced"""
+
+        query = Query(self.classname, self.__model, self.__indexes,
+                      self.__keys, self.__record, self.__build, self.__lock)
+        query.__conditions = changes.get("conditions", self.__conditions)
+        query.__text = changes.get("text", self.__text)
+        query.__order = changes.get("order", self.__order)
+        query.__limit = changes.get("limit", self.__limit)
+        query.__offset = changes.get("offset", self.__offset)
+        return query
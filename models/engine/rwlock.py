@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""
+Reader/Writer Lock Module:
+Defines the locks FileStorage guards its dictionaries and indexes with.
+
+Any number of threads may hold the read side at once, the write side
+is exclusive. A waiting writer keeps new readers out, so a steady flow
+of reads cannot starve writes. Both sides are reentrant: a thread
+holding the lock may take it again, and the holder of the write side
+may take the read side. Taking the write side while holding only the
+read side would deadlock and raises RuntimeError instead.
+
+Classes:
+    - RWLock: A reentrant reader/writer lock
+    - NullLock: A lock with the same interface that does nothing
+"""
+import threading
+from contextlib import contextmanager, nullcontext
+
+
+class RWLock:
+    """
+    RWLock class: a reentrant, writer-preferring reader/writer lock.
+    read() and write() are context managers.
+    """
+
+    def __init__(self):
+        """Initializes the RWLock instance"""
+
+        self.__cond = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = None
+        self.__writes = 0
+        self.__waiting = 0
+        self.__local = threading.local()
+
+    @contextmanager
+    def read(self):
+        """Holds the read side of the lock for the with block"""
+
+        local = self.__local
+        held = getattr(local, "reads", 0)
+        if held or self.__writer == threading.get_ident():
+            local.reads = held + 1
+            try:
+                yield
+            finally:
+                local.reads -= 1
+            return
+        with self.__cond:
+            while self.__writer is not None or self.__waiting:
+                self.__cond.wait()
+            self.__readers += 1
+        local.reads = 1
+        try:
+            yield
+        finally:
+            local.reads = 0
+            with self.__cond:
+                self.__readers -= 1
+                if not self.__readers:
+                    self.__cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Holds the write side of the lock for the with block"""
+
+        me = threading.get_ident()
+        if self.__writer == me:
+            self.__writes += 1
+            try:
+                yield
+            finally:
+                self.__writes -= 1
+            return
+        if getattr(self.__local, "reads", 0):
+            raise RuntimeError("Cannot write while holding the read lock")
+        with self.__cond:
+            self.__waiting += 1
+            try:
+                while self.__writer is not None or self.__readers:
+                    self.__cond.wait()
+            finally:
+                self.__waiting -= 1
+            self.__writer = me
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__writer = None
+                self.__cond.notify_all()
+
+
+class NullLock:
+    """
+    NullLock class: the interface of RWLock without any locking,
+    for storages used by a single thread
+    """
+
+    __null = nullcontext()
+
+    def read(self):
+        """Returns: A context manager that does nothing"""
+
+        return self.__null
+
+    def write(self):
+        """Returns: A context manager that does nothing"""
+
+        return self.__null
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+"""
+Shards Module:
+Splits a store across several NDJSON files and reads them back
+in parallel, by a pool of worker processes.
+
+A record goes to the shard picked by the CRC-32 of its key, so a key
+always lands in the same shard and a save only rewrites the shards
+holding changed keys. Shard files are named after the storage file and
+their count, file.json split in 4 being file-000-of-004.ndjson to
+file-003-of-004.ndjson, so the shards of another count are told apart
+when the count changes.
+
+Decoding JSON holds the GIL, so the shards are decoded by a pool of
+processes. Each worker returns the records of its shard, pickled back
+to the calling process, which still builds and indexes the instances:
+unpickling a record is cheaper than decoding its JSON, while unpickling
+an instance costs as much as building it from its record.
+
+Functions:
+    - shard_of(key, count): Returns the shard a key belongs to
+    - shard_paths(path, count): Returns the paths of the shards
+    - find_shards(path): Returns the shard files found on disk
+    - read_shard(path): Returns the (key, record) pairs of a shard
+    - read_shards(paths, processes): Yields the (key, record) pairs
+    of several shards, decoded in parallel
+"""
+import glob
+import os
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from models.engine.json_stream import iter_lines
+
+
+def shard_of(key, count):
+    """
+    Returns: The index of the shard holding key, from 0 to count - 1
+
+    Args:
+        - key (str): The <class name>.<id> key of an instance
+        - count (int): The number of shards
+    """
+
+    return zlib.crc32(key.encode()) % count
+
+
+def shard_paths(path, count):
+    """
+    Returns: The list of the count shard paths of a storage file
+
+    Args:
+        - path (str): The path of the storage file
+        - count (int): The number of shards
+    """
+
+    root = os.path.splitext(path)[0]
+    return ["{}-{:03d}-of-{:03d}.ndjson".format(root, index, count)
+            for index in range(count)]
+
+
+def find_shards(path):
+    """
+    Returns: The shard files of a storage file found on disk, as a
+    dictionary mapping each shard count to the list of its paths
+
+    Args:
+        - path (str): The path of the storage file
+    """
+
+    root = os.path.splitext(path)[0]
+    pattern = re.compile(r"-\d{3}-of-(\d{3})\.ndjson$")
+    found = {}
+    for name in sorted(glob.glob(glob.escape(root) + "-*-of-*.ndjson")):
+        match = pattern.search(name[len(root):])
+        if match is not None:
+            found.setdefault(int(match.group(1)), []).append(name)
+    return found
+
+
+def read_shard(path):
+    """
+    Returns: The list of the (key, record) pairs of a shard,
+    empty if the shard does not exist
+
+    Args:
+        - path (str): The path of the shard
+    """
+
+    try:
+        with open(path, "r") as f:
+            return list(iter_lines(f))
+    except FileNotFoundError:
+        return []
+
+
+def read_shards(paths, processes=None):
+    """
+    Yields the (key, record) pairs of several shards, shard after shard
+    in the order of paths. The shards are decoded by a pool of
+    processes worker processes, or in this process when there is a
+    single shard or a single process.
+
+    Args:
+        - paths (list): The paths of the shards
+        - processes (int): The number of worker processes,
+        None for os.cpu_count()
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(paths))
+    if processes <= 1:
+        for path in paths:
+            try:
+                f = open(path, "r")
+            except FileNotFoundError:
+                continue
+            with f:
+                yield from iter_lines(f)
+        return
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for pairs in pool.map(read_shard, paths):
+            yield from pairs
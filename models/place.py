@@ -14,8 +14,12 @@ Defines a class Place that inherits from BaseModel
         - latitude (float)
         - longitude (float)
         - amenity_ids (list)
+    Properties:
+        - reviews (list)
 """
+import models
 from models.base_model import BaseModel
+from models.review import Review
 
 
 class Place(BaseModel):
@@ -47,3 +51,9 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    @property
+    def reviews(self):
+        """Returns: The list of Review instances of the place"""
+
+        return models.storage.related(Review, "place_id", self.id)
@@ -4,8 +4,12 @@ State Model:
 Defines a class State that inherits from BaseModel
     Attributes:
         - name (str)
+    Properties:
+        - cities (list)
 """
+import models
 from models.base_model import BaseModel
+from models.city import City
 
 
 class State(BaseModel):
@@ -16,3 +20,9 @@ class State(BaseModel):
         - name (str): The name of the state
     """
     name = ""
+
+    @property
+    def cities(self):
+        """Returns: The list of City instances of the state"""
+
+        return models.storage.related(City, "state_id", self.id)
@@ -7,8 +7,14 @@ defines a class User that inherits from BaseModel
         - password (str)
         - first_name (str)
         - last_name (str)
+    Properties:
+        - places (list)
+        - reviews (list)
 """
+import models
 from models.base_model import BaseModel
+from models.place import Place
+from models.review import Review
 
 
 class User(BaseModel):
@@ -26,3 +32,15 @@ class User(BaseModel):
     password = ""
     first_name = ""
     last_name = ""
+
+    @property
+    def places(self):
+        """Returns: The list of Place instances owned by the user"""
+
+        return models.storage.related(Place, "user_id", self.id)
+
+    @property
+    def reviews(self):
+        """Returns: The list of Review instances written by the user"""
+
+        return models.storage.related(Review, "user_id", self.id)
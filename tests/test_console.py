@@ -1 +1,285 @@
 #!/usr/bin/python3
+"""
+This script contains unittests for the command interpreter
+    file: AirBnB_clone/console.py
+
+It tests various aspects of the console, including:
+    - creating and updating instances
+    - batches: run_batch(), --batch, begin, commit and postloop
+    - the near, within and search commands
+    - paging through all with --limit, --offset and --after
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import console
+import models
+from console import HBNBCommand
+from models import compact
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models.state import State
+
+
+class ConsoleTestCase(unittest.TestCase):
+    """Runs console commands against a storage in a temporary directory"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path, durability="none")
+        patchers = [mock.patch.object(models, "storage", self.storage),
+                    mock.patch.object(console, "storage", self.storage)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_command(self, line):
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as out:
+            HBNBCommand().onecmd(line)
+        return out.getvalue()
+
+    def saved(self):
+        try:
+            with open(self.path, "r") as f:
+                return set(json.load(f))
+        except FileNotFoundError:
+            return set()
+
+
+class TestConsoleUpdate(ConsoleTestCase):
+    """Unittests for the update command"""
+
+    def setUp(self):
+        super().setUp()
+        self.state = State(id="s1", name="Old")
+        self.storage.new(self.state)
+
+    def test_update(self):
+        self.assertEqual(self.run_command('update State s1 name "New"'), "")
+        self.assertEqual(self.storage.get(State, "s1").name, "New")
+
+    def test_read_only_property(self):
+        output = self.run_command('update State s1 cities "x"')
+        self.assertEqual(output, "** attribute is read-only **\n")
+        self.assertEqual(self.state.cities, [])
+
+
+class TestConsoleCreate(ConsoleTestCase):
+    """Unittests for the create command"""
+
+    def test_create_compact(self):
+        storage = FileStorage(file_path=self.path, slots=True)
+        with mock.patch.object(models, "storage", storage), \
+                mock.patch.object(console, "storage", storage):
+            new_id = self.run_command("create Place").strip()
+        place = storage.get(Place, new_id)
+        self.assertIs(type(place), compact.Place)
+        self.assertIsInstance(place, Place)
+
+
+class TestConsoleUnknownCommand(ConsoleTestCase):
+    """Unittests for commands the console does not know"""
+
+    def test_unknown(self):
+        self.assertEqual(self.run_command("bogus 1 2"),
+                         "** unknown command: bogus **\n")
+
+
+class TestConsoleBatch(ConsoleTestCase):
+    """Unittests for run_batch() and the begin and commit commands"""
+
+    def run_batch(self, lines):
+        report = io.StringIO()
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as out:
+            result = HBNBCommand().run_batch(lines, report)
+        return result, out.getvalue(), report.getvalue()
+
+    def test_run_batch(self):
+        lines = ["# states", "", "create State", "create Nowhere",
+                 "bogus", "create State"]
+        with mock.patch.object(self.storage, "flush",
+                               wraps=self.storage.flush) as flush:
+            result, out, report = self.run_batch(lines)
+        self.assertEqual(result, (4, 2))
+        self.assertEqual(flush.call_count, 1)
+        self.assertEqual(len(self.saved()), 2)
+        self.assertIn("** class doesn't exist **", out)
+        report = report.splitlines()
+        self.assertEqual(report[0], "line 4: create Nowhere: "
+                                    "** class doesn't exist **")
+        self.assertEqual(report[1], "line 5: bogus: "
+                                    "** unknown command: bogus **")
+        self.assertTrue(report[2].startswith("4 commands, 2 failed in "))
+
+    def test_exception_counts_as_failed(self):
+        with mock.patch.object(HBNBCommand, "do_create",
+                               side_effect=OSError("disk full")):
+            result, out, report = self.run_batch(["create State"])
+        self.assertEqual(result, (1, 1))
+        self.assertIn("** OSError: disk full **", report)
+
+    def test_quit_stops(self):
+        result, out, report = self.run_batch(["create State", "quit",
+                                              "create State"])
+        self.assertEqual(result, (2, 0))
+        self.assertEqual(len(self.saved()), 1)
+
+    def test_exit_status(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = os.path.join(self.tmpdir.name, "script.txt")
+        env = dict(os.environ, PYTHONPATH=root)
+        env.pop("HBNB_TYPE_STORAGE", None)
+        for lines, status in ((["create State"], 0),
+                              (["create State", "bogus"], 1)):
+            with open(script, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            done = subprocess.run(
+                    [sys.executable, os.path.join(root, "console.py"),
+                     "--batch", script], cwd=self.tmpdir.name, env=env,
+                    capture_output=True, text=True, timeout=60)
+            self.assertEqual(done.returncode, status, done.stderr)
+            self.assertIn("failed in", done.stderr)
+
+    def test_begin_and_commit(self):
+        command = HBNBCommand()
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as out:
+            command.onecmd("begin")
+            command.onecmd("begin")
+            command.onecmd("create State")
+            self.assertEqual(self.saved(), set())
+            command.onecmd("commit")
+            command.onecmd("commit")
+        self.assertEqual(len(self.saved()), 1)
+        self.assertEqual(out.getvalue().count("** batch already started **"),
+                         1)
+        self.assertEqual(out.getvalue().count("** no batch started **"), 1)
+
+    def test_postloop_commits(self):
+        command = HBNBCommand()
+        with mock.patch("sys.stdout", new_callable=io.StringIO):
+            command.onecmd("begin")
+            command.onecmd("create State")
+            command.postloop()
+        self.assertEqual(len(self.saved()), 1)
+
+
+class TestConsoleQueries(ConsoleTestCase):
+    """Unittests for the near, within and search commands"""
+
+    def setUp(self):
+        super().setUp()
+        self.storage.new(Place(id="paris", name="Quiet loft",
+                               price_by_night=90, max_guest=2,
+                               latitude=48.8566, longitude=2.3522))
+        self.storage.new(Place(id="lyon", name="Busy flat",
+                               price_by_night=150, max_guest=4,
+                               latitude=45.764, longitude=4.8357))
+        self.storage.new(Review(id="r", text="A quiet place"))
+
+    def ids(self, output):
+        return [line.split()[1].strip("()")
+                for line in output.splitlines()]
+
+    def test_near(self):
+        self.assertEqual(self.ids(self.run_command("near 46 4.5 500")),
+                         ["lyon", "paris"])
+        self.assertEqual(self.ids(self.run_command("near 46 4.5 500 1")),
+                         ["lyon"])
+        self.assertEqual(self.run_command("near 46"),
+                         "** coordinates missing **\n")
+        self.assertEqual(self.run_command("near a b c"),
+                         "** invalid coordinates **\n")
+        self.assertEqual(self.run_command("near 46 4.5 -1"),
+                         "** invalid coordinates **\n")
+        for line in ("near nan 0 10", "near 0 inf 10", "near 0 0 inf"):
+            self.assertEqual(self.run_command(line),
+                             "** invalid coordinates **\n")
+
+    def test_within(self):
+        self.assertEqual(self.ids(self.run_command("within 45 4 46 5")),
+                         ["lyon"])
+        self.assertEqual(self.run_command("within 45 4 46"),
+                         "** coordinates missing **\n")
+        self.assertEqual(self.run_command("within 45 4 46 east"),
+                         "** invalid coordinates **\n")
+        self.assertEqual(self.run_command("within 0 inf 1 1"),
+                         "** invalid coordinates **\n")
+        self.assertEqual(self.run_command("within nan 0 1 1"),
+                         "** invalid coordinates **\n")
+
+    def test_search_conditions(self):
+        output = self.run_command("search Place price_by_night<100")
+        self.assertEqual(self.ids(output), ["paris"])
+        output = self.run_command("search Place max_guest>=2 "
+                                  "price_by_night!=90")
+        self.assertEqual(self.ids(output), ["lyon"])
+        self.assertEqual(self.run_command("search Place max_guest>few"),
+                         "** invalid condition: max_guest>few **\n")
+        self.assertEqual(self.run_command("search"),
+                         "** class name missing **\n")
+        self.assertEqual(self.run_command("search Nowhere"),
+                         "** class doesn't exist **\n")
+
+    def test_search_text(self):
+        self.assertEqual(self.ids(self.run_command("search Place quiet")),
+                         ["paris"])
+        self.assertEqual(self.ids(self.run_command("search Review quiet")),
+                         ["r"])
+        self.assertEqual(self.run_command("search State quiet"),
+                         "** no text index for State **\n")
+
+
+class TestConsoleAllPages(ConsoleTestCase):
+    """Unittests for the paging options of the all command"""
+
+    def setUp(self):
+        super().setUp()
+        for obj_id in ("a", "b", "c"):
+            self.storage.new(State(id=obj_id))
+
+    def test_all(self):
+        output = self.run_command("all")
+        self.assertTrue(output.startswith('["[State] (a)'))
+        self.assertEqual(self.run_command("all State").count("\n"), 3)
+
+    def test_limit_and_offset(self):
+        output = self.run_command("all State --limit 2")
+        lines = output.splitlines()
+        self.assertEqual(self.ids(lines[:2]), ["a", "b"])
+        self.assertEqual(lines[2], "next page: --after State.b")
+        output = self.run_command("all State --offset=1 --limit=5")
+        self.assertEqual(self.ids(output.splitlines()), ["b", "c"])
+
+    def test_after(self):
+        lines = self.run_command("all State --after State.a --limit 1") \
+            .splitlines()
+        self.assertEqual(self.ids(lines[:1]), ["b"])
+        self.assertEqual(lines[1:], ["next page: --after State.b"])
+        self.assertEqual(self.run_command("all State --after State.z"),
+                         "** invalid cursor **\n")
+
+    def test_invalid_options(self):
+        self.assertEqual(self.run_command("all State --limit -1"),
+                         "** invalid option: --limit **\n")
+        self.assertEqual(self.run_command("all --size 2"),
+                         "** invalid option: --size **\n")
+        self.assertEqual(self.run_command("all Nowhere"),
+                         "** class doesn't exist **\n")
+
+    def ids(self, lines):
+        return [line.split()[1].strip("()") for line in lines]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -141,6 +141,43 @@ class TestBaseModelInstances(unittest.TestCase):
         self.assertIn("number", self.second_model.to_dict())
 
 
+class TestBaseModelFromDict(unittest.TestCase):
+    """Test cases for building instances with from_dict"""
+
+    def setUp(self):
+        self.base_model = BaseModel()
+        self.base_model.name = "Inception"
+
+    def test_round_trip(self):
+        obj_dict = self.base_model.to_dict()
+        new_model = BaseModel.from_dict(obj_dict)
+        self.assertIsInstance(new_model, BaseModel)
+        self.assertEqual(new_model.to_dict(), obj_dict)
+        self.assertEqual(new_model.__dict__, self.base_model.__dict__)
+
+    def test_input_not_modified(self):
+        obj_dict = self.base_model.to_dict()
+        BaseModel.from_dict(obj_dict)
+        self.assertEqual(obj_dict["__class__"], "BaseModel")
+        self.assertIsInstance(obj_dict["created_at"], str)
+
+    def test_not_registered(self):
+        new_model = BaseModel.from_dict({"id": "from-dict"})
+        self.assertNotIn("BaseModel.from-dict", models.storage.all())
+        self.assertIsInstance(new_model.created_at, datetime)
+        self.assertEqual(new_model.updated_at, new_model.created_at)
+
+    def test_timestamp_without_microseconds(self):
+        date = datetime(2024, 4, 4, 4, 0, 0)
+        new_model = BaseModel.from_dict({"created_at": date.isoformat()})
+        self.assertEqual(new_model.created_at, date)
+        self.assertIsInstance(new_model.id, str)
+
+    def test_invalid_date_format(self):
+        with self.assertRaises(ValueError):
+            BaseModel.from_dict({"created_at": "2024-04-04 4:00:00"})
+
+
 class TestBaseModelEdgeCases(unittest.TestCase):
     """Test cases for edge cases of the BaseModel class"""
 
@@ -15,6 +15,7 @@ It tests various aspects of the City class, including:
 import unittest
 from models.base_model import BaseModel
 from models.city import City
+from models.place import Place
 from datetime import datetime
 
 
@@ -85,6 +86,11 @@ class TestCityMethods(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.city.to_dict(None)
 
+    def test_places(self):
+        my_place = Place()
+        my_place.city_id = self.city.id
+        self.assertEqual(self.city.places, [my_place])
+
 
 class TestCityInstances(unittest.TestCase):
     """Test cases for instances of the City class"""
@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the compact models in the models package.
+    file: AirBnB_clone/models/compact.py
+
+It tests various aspects of the compact classes, including:
+    - slotted layout and virtual subclasses of the models.
+    - dictionary and string representations.
+    - class defaults and the overflow dictionary.
+    - change tracking.
+    - copies and pickling.
+"""
+
+import copy
+import pickle
+import unittest
+from unittest import mock
+import models
+from models import compact
+from models.base_model import BaseModel
+from models.place import Place
+from models.review import Review
+from models.state import State
+from datetime import datetime
+
+
+class TestCompactLayout(unittest.TestCase):
+    """Test cases for the slotted layout of the compact classes"""
+
+    def test_no_instance_dict(self):
+        place = compact.Place()
+        self.assertFalse(hasattr(place, "__weakref__"))
+        self.assertNotIn("__dict__", compact.Place.__slots__)
+        self.assertIn("price_by_night", compact.Place.__slots__)
+
+    def test_class_name(self):
+        self.assertEqual(compact.Review.__name__, "Review")
+        self.assertEqual(compact.Review.__module__, "models.compact")
+
+    def test_virtual_subclass(self):
+        review = compact.Review.from_dict(Review().to_dict())
+        self.assertIsInstance(review, Review)
+        self.assertIsInstance(review, BaseModel)
+        self.assertNotIsInstance(review, Place)
+        self.assertTrue(issubclass(compact.State, State))
+        self.assertNotIsInstance(Review(), compact.Review)
+
+    def test_relationship_properties(self):
+        self.assertIsInstance(compact.State.__dict__["cities"], property)
+        self.assertIsInstance(compact.Place.__dict__["reviews"], property)
+
+
+class TestCompactRepresentation(unittest.TestCase):
+    """Test cases for to_dict(), __str__ and from_dict()"""
+
+    def setUp(self):
+        self.place = Place()
+        self.place.name = "Loft"
+        self.place.max_guest = 4
+        self.info = self.place.to_dict()
+
+    def test_to_dict_matches_model(self):
+        slotted = compact.Place.from_dict(self.info)
+        self.assertEqual(slotted.to_dict(), self.info)
+
+    def test_str_matches_model(self):
+        slotted = compact.Place.from_dict(self.info)
+        self.assertEqual(str(slotted), str(self.place))
+
+    def test_init_with_kwargs(self):
+        slotted = compact.Place(**self.info)
+        self.assertIsInstance(slotted.created_at, datetime)
+        self.assertEqual(slotted.to_dict(), self.info)
+
+    def test_init_registers_instance(self):
+        slotted = compact.State()
+        key = "State." + slotted.id
+        self.assertIs(models.storage.all()[key], slotted)
+        self.assertEqual(slotted.created_at, slotted.updated_at)
+
+    def test_from_dict_invalid_date(self):
+        with self.assertRaises(ValueError):
+            compact.State.from_dict({"created_at": "2024-04-04 4:00:00"})
+
+
+class TestCompactAttributes(unittest.TestCase):
+    """Test cases for class defaults and undeclared attributes"""
+
+    def test_class_defaults(self):
+        place = compact.Place()
+        self.assertEqual(place.number_rooms, 0)
+        self.assertEqual(place.amenity_ids, [])
+        self.assertNotIn("number_rooms", place.to_dict())
+
+    def test_set_declared_attribute(self):
+        place = compact.Place()
+        place.number_rooms = 3
+        self.assertEqual(place.to_dict()["number_rooms"], 3)
+
+    def test_overflow(self):
+        state = compact.State()
+        state.motto = "Eureka"
+        self.assertEqual(state.motto, "Eureka")
+        self.assertEqual(state.to_dict()["motto"], "Eureka")
+        self.assertEqual(vars(state)["motto"], "Eureka")
+
+    def test_strict_rejects_undeclared(self):
+        StrictReview = compact.compact(Review)
+        review = StrictReview()
+        review.text = "Nice"
+        with self.assertRaises(AttributeError):
+            review.motto = "Eureka"
+        with self.assertRaises(AttributeError):
+            review.motto
+
+    def test_missing_attribute(self):
+        with self.assertRaises(AttributeError):
+            compact.State().motto
+
+
+class TestCompactTracking(unittest.TestCase):
+    """Test cases for the change tracking of the compact classes"""
+
+    def test_setattr_marks_dirty(self):
+        state = compact.State()
+        with mock.patch.object(models.storage, "mark_dirty") as mark_dirty:
+            state.name = "Ohio"
+        mark_dirty.assert_called_once_with(state, "name", "")
+
+    def test_from_dict_does_not_mark_dirty(self):
+        info = State().to_dict()
+        with mock.patch.object(models.storage, "mark_dirty") as mark_dirty:
+            compact.State.from_dict(info)
+        mark_dirty.assert_not_called()
+
+
+class TestCompactCopies(unittest.TestCase):
+    """Test cases for copying and pickling compact instances"""
+
+    def setUp(self):
+        self.state = compact.State.from_dict(State().to_dict())
+        self.state.name = "Ohio"
+        self.state.motto = "Birthplace of Aviation"
+
+    def test_pickle(self):
+        clone = pickle.loads(pickle.dumps(self.state))
+        self.assertIsInstance(clone, compact.State)
+        self.assertEqual(clone.to_dict(), self.state.to_dict())
+
+    def test_copy(self):
+        clone = copy.copy(self.state)
+        self.assertIsNot(clone, self.state)
+        self.assertEqual(clone.to_dict(), self.state.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
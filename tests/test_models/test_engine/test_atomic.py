@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the atomic writes of the engine package
+    file: AirBnB_clone/models/engine/atomic.py
+
+It tests various aspects of atomic_write, including:
+    - replacing a file
+    - leaving the file untouched when writing fails
+    - durability levels
+"""
+
+import unittest
+import os
+import tempfile
+from models.engine.atomic import DURABILITY, atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+    """Unittests for atomic_write"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        with open(self.path, "w") as f:
+            f.write("old")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read(self):
+        with open(self.path, "r") as f:
+            return f.read()
+
+    def test_replaces_file(self):
+        for durability in DURABILITY:
+            with atomic_write(self.path, durability) as f:
+                f.write(durability)
+            self.assertEqual(self.read(), durability)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["file.json"])
+
+    def test_creates_file(self):
+        os.remove(self.path)
+        with atomic_write(self.path) as f:
+            f.write("new")
+        self.assertEqual(self.read(), "new")
+
+    def test_failure_keeps_old_file(self):
+        with self.assertRaises(RuntimeError):
+            with atomic_write(self.path) as f:
+                f.write("half")
+                raise RuntimeError("crash")
+        self.assertEqual(self.read(), "old")
+        self.assertEqual(os.listdir(self.tmpdir.name), ["file.json"])
+
+    def test_unknown_durability(self):
+        with self.assertRaises(ValueError):
+            with atomic_write(self.path, "always"):
+                pass
+        self.assertEqual(self.read(), "old")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the column views of the engine package
+    file: AirBnB_clone/models/engine/columns.py
+
+It tests various aspects of the column views, including:
+    - typed columns built from instances and records
+    - aggregations and percentiles
+    - grouping
+"""
+
+import math
+import unittest
+from array import array
+from models.engine.columns import ColumnView, numeric_column, percentile
+from models.place import Place
+
+
+class TestPercentile(unittest.TestCase):
+    """Unittests for the percentile function"""
+
+    def test_interpolation(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2.5)
+        self.assertEqual(percentile([4, 1, 3, 2], 0), 1)
+        self.assertEqual(percentile([4, 1, 3, 2], 100), 4)
+        self.assertEqual(percentile([7], 90), 7)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            percentile([], 50)
+        with self.assertRaises(ValueError):
+            percentile([1], 101)
+
+
+class TestColumnView(unittest.TestCase):
+    """Unittests for the ColumnView class"""
+
+    def setUp(self):
+        records = [
+                {"id": "a", "city_id": "c1", "price_by_night": 100,
+                 "latitude": 1.5},
+                {"id": "b", "city_id": "c1", "price_by_night": 300,
+                 "latitude": 2.5},
+                {"id": "c", "city_id": "c2", "price_by_night": "50"}
+            ]
+        place = Place(**{"id": "d", "city_id": "c2", "price_by_night": 70,
+                         "max_guest": "many"})
+        self.view = ColumnView(Place, ["city_id", "price_by_night",
+                                       "latitude", "max_guest"],
+                               records + [place])
+
+    def test_columns(self):
+        self.assertEqual(len(self.view), 4)
+        self.assertEqual(self.view.ids, ["a", "b", "c", "d"])
+        self.assertEqual(self.view.column("city_id"),
+                         ["c1", "c1", "c2", "c2"])
+        self.assertEqual(self.view.column("price_by_night"),
+                         array("q", [100, 300, 50, 70]))
+        self.assertEqual(self.view.column("latitude"),
+                         array("d", [1.5, 2.5, 0.0, 0.0]))
+
+    def test_unconvertible_value_missing(self):
+        column = self.view.column("max_guest")
+        self.assertEqual(column.typecode, "d")
+        self.assertEqual(list(column[:3]), [0, 0, 0])
+        self.assertTrue(math.isnan(column[3]))
+        self.assertEqual(self.view.missing("max_guest"), 1)
+        self.assertEqual(self.view.missing("price_by_night"), 0)
+        self.assertEqual(self.view.max("max_guest"), 0)
+        self.assertEqual(self.view.group_by("city_id", "max_guest", "count"),
+                         {"c1": 2, "c2": 1})
+
+    def test_floats_in_int_column(self):
+        records = [{"id": "a", "price_by_night": 99.5},
+                   {"id": "b", "price_by_night": 100.5},
+                   {"id": "c", "price_by_night": None}]
+        view = ColumnView(Place, ["price_by_night"], records)
+        self.assertEqual(view.column("price_by_night").typecode, "d")
+        self.assertEqual(view.mean("price_by_night"), 100.0)
+        self.assertEqual(view.min("price_by_night"), 99.5)
+        self.assertEqual(view.percentile("price_by_night", 100), 100.5)
+
+    def test_numeric_column(self):
+        self.assertEqual(numeric_column([1, "2"]), array("q", [1, 2]))
+        self.assertEqual(numeric_column([1, "2.5"]), array("d", [1, 2.5]))
+        self.assertEqual(numeric_column([2 ** 70]).typecode, "d")
+
+    def test_unknown_column(self):
+        with self.assertRaises(KeyError):
+            self.view.column("amenity_ids")
+
+    def test_aggregates(self):
+        self.assertEqual(self.view.min("price_by_night"), 50)
+        self.assertEqual(self.view.max("price_by_night"), 300)
+        self.assertEqual(self.view.mean("price_by_night"), 130)
+        self.assertEqual(self.view.percentile("price_by_night", 50), 85)
+
+    def test_group_by(self):
+        self.assertEqual(self.view.group_by("city_id", "price_by_night"),
+                         {"c1": 200, "c2": 60})
+        self.assertEqual(
+                self.view.group_by("city_id", "price_by_night", "count"),
+                {"c1": 2, "c2": 2})
+        self.assertEqual(
+                self.view.group_by("city_id", "latitude", max),
+                {"c1": 2.5, "c2": 0.0})
+
+    def test_group_by_unknown_aggregate(self):
+        with self.assertRaises(ValueError):
+            self.view.group_by("city_id", "price_by_night", "mode")
+
+    def test_empty_view(self):
+        view = ColumnView(Place, ["price_by_night"], [])
+        self.assertEqual(len(view), 0)
+        with self.assertRaises(ValueError):
+            view.mean("price_by_night")
+        self.assertEqual(view.group_by("price_by_night", "price_by_night"),
+                         {})
+
+
+if __name__ == "__main__":
+    unittest.main()
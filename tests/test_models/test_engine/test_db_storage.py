@@ -0,0 +1,258 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the DBStorage class in the engine package
+    file: AirBnB_clone/models/engine/db_storage.py
+
+It tests various aspects of the DBStorage class, including:
+    - initialization
+    - methods
+    - persistence across connections
+"""
+
+import unittest
+import asyncio
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+import models
+from models.engine.db_storage import DBStorage
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.review import Review
+
+
+class TestDBStorage(unittest.TestCase):
+    """Unittests for testing methods of the DBStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "hbnb.db")
+        self.storage = DBStorage(db_path=self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        self.storage.close()
+        self.tmpdir.cleanup()
+
+    def reopened(self):
+        self.storage.close()
+        self.storage = DBStorage(db_path=self.path)
+        self.storage.reload()
+        return self.storage
+
+    def test_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            DBStorage(None)
+
+    def test_tables_and_indexes(self):
+        with sqlite3.connect(self.path) as conn:
+            names = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master")}
+        for name in ("BaseModel", "User", "State", "City", "Amenity",
+                     "Place", "Review", "City_state_id", "Review_place_id",
+                     "Place_latitude"):
+            self.assertIn(name, names)
+
+    def test_model_class(self):
+        self.assertIs(self.storage.model_class("User"), User)
+        self.assertIs(self.storage.model_class(Place), Place)
+
+    def test_new_and_get(self):
+        my_user = User()
+        self.storage.new(my_user)
+        self.assertIs(self.storage.get(User, my_user.id), my_user)
+        self.assertIs(self.storage.get("User", my_user.id), my_user)
+        self.assertIsNone(self.storage.get(User, "missing"))
+        self.assertIsNone(self.storage.get("Nope", my_user.id))
+
+    def test_save_persists(self):
+        my_user = User(email="hbnb@example.com")
+        self.storage.new(my_user)
+        self.storage.save()
+        storage = self.reopened()
+        my_copy = storage.get(User, my_user.id)
+        self.assertEqual(my_copy.to_dict(), my_user.to_dict())
+
+    def test_unsaved_changes_are_not_committed(self):
+        self.storage.new(User())
+        self.assertEqual(self.storage.count(User), 1)
+        self.assertEqual(self.reopened().count(User), 0)
+
+    def test_all_and_count(self):
+        my_user = User()
+        my_state = State()
+        self.storage.new(my_user)
+        self.storage.new(my_state)
+        self.storage.save()
+        storage = self.reopened()
+        self.assertEqual(
+                set(storage.all()),
+                {"User." + my_user.id, "State." + my_state.id})
+        self.assertEqual(list(storage.all(State)), ["State." + my_state.id])
+        self.assertEqual(storage.count(), 2)
+        self.assertEqual(storage.count("User"), 1)
+        self.assertEqual(storage.count(City), 0)
+
+    def test_delete(self):
+        my_user = User()
+        self.storage.new(my_user)
+        self.storage.save()
+        self.storage.delete(my_user)
+        self.assertIsNone(self.storage.get(User, my_user.id))
+        self.storage.save()
+        self.assertIsNone(self.reopened().get(User, my_user.id))
+
+    def test_mark_dirty_on_setattr(self):
+        my_user = User()
+        self.storage.new(my_user)
+        self.storage.save()
+        with mock.patch.object(models, "storage", self.storage):
+            my_user.first_name = "Betty"
+        self.storage.save()
+        self.assertEqual(
+                self.reopened().get(User, my_user.id).first_name, "Betty")
+
+    def test_batch_commits_once(self):
+        with self.storage.batch():
+            for i in range(3):
+                self.storage.new(User())
+                self.storage.save()
+        self.assertEqual(self.reopened().count(User), 3)
+
+    def test_related(self):
+        my_city = City(state_id="s1")
+        self.storage.new(my_city)
+        self.storage.new(City(state_id="s2"))
+        self.assertEqual(
+                self.storage.related(City, "state_id", "s1"), [my_city])
+        self.assertEqual(self.storage.related("Nope", "state_id", "s1"), [])
+
+    def test_near_and_within(self):
+        paris = Place(id="paris", latitude=48.8566, longitude=2.3522)
+        lyon = Place(id="lyon", latitude=45.764, longitude=4.8357)
+        for place in (paris, lyon, Place(id="unset")):
+            self.storage.new(place)
+        self.storage.save()
+        storage = self.reopened()
+        self.assertEqual([place.id for place in storage.near(46, 4.5, 500)],
+                         ["lyon", "paris"])
+        self.assertEqual(
+                [place.id for place in storage.near(46, 4.5, 500, 1)],
+                ["lyon"])
+        self.assertEqual(
+                [place.id for place in storage.within(48, 2, 49, 3)],
+                ["paris"])
+        self.assertEqual(storage.within(-1, -1, 1, 1), [])
+        with self.assertRaises(ValueError):
+            storage.near(float("nan"), 0, 10)
+        with self.assertRaises(ValueError):
+            storage.within(0, float("inf"), 1, 1)
+
+    def test_search(self):
+        for name, price, guests in (("loft", 100, 4), ("villa", 300, 8),
+                                    ("room", 40, 1)):
+            self.storage.new(Place(id=name, price_by_night=price,
+                                   max_guest=guests))
+        self.storage.new(Place(id="unset"))
+        places = self.storage.search(Place, ("price_by_night", "<", 120),
+                                     ("max_guest", ">=", 1))
+        self.assertEqual(sorted(place.id for place in places),
+                         ["loft", "room"])
+        places = self.storage.search("Place", ("price_by_night", "<", 50))
+        self.assertEqual(sorted(place.id for place in places),
+                         ["room", "unset"])
+        self.assertEqual(self.storage.search("Place", ("a-b", "=", 1)), [])
+        with self.assertRaises(ValueError):
+            self.storage.search(Place, ("price_by_night", "~", 1))
+
+    def test_text_search(self):
+        self.storage.new(Place(id="loft", price_by_night=100,
+                               description="cozy loft by the river"))
+        self.storage.new(Place(id="room", price_by_night=40,
+                               description="cozy room, cozy bed"))
+        self.storage.new(Review(id="r1", text="great view"))
+        places = self.storage.search(Place, text="cozy")
+        self.assertEqual([place.id for place in places], ["room", "loft"])
+        self.storage.save()
+        storage = self.reopened()
+        places = storage.search(Place, ("price_by_night", ">", 50),
+                                text="cozy")
+        self.assertEqual([place.id for place in places], ["loft"])
+        self.assertEqual(len(storage.search(Place, text="cozy", limit=1)), 1)
+        self.assertEqual(storage.search(Review, text="view")[0].id, "r1")
+        storage.delete(storage.get(Review, "r1"))
+        self.assertEqual(storage.search(Review, text="view"), [])
+        with self.assertRaises(LookupError):
+            storage.search(User, text="betty")
+
+    def test_text_table_filled_from_rows(self):
+        self.storage.new(Place(id="loft", description="cozy loft"))
+        self.storage.save()
+        with sqlite3.connect(self.path) as conn:
+            conn.execute('DROP TABLE "Place_text"')
+        storage = self.reopened()
+        self.assertEqual(storage.search(Place, text="loft")[0].id, "loft")
+
+    def test_text_search_without_fts(self):
+        self.storage.new(Place(id="loft", description="cozy loft"))
+        self.storage._DBStorage__fts = False
+        self.assertEqual(self.storage.search(Place, text="loft")[0].id,
+                         "loft")
+        self.assertEqual(self.storage.search(Place, text="villa"), [])
+
+    def test_unique_email(self):
+        betty = User(id="betty", email="Betty@Example.com")
+        self.storage.new(betty)
+        with self.assertRaises(ValueError):
+            self.storage.new(User(id="bob", email="betty@example.com"))
+        self.storage.save()
+        storage = self.reopened()
+        betty = storage.get_by(User, email="BETTY@example.com")
+        self.assertEqual(betty.id, "betty")
+        self.assertIsNone(storage.get_by(User, email="bob@example.com"))
+        bob = User(id="bob")
+        storage.new(bob)
+        with mock.patch.object(models, "storage", storage):
+            bob.email = "bob@example.com"
+            with self.assertRaises(ValueError):
+                bob.email = "betty@example.com"
+            betty.email = "betty@example.com"
+        self.assertEqual(bob.email, "bob@example.com")
+        self.assertIs(storage.get_by(User, email="bob@example.com"), bob)
+
+    def test_async(self):
+        async def run():
+            for obj_id in ("c", "a", "b"):
+                self.storage.new(User(id=obj_id))
+            self.storage.new(State(id="s"))
+            await self.storage.asave()
+            storage = self.reopened()
+            await storage.areload()
+            return [obj.id async for obj in storage.aall(chunk_size=2)]
+
+        self.assertEqual(asyncio.run(run()), ["a", "b", "c", "s"])
+
+    def test_scan(self):
+        for obj_id in ("c", "a", "b"):
+            self.storage.new(User(id=obj_id, email=obj_id + "@example.com"))
+        self.storage.new(State(id="s"))
+        self.storage.save()
+        storage = self.reopened()
+        ids = [obj.id for obj in storage.scan()]
+        self.assertEqual(ids, ["a", "b", "c", "s"])
+        page = storage.scan(User, offset=1, limit=1)
+        self.assertEqual([obj.id for obj in page], ["b"])
+        page = storage.scan(after="User.b")
+        self.assertEqual([obj.id for obj in page], ["c", "s"])
+        storage.delete(storage.get(User, "b"))
+        page = storage.scan(User, after="User.b")
+        self.assertEqual([obj.id for obj in page], ["c"])
+        with self.assertRaises(KeyError):
+            storage.scan(State, after="User.b")
+
+
+if __name__ == '__main__':
+    unittest.main()
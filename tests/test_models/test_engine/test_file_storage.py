@@ -9,10 +9,22 @@ It tests various aspects of the FileStorage class, including:
 """
 
 import unittest
+import asyncio
 import os
 import json
+import multiprocessing
+import tempfile
+import threading
+import time
+from unittest import mock
 import models
+from models.engine.atomic import atomic_write
 from models.engine.file_storage import FileStorage
+from models.engine.shards import shard_of
+from models.engine.rwlock import RWLock
+from models.engine.fulltext import TextIndex
+from models.engine.indexes import GeoIndex, SortedIndex
+from models import compact
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -74,8 +86,9 @@ class TestFileStorageMethods(unittest.TestCase):
         self.assertEqual(dict, type(models.storage.all()))
 
     def test_all_with_arg(self):
+        self.assertIs(models.storage.all(None), models.storage.all())
         with self.assertRaises(TypeError):
-            models.storage.all(None)
+            models.storage.all(None, None)
 
     def test_new(self):
         my_basemodel = BaseModel()
@@ -221,5 +234,1400 @@ class TestFileStorageEdgeCases(unittest.TestCase):
             models.storage.reload()
 
 
+class TestFileStorageFormats(unittest.TestCase):
+    """Unittests for the file formats of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.my_user = User()
+        self.my_place = Place()
+        self.my_place.name = "Nile View"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def round_trip(self, file_format):
+        path = os.path.join(self.tmpdir.name, "file." + file_format)
+        storage = FileStorage(file_path=path, file_format=file_format)
+        storage.new(self.my_user)
+        storage.new(self.my_place)
+        storage.save()
+        storage = FileStorage(file_path=path, file_format=file_format)
+        storage.reload()
+        return path, storage.all()
+
+    def test_json(self):
+        path, objs = self.round_trip("json")
+        with open(path, "r") as f:
+            self.assertEqual(len(json.load(f)), 2)
+        self.assertEqual(
+                objs["Place." + self.my_place.id].to_dict(),
+                self.my_place.to_dict())
+
+    def test_ndjson(self):
+        path, objs = self.round_trip("ndjson")
+        with open(path, "r") as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0]), self.my_user.to_dict())
+        self.assertEqual(
+                objs["Place." + self.my_place.id].to_dict(),
+                self.my_place.to_dict())
+
+    def test_save_matches_json_dump(self):
+        path = os.path.join(self.tmpdir.name, "file.json")
+        for fragment_cache in (True, False):
+            storage = FileStorage(
+                    file_path=path, fragment_cache=fragment_cache)
+            storage.new(self.my_user)
+            storage.new(self.my_place)
+            storage.save()
+            storage.save()
+            with open(path, "r") as f:
+                self.assertEqual(f.read(), json.dumps({
+                    "User." + self.my_user.id: self.my_user.to_dict(),
+                    "Place." + self.my_place.id: self.my_place.to_dict()
+                }))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            FileStorage(file_format="xml")
+
+
+class TestFileStorageDurability(unittest.TestCase):
+    """Unittests for crash-safe saves of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.my_user = User()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_durability_levels(self):
+        for durability in ("none", "file", "dir"):
+            storage = FileStorage(file_path=self.path, durability=durability)
+            storage.new(self.my_user)
+            storage.save()
+            with open(self.path, "r") as f:
+                self.assertIn("User." + self.my_user.id, json.load(f))
+
+    def test_unknown_durability(self):
+        with self.assertRaises(ValueError):
+            FileStorage(durability="always")
+
+    def test_crash_during_save_keeps_file(self):
+        storage = FileStorage(file_path=self.path)
+        storage.new(self.my_user)
+        storage.save()
+        storage.new(State())
+        with mock.patch.object(json, "dumps", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                storage.save()
+        storage = FileStorage(file_path=self.path)
+        storage.reload()
+        self.assertEqual(list(storage.all()), ["User." + self.my_user.id])
+        self.assertEqual(os.listdir(self.tmpdir.name), ["file.json"])
+
+
+class TestFileStorageBatch(unittest.TestCase):
+    """Unittests for coalescing saves of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def saved_keys(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r") as f:
+            return list(json.load(f))
+
+    def test_batch_writes_once(self):
+        storage = FileStorage(file_path=self.path)
+        my_users = [User() for i in range(3)]
+        with mock.patch.object(
+                storage, "flush", wraps=storage.flush) as flush:
+            with storage.batch():
+                for my_user in my_users:
+                    storage.new(my_user)
+                    storage.save()
+                    self.assertEqual(self.saved_keys(), [])
+            self.assertEqual(flush.call_count, 1)
+        self.assertEqual(len(self.saved_keys()), 3)
+
+    def test_nested_batch(self):
+        storage = FileStorage(file_path=self.path)
+        with storage.batch():
+            with storage.batch():
+                storage.new(User())
+                storage.save()
+            self.assertEqual(self.saved_keys(), [])
+        self.assertEqual(len(self.saved_keys()), 1)
+
+    def test_batch_flushes_on_error(self):
+        storage = FileStorage(file_path=self.path)
+        with self.assertRaises(RuntimeError):
+            with storage.batch():
+                storage.new(User())
+                storage.save()
+                raise RuntimeError("import failed")
+        self.assertEqual(len(self.saved_keys()), 1)
+
+    def test_batch_without_save_does_not_write(self):
+        storage = FileStorage(file_path=self.path)
+        with storage.batch():
+            storage.new(User())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_flush_size(self):
+        storage = FileStorage(file_path=self.path, flush_size=2)
+        storage.new(User())
+        storage.save()
+        self.assertEqual(self.saved_keys(), [])
+        storage.new(User())
+        storage.save()
+        self.assertEqual(len(self.saved_keys()), 2)
+
+    def test_flush_interval(self):
+        storage = FileStorage(file_path=self.path, flush_interval=0.01)
+        storage.new(User())
+        storage.save()
+        for i in range(200):
+            if self.saved_keys():
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(self.saved_keys()), 1)
+
+    def test_background_threads_lock(self):
+        for options, locked in (({"flush_interval": 60}, True),
+                                ({"background": True}, True),
+                                ({"flush_size": 10}, False)):
+            storage = FileStorage(file_path=self.path, **options)
+            self.assertEqual(isinstance(storage._FileStorage__lock, RWLock),
+                             locked)
+
+
+class TestFileStorageClassIndex(unittest.TestCase):
+    """Unittests for class scoped listing and counting"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path)
+        self.my_user = User()
+        self.my_state = State()
+        self.storage.new(self.my_user)
+        self.storage.new(self.my_state)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_all_cls(self):
+        self.assertEqual(
+                self.storage.all(User),
+                {"User." + self.my_user.id: self.my_user}
+                )
+        self.assertEqual(self.storage.all("User"), self.storage.all(User))
+        self.assertEqual(self.storage.all(Review), {})
+        self.assertEqual(self.storage.all("UserProfile"), {})
+
+    def test_count(self):
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count(User), 1)
+        self.assertEqual(self.storage.count("State"), 1)
+        self.assertEqual(self.storage.count(City), 0)
+
+    def test_delete_updates_index(self):
+        self.storage.delete(self.my_user)
+        self.assertEqual(self.storage.all(User), {})
+        self.assertEqual(self.storage.count(User), 0)
+
+    def test_reload_fills_index(self):
+        self.storage.save()
+        storage = FileStorage(file_path=self.path)
+        storage.reload()
+        self.assertEqual(
+                list(storage.all(State)), ["State." + self.my_state.id])
+        self.assertEqual(storage.count(), 2)
+
+    def test_scan(self):
+        other = User()
+        self.storage.new(other)
+        self.assertEqual(list(self.storage.scan()),
+                         [self.my_user, self.my_state, other])
+        self.assertEqual(list(self.storage.scan(User)), [self.my_user, other])
+        self.assertEqual(list(self.storage.scan(limit=2, offset=1)),
+                         [self.my_state, other])
+        after = "User." + self.my_user.id
+        self.assertEqual(list(self.storage.scan(after=after, limit=1)),
+                         [self.my_state])
+        self.assertEqual(list(self.storage.scan("User", after=after)),
+                         [other])
+        with self.assertRaises(KeyError):
+            self.storage.scan(State, after=after)
+
+    def test_scan_after_changes(self):
+        users = [User() for _ in range(5)]
+        for user in users:
+            self.storage.new(user)
+        self.storage.delete(users[1])
+        self.storage.new(users[0])
+        keys = ["User." + user.id for user in users]
+        self.assertEqual(list(self.storage.scan(User, after=keys[2])),
+                         [users[3], users[4], users[0]])
+        self.storage.new(users[1])
+        self.assertEqual(list(self.storage.scan(User, after=keys[4])),
+                         [users[0], users[1]])
+        self.storage.delete(users[1])
+        self.assertEqual(list(self.storage.scan(after=keys[0])), [])
+        with self.assertRaises(KeyError):
+            self.storage.scan(User, after=keys[1])
+
+
+class TestFileStorageRelations(unittest.TestCase):
+    """Unittests for the foreign key indexes of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path)
+        self.my_city = City(id="c1", state_id="s1")
+        self.storage.new(self.my_city)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_related(self):
+        self.assertEqual(
+                self.storage.related(City, "state_id", "s1"), [self.my_city])
+        self.assertEqual(self.storage.related(City, "state_id", "s2"), [])
+
+    def test_related_without_index(self):
+        self.assertEqual(
+                self.storage.related("City", "id", "c1"), [self.my_city])
+
+    def test_related_follows_updates(self):
+        self.storage.mark_dirty(self.my_city, "state_id", "s1")
+        self.my_city.__dict__["state_id"] = "s2"
+        self.storage.mark_dirty(self.my_city, "state_id", "s1")
+        self.assertEqual(self.storage.related(City, "state_id", "s1"), [])
+        self.assertEqual(
+                self.storage.related(City, "state_id", "s2"), [self.my_city])
+
+    def test_related_after_delete(self):
+        self.storage.delete(self.my_city)
+        self.assertEqual(self.storage.related(City, "state_id", "s1"), [])
+
+    def test_related_after_reload(self):
+        self.storage.save()
+        storage = FileStorage(file_path=self.path, lazy=True)
+        storage.reload()
+        cities = storage.related(City, "state_id", "s1")
+        self.assertEqual([city.id for city in cities], ["c1"])
+
+
+class TestFileStorageLazyIndexes(unittest.TestCase):
+    """Unittests for the indexes filled on the first query"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        storage = FileStorage(file_path=self.path, durability="none")
+        storage.new(Place(id="p", name="Quiet loft", price_by_night=80,
+                          latitude=48.8566, longitude=2.3522))
+        storage.new(Review(id="r", text="Lovely"))
+        storage.save()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reload_skips_them(self):
+        storage = FileStorage(file_path=self.path)
+        with mock.patch.object(TextIndex, "add") as text, \
+                mock.patch.object(GeoIndex, "add") as geo, \
+                mock.patch.object(SortedIndex, "add") as ranges:
+            storage.reload()
+            storage.new(Place(id="q"))
+        text.assert_not_called()
+        geo.assert_not_called()
+        ranges.assert_not_called()
+
+    def test_filled_on_first_query(self):
+        storage = FileStorage(file_path=self.path)
+        storage.reload()
+        self.assertEqual(len(storage.near(48.85, 2.35, 10)), 1)
+        self.assertEqual([obj.id for obj in storage.search(
+            Place, ("price_by_night", "<", 100))], ["p"])
+        self.assertEqual([obj.id for obj in storage.search(
+            Review, text="lovely")], ["r"])
+        storage.new(Place(id="q", name="Quiet room", price_by_night=50))
+        self.assertEqual(len(storage.search(Place, text="quiet")), 2)
+
+    def test_get_by_thread_safe(self):
+        storage = FileStorage(file_path=self.path, thread_safe=True)
+        storage.reload()
+        self.assertEqual(storage.get_by(Place, price_by_night=80).id, "p")
+
+
+class TestFileStorageGeo(unittest.TestCase):
+    """Unittests for the geographic queries of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path)
+        self.paris = Place(id="paris", latitude=48.8566, longitude=2.3522)
+        self.lyon = Place(id="lyon", latitude=45.764, longitude=4.8357)
+        self.storage.new(self.paris)
+        self.storage.new(self.lyon)
+        self.storage.new(Place(id="unset"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_near(self):
+        self.assertEqual(self.storage.near(48.85, 2.35, 10), [self.paris])
+        self.assertEqual(self.storage.near(46, 4.5, 500),
+                         [self.lyon, self.paris])
+        self.assertEqual(self.storage.near(46, 4.5, 500, limit=1),
+                         [self.lyon])
+
+    def test_within(self):
+        self.assertEqual(self.storage.within(45, 4, 46, 5), [self.lyon])
+
+    def test_follows_updates(self):
+        with mock.patch.object(models, "storage", self.storage):
+            self.lyon.latitude = 48.86
+            self.lyon.longitude = 2.34
+        self.assertEqual(len(self.storage.near(48.85, 2.35, 10)), 2)
+        self.storage.delete(self.paris)
+        self.assertEqual(self.storage.near(48.85, 2.35, 10), [self.lyon])
+
+    def test_after_reload(self):
+        self.storage.save()
+        storage = FileStorage(file_path=self.path, lazy=True)
+        storage.reload()
+        places = storage.near(48.85, 2.35, 10)
+        self.assertEqual([place.id for place in places], ["paris"])
+
+
+class TestFileStorageSearch(unittest.TestCase):
+    """Unittests for the search method of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path)
+        self.places = {}
+        for name, price, guests, city in (("loft", 100, 4, "c1"),
+                                          ("villa", 300, 8, "c1"),
+                                          ("room", 40, 1, "c2"),
+                                          ("suite", 110, 2, "c2")):
+            place = Place(id=name, name=name, price_by_night=price,
+                          max_guest=guests, city_id=city)
+            self.storage.new(place)
+            self.places[name] = place
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def ids(self, *conditions):
+        return sorted(place.id for place in
+                      self.storage.search(Place, *conditions))
+
+    def test_range(self):
+        self.assertEqual(self.ids(("price_by_night", "<", 120),
+                                  ("max_guest", ">=", 4)), ["loft"])
+        self.assertEqual(self.ids(("price_by_night", "<=", 100)),
+                         ["loft", "room"])
+
+    def test_equality_and_scan(self):
+        self.assertEqual(self.ids(("city_id", "=", "c2"),
+                                  ("max_guest", "!=", 1)), ["suite"])
+        self.assertEqual(self.ids(("name", "==", "villa")), ["villa"])
+        self.assertEqual(len(self.storage.search("Place")), 4)
+
+    def test_uses_index(self):
+        with mock.patch("models.engine.query.matches",
+                        return_value=True) as check:
+            self.storage.search(Place, ("price_by_night", ">", 200),
+                                ("name", "=", "villa"))
+        self.assertEqual(check.call_count, 2)
+
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            self.storage.search(Place, ("price_by_night", "~", 1))
+
+    def test_follows_updates(self):
+        with mock.patch.object(models, "storage", self.storage):
+            self.places["villa"].price_by_night = 90
+        self.storage.delete(self.places["room"])
+        self.assertEqual(self.ids(("price_by_night", "<", 120)),
+                         ["loft", "suite", "villa"])
+
+    def test_limit(self):
+        self.assertEqual(len(self.storage.search(Place, limit=2)), 2)
+
+    def test_text(self):
+        self.places["loft"].description = "cozy loft by the river"
+        self.places["room"].description = "cozy room, cozy bed"
+        for place in self.places.values():
+            self.storage.mark_dirty(place, "description", "")
+        self.assertEqual(self.ids(), sorted(self.places))
+        found = self.storage.search(Place, text="cozy")
+        self.assertEqual([place.id for place in found], ["room", "loft"])
+        found = self.storage.search(Place, ("price_by_night", ">", 50),
+                                    text="cozy")
+        self.assertEqual([place.id for place in found], ["loft"])
+        found = self.storage.search(Place, text="Villa", limit=1)
+        self.assertEqual([place.id for place in found], ["villa"])
+
+    def test_text_reviews(self):
+        review = Review(id="r1", text="Great host, great view")
+        self.storage.new(review)
+        self.assertEqual(self.storage.search(Review, text="view"), [review])
+        self.storage.delete(review)
+        self.assertEqual(self.storage.search(Review, text="view"), [])
+
+    def test_text_without_index(self):
+        with self.assertRaises(LookupError):
+            self.storage.search(User, text="betty")
+
+    def test_after_reload(self):
+        self.storage.save()
+        storage = FileStorage(file_path=self.path, lazy=True)
+        storage.reload()
+        places = storage.search(Place, ("price_by_night", ">=", 110))
+        self.assertEqual(sorted(place.id for place in places),
+                         ["suite", "villa"])
+
+
+class TestFileStorageUnique(unittest.TestCase):
+    """Unittests for the unique email index of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path)
+        self.betty = User(id="betty", email="Betty@Example.com",
+                          first_name="Betty")
+        self.storage.new(self.betty)
+        self.patcher = mock.patch.object(models, "storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def test_get_by(self):
+        self.assertIs(self.storage.get_by(User, email="betty@example.com"),
+                      self.betty)
+        self.assertIs(self.storage.get_by("User", email="Betty@Example.com",
+                                          first_name="Betty"), self.betty)
+        self.assertIsNone(self.storage.get_by(User, email="bob@example.com"))
+        self.assertIsNone(self.storage.get_by(User, email="betty@example.com",
+                                              first_name="Bob"))
+        self.assertIs(self.storage.get_by(User, first_name="Betty"),
+                      self.betty)
+
+    def test_new_rejects_duplicate(self):
+        with self.assertRaises(ValueError):
+            self.storage.new(User(id="bob", email="BETTY@example.com"))
+        self.assertIsNone(self.storage.get(User, "bob"))
+        self.storage.new(User(id="bob"))
+        self.storage.new(self.betty)
+
+    def test_setattr_rejects_duplicate(self):
+        bob = User()
+        bob.email = "bob@example.com"
+        with self.assertRaises(ValueError):
+            bob.email = "betty@example.com"
+        self.assertEqual(bob.email, "bob@example.com")
+        self.assertIs(self.storage.get_by(User, email="bob@example.com"), bob)
+        self.betty.email = "betty@example.com"
+
+    def test_email_freed(self):
+        self.storage.delete(self.betty)
+        User().email = "betty@example.com"
+        self.betty.email = "b@example.com"
+        self.storage.new(self.betty)
+
+    def test_reload_tolerates_duplicates(self):
+        with open(self.path, "w") as f:
+            json.dump({"User.a": User(id="a", email="x@y.z").to_dict(),
+                       "User.b": User(id="b", email="x@y.z").to_dict()}, f)
+        storage = FileStorage(file_path=self.path)
+        storage.reload()
+        self.assertEqual(storage.get_by(User, email="x@y.z").id, "a")
+
+
+class TestFileStorageDirtyTracking(unittest.TestCase):
+    """Unittests for re-serializing only the changed instances on save"""
+
+    def test_mark_dirty_on_setattr(self):
+        my_user = User()
+        models.storage.save()
+        changed = models.storage._FileStorage__changed
+        self.assertNotIn("User." + my_user.id, changed)
+        my_user.email = my_user.id + "@example.com"
+        self.assertIn("User." + my_user.id, changed)
+
+    def test_mark_dirty_unknown_object(self):
+        my_user = User(id="not-stored")
+        models.storage.mark_dirty(my_user)
+        self.assertNotIn(
+                "User.not-stored", models.storage._FileStorage__changed)
+
+    def test_save_reencodes_changed_object(self):
+        my_user = User()
+        models.storage.save()
+        my_user.first_name = "Betty"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objs = json.load(f)
+        self.assertEqual(objs["User." + my_user.id]["first_name"], "Betty")
+
+    def test_save_reuses_clean_fragments(self):
+        my_user = User()
+        models.storage.save()
+        my_user.__dict__["first_name"] = "Betty"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objs = json.load(f)
+        self.assertNotIn("first_name", objs["User." + my_user.id])
+
+    def test_save_reencodes_lists(self):
+        my_place = Place()
+        my_place.amenity_ids = ["a"]
+        models.storage.save()
+        my_place.amenity_ids.append("b")
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objs = json.load(f)
+        self.assertEqual(objs["Place." + my_place.id]["amenity_ids"],
+                         ["a", "b"])
+
+    def test_save_drops_deleted_object(self):
+        my_user = User()
+        models.storage.save()
+        models.storage.delete(my_user)
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertNotIn("User." + my_user.id, json.load(f))
+
+
+class TestFileStorageJournal(unittest.TestCase):
+    """Unittests for the journaled mode of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path, journal=True)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def reloaded(self):
+        storage = FileStorage(file_path=self.path, journal=True)
+        storage.reload()
+        return storage.all()
+
+    def test_save_appends_to_journal(self):
+        my_user = User()
+        self.storage.new(my_user)
+        self.storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(os.path.exists(self.path + ".journal"))
+        self.assertIn("User." + my_user.id, self.reloaded())
+
+    def test_delete_is_replayed(self):
+        my_user = User()
+        my_state = State()
+        self.storage.new(my_user)
+        self.storage.new(my_state)
+        self.storage.save()
+        self.storage.delete(my_user)
+        self.storage.save()
+        objs = self.reloaded()
+        self.assertNotIn("User." + my_user.id, objs)
+        self.assertIn("State." + my_state.id, objs)
+
+    def test_update_is_replayed(self):
+        my_user = User()
+        self.storage.new(my_user)
+        self.storage.save()
+        my_user.email = my_user.id + "@example.com"
+        self.storage.new(my_user)
+        self.storage.save()
+        objs = self.reloaded()
+        self.assertEqual(
+                objs["User." + my_user.id].email, my_user.email)
+
+    def test_opened_without_journal(self):
+        state = State(id="a", name="old")
+        self.storage.new(state)
+        self.storage.save()
+        plain = FileStorage(file_path=self.path)
+        plain.reload()
+        self.assertEqual(plain.get(State, "a").name, "old")
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        state = plain.get(State, "a")
+        state.name = ""
+        plain.new(state)
+        plain.save()
+        self.assertEqual(self.reloaded()["State.a"].name, "")
+
+    def test_compact(self):
+        my_user = User()
+        self.storage.new(my_user)
+        self.storage.save()
+        self.storage.compact()
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        with open(self.path, "r") as f:
+            self.assertIn("User." + my_user.id, json.load(f))
+        self.assertIn("User." + my_user.id, self.reloaded())
+
+    def test_background_compaction(self):
+        storage = FileStorage(
+                file_path=self.path, journal=True, compact_size=0)
+        my_user = User()
+        storage.new(my_user)
+        storage.save()
+        storage._FileStorage__compactor.join()
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        self.assertIn("User." + my_user.id, self.reloaded())
+
+
+class TestFileStorageColumns(unittest.TestCase):
+    """Unittests for the column views of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        records = {}
+        for i in range(4):
+            place = Place()
+            place.city_id = "c{}".format(i % 2)
+            place.price_by_night = 100 * (i + 1)
+            records["Place." + place.id] = place.to_dict()
+        records["User.u"] = User(id="u").to_dict()
+        with open(self.path, "w") as f:
+            json.dump(records, f)
+        self.storage = FileStorage(file_path=self.path, lazy=True)
+        self.storage.reload()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_default_fields(self):
+        view = self.storage.columns(Place)
+        self.assertEqual(len(view), 4)
+        self.assertIn("price_by_night", view.fields)
+        self.assertIn("city_id", view.fields)
+        self.assertNotIn("amenity_ids", view.fields)
+
+    def test_does_not_build_instances(self):
+        view = self.storage.columns("Place", ["price_by_night"])
+        self.assertEqual(view.mean("price_by_night"), 250)
+        objs = self.storage.all()
+        self.assertFalse(any(objs.is_loaded(key) for key in objs))
+
+    def test_group_by_city(self):
+        view = self.storage.columns(Place)
+        self.assertEqual(view.group_by("city_id", "price_by_night", "sum"),
+                         {"c0": 400, "c1": 600})
+
+    def test_sees_changes(self):
+        place = self.storage.get(Place, self.storage.columns(Place).ids[0])
+        place.price_by_night = 1000
+        self.assertEqual(self.storage.columns(Place).max("price_by_night"),
+                         1000)
+
+
+class TestFileStorageSlots(unittest.TestCase):
+    """Unittests for the slots option of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.my_user = User()
+        self.my_user.email = self.my_user.id + "@example.com"
+        self.key = "User." + self.my_user.id
+        with open(self.path, "w") as f:
+            json.dump({self.key: self.my_user.to_dict()}, f)
+        self.storage = FileStorage(file_path=self.path, slots=True)
+        self.storage.reload()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_unique_rechecked_on_write(self):
+        user = self.storage.get(User, self.my_user.id)
+        other = compact.User.from_dict({"id": "other"})
+        self.storage.new(other)
+        with mock.patch.object(models, "storage", self.storage), \
+                mock.patch.object(self.storage, "validate"):
+            with self.assertRaises(ValueError):
+                other.email = user.email.upper()
+        self.assertEqual(other.email, "")
+
+    def test_reload_builds_compact(self):
+        instance = self.storage.all()[self.key]
+        self.assertIsInstance(instance, compact.User)
+        self.assertEqual(instance.to_dict(), self.my_user.to_dict())
+
+    def test_reloaded_is_instance_of_model(self):
+        self.assertIsInstance(self.storage.get(User, self.my_user.id), User)
+
+    def test_model_class(self):
+        self.assertIs(self.storage.model_class(User), compact.User)
+        self.assertIs(self.storage.model_class("Place"), compact.Place)
+        self.assertIs(FileStorage(file_path=self.path).model_class("Place"),
+                      Place)
+
+    def test_save_round_trip(self):
+        instance = self.storage.all()[self.key]
+        instance.first_name = "Betty"
+        self.storage.save()
+        storage = FileStorage(file_path=self.path)
+        storage.reload()
+        self.assertEqual(storage.all()[self.key].to_dict(),
+                         instance.to_dict())
+
+    def test_related(self):
+        place = compact.Place.from_dict(Place().to_dict())
+        place.user_id = self.my_user.id
+        self.storage.new(place)
+        self.assertEqual(self.storage.related(Place, "user_id",
+                                              self.my_user.id), [place])
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """Unittests for the lazy mode of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.my_user = User()
+        self.key = "User." + self.my_user.id
+        with open(self.path, "w") as f:
+            json.dump({self.key: self.my_user.to_dict()}, f)
+        self.storage = FileStorage(file_path=self.path, lazy=True)
+        self.storage.reload()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reload_keeps_records(self):
+        objs = self.storage.all()
+        self.assertIn(self.key, objs)
+        self.assertFalse(objs.is_loaded(self.key))
+
+    def test_access_builds_instance(self):
+        instance = self.storage.all()[self.key]
+        self.assertIsInstance(instance, User)
+        self.assertEqual(instance.to_dict(), self.my_user.to_dict())
+
+    def test_copies_hold_instances(self):
+        objs = self.storage.all()
+        for copy in (dict(objs), objs.copy(), {**objs}):
+            self.assertIsInstance(copy[self.key], User)
+
+    def test_save_without_building(self):
+        self.storage.save()
+        self.assertFalse(self.storage.all().is_loaded(self.key))
+        with open(self.path, "r") as f:
+            self.assertEqual(
+                    json.load(f), {self.key: self.my_user.to_dict()})
+
+    def test_delete(self):
+        self.storage.delete(self.my_user)
+        self.storage.save()
+        self.assertNotIn(self.key, self.storage.all())
+
+
+class TestFileStorageThreads(unittest.TestCase):
+    """Unittests for the thread-safe mode of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path, thread_safe=True,
+                                   durability="none")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_threads(self, *targets):
+        errors = []
+
+        def run(target):
+            try:
+                target()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=run, args=(target,))
+                   for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_new_during_save(self):
+        def create(name):
+            def target():
+                for number in range(1500):
+                    self.storage.new(Place(id="{}{}".format(name, number),
+                                           price_by_night=number))
+            return target
+
+        def save():
+            for _ in range(20):
+                self.storage.save()
+
+        def search():
+            for _ in range(200):
+                self.storage.search(Place, ("price_by_night", "<", 100))
+
+        self.run_threads(create("a"), create("b"), save, search)
+        self.storage.save()
+        storage = FileStorage(file_path=self.path)
+        storage.reload()
+        self.assertEqual(storage.count(Place), 3000)
+        self.assertEqual(len(self.storage.search(
+            Place, ("price_by_night", "<", 100))), 200)
+
+    def test_unique_rechecked_on_write(self):
+        first, second = User(id="a"), User(id="b", email="b@example.com")
+        self.storage.new(first)
+        self.storage.new(second)
+        with mock.patch.object(models, "storage", self.storage), \
+                mock.patch.object(self.storage, "validate"):
+            # both threads passed validate() before either one wrote
+            first.email = "x@example.com"
+            with self.assertRaises(ValueError):
+                second.email = "X@example.com"
+        self.assertEqual(second.email, "b@example.com")
+        self.assertEqual(self.storage.get_by(User, email="b@example.com"),
+                         second)
+        self.assertEqual(self.storage.get_by(User, email="x@example.com"),
+                         first)
+
+    def test_all_is_a_copy(self):
+        objects = self.storage.all()
+        self.storage.new(User())
+        self.assertEqual(objects, {})
+        self.assertEqual(len(self.storage.all()), 1)
+
+    def test_lazy_builds_once(self):
+        users = [User() for _ in range(200)]
+        with open(self.path, "w") as f:
+            json.dump({"User." + user.id: user.to_dict() for user in users},
+                      f)
+        storage = FileStorage(file_path=self.path, lazy=True,
+                              thread_safe=True)
+        storage.reload()
+        found = []
+
+        def look_up():
+            found.append([storage.get(User, user.id) for user in users])
+
+        self.run_threads(look_up, look_up, look_up)
+        for first, *others in zip(*found):
+            for other in others:
+                self.assertIs(other, first)
+
+    def test_scan_snapshot(self):
+        for _ in range(3):
+            self.storage.new(State())
+        page = self.storage.scan(State)
+        self.storage.new(State())
+        self.storage.delete(next(iter(self.storage.all(State).values())))
+        self.assertEqual(len(list(page)), 2)
+
+
+def _create_and_save(path, prefix, count):
+    storage = FileStorage(file_path=path, shared=True, durability="none")
+    storage.reload()
+    for number in range(count):
+        storage.new(State(id="{}{}".format(prefix, number)))
+        storage.save()
+
+
+class TestFileStorageShared(unittest.TestCase):
+    """Unittests for the shared mode of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.first = self.open()
+        self.second = self.open()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def open(self):
+        storage = FileStorage(file_path=self.path, shared=True,
+                              durability="none")
+        storage.reload()
+        return storage
+
+    def saved(self):
+        with open(self.path, "r") as f:
+            return set(json.load(f))
+
+    def test_keeps_other_new_instances(self):
+        self.first.new(State(id="a"))
+        self.first.save()
+        self.second.new(State(id="b"))
+        self.second.save()
+        self.assertEqual(self.saved(), {"State.a", "State.b"})
+        self.assertIsNotNone(self.second.get(State, "a"))
+
+    def test_keeps_other_updates_and_deletes(self):
+        for obj_id in ("a", "b"):
+            self.first.new(State(id=obj_id, name="old"))
+        self.first.save()
+        self.second.refresh()
+        with mock.patch.object(models, "storage", self.first):
+            self.first.get(State, "a").name = "new"
+        self.first.delete(self.first.get(State, "b"))
+        self.first.save()
+        self.second.new(State(id="c"))
+        self.second.save()
+        self.assertEqual(self.saved(), {"State.a", "State.c"})
+        self.assertEqual(self.second.get(State, "a").name, "new")
+        self.assertIsNone(self.second.get(State, "b"))
+
+    def test_own_changes_win(self):
+        self.first.new(State(id="a", name="first"))
+        self.first.save()
+        self.second.refresh()
+        with mock.patch.object(models, "storage", self.second):
+            self.second.get(State, "a").name = "second"
+        with mock.patch.object(models, "storage", self.first):
+            self.first.get(State, "a").name = "first again"
+        self.first.save()
+        self.second.save()
+        storage = self.open()
+        self.assertEqual(storage.get(State, "a").name, "second")
+
+    def test_stale(self):
+        self.assertFalse(self.second.is_stale())
+        self.first.new(State(id="a"))
+        self.first.save()
+        self.assertFalse(self.first.is_stale())
+        self.assertTrue(self.second.is_stale())
+        self.assertTrue(self.second.refresh())
+        self.assertFalse(self.second.is_stale())
+        self.assertFalse(self.second.refresh())
+        self.assertIsNotNone(self.second.get(State, "a"))
+
+    def test_processes(self):
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=_create_and_save,
+                                   args=(self.path, prefix, 30))
+                   for prefix in ("a", "b", "c")]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(len(self.saved()), 90)
+
+    def test_journal(self):
+        with self.assertRaises(ValueError):
+            FileStorage(file_path=self.path, shared=True, journal=True)
+
+
+class TestFileStorageBackground(unittest.TestCase):
+    """Unittests for the background saves of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path, background=True,
+                                   durability="none")
+
+    def tearDown(self):
+        self.storage.flush()
+        self.tmpdir.cleanup()
+
+    def saved(self):
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def wait(self):
+        for _ in range(500):
+            if not self.storage.save_status()["in_progress"]:
+                return
+            time.sleep(0.01)
+        self.fail("background save still running")
+
+    def slow_down(self):
+        """Makes background writes wait for the returned event"""
+
+        release = threading.Event()
+        dump = self.storage._FileStorage__dump
+
+        def slow_dump(f, items):
+            release.wait(5)
+            dump(f, items)
+
+        self.storage._FileStorage__dump = slow_dump
+        return release
+
+    def test_status_before_save(self):
+        status = self.storage.save_status()
+        self.assertFalse(status["in_progress"])
+        self.assertIsNone(status["last_status"])
+        self.assertIsNone(status["last_save_time"])
+
+    def test_save_in_background(self):
+        self.storage.new(State(id="a", name="one"))
+        self.storage.save()
+        self.wait()
+        self.assertEqual(self.saved()["State.a"]["name"], "one")
+        status = self.storage.save_status()
+        self.assertEqual(status["last_status"], "ok")
+        self.assertEqual(status["changes"], 0)
+        self.assertGreaterEqual(status["last_duration"], 0)
+
+    def test_snapshot(self):
+        state = State(id="a", name="one")
+        self.storage.new(state)
+        release = self.slow_down()
+        self.assertTrue(self.storage.bgsave())
+        self.assertTrue(self.storage.save_status()["in_progress"])
+        self.assertFalse(self.storage.bgsave())
+        state.name = "two"
+        self.storage.new(State(id="b"))
+        release.set()
+        self.wait()
+        self.assertEqual(set(self.saved()), {"State.a"})
+        self.assertEqual(self.saved()["State.a"]["name"], "one")
+
+    def test_snapshot_copies_lists(self):
+        place = Place(id="p", amenity_ids=["a"])
+        self.storage.new(place)
+        release = self.slow_down()
+        self.assertTrue(self.storage.bgsave())
+        place.amenity_ids.append("b")
+        release.set()
+        self.wait()
+        self.assertEqual(self.saved()["Place.p"]["amenity_ids"], ["a"])
+        self.storage.save()
+        self.wait()
+        self.assertEqual(self.saved()["Place.p"]["amenity_ids"], ["a", "b"])
+
+    def test_save_while_running(self):
+        release = self.slow_down()
+        self.storage.new(State(id="a"))
+        self.storage.save()
+        self.storage.new(State(id="b"))
+        self.storage.save()
+        release.set()
+        for _ in range(500):
+            if self.storage.save_status()["changes"] == 0:
+                break
+            time.sleep(0.01)
+        self.wait()
+        self.assertEqual(set(self.saved()), {"State.a", "State.b"})
+
+    def test_save_while_ending(self):
+        """The running save ends between the failed bgsave() of a save()
+        and the return of save()"""
+
+        release = self.slow_down()
+        self.storage.new(State(id="a"))
+        self.storage.save()
+        worker = [thread for thread in threading.enumerate()
+                  if thread.name.endswith("(__background_write)")][0]
+        bgsave = self.storage.bgsave
+
+        def late_bgsave():
+            started = bgsave()
+            release.set()
+            worker.join(5)
+            return started
+
+        self.storage.new(State(id="b"))
+        with mock.patch.object(self.storage, "bgsave", late_bgsave):
+            self.storage.save()
+        for _ in range(500):
+            if self.storage.save_status()["changes"] == 0:
+                break
+            time.sleep(0.01)
+        self.wait()
+        self.assertEqual(set(self.saved()), {"State.a", "State.b"})
+
+    def test_flush_waits(self):
+        self.storage.new(State(id="a"))
+        self.storage.save()
+        self.storage.new(State(id="b"))
+        self.storage.flush()
+        self.assertFalse(self.storage.save_status()["in_progress"])
+        self.assertEqual(set(self.saved()), {"State.a", "State.b"})
+
+    def test_failure(self):
+        self.storage.new(State(id="a"))
+        with mock.patch("models.engine.file_storage.atomic_write",
+                        side_effect=OSError("disk full")):
+            self.storage.save()
+            self.wait()
+        status = self.storage.save_status()
+        self.assertEqual(status["last_status"], "failed")
+        self.assertEqual(status["last_error"], "disk full")
+        self.assertEqual(status["changes"], 1)
+        self.storage.flush()
+        self.assertEqual(set(self.saved()), {"State.a"})
+        self.assertEqual(self.storage.save_status()["last_status"], "ok")
+
+    def test_journal_saves_in_foreground(self):
+        storage = FileStorage(file_path=self.path, journal=True,
+                              durability="none")
+        storage.new(State(id="a"))
+        self.assertTrue(storage.bgsave())
+        self.assertFalse(storage.save_status()["in_progress"])
+        self.assertEqual(storage.save_status()["last_status"], "ok")
+
+
+class TestFileStorageAsync(unittest.TestCase):
+    """Unittests for the asyncio methods of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def open(self, **options):
+        return FileStorage(file_path=self.path, durability="none",
+                           **options)
+
+    def saved(self):
+        with open(self.path, "r") as f:
+            return set(json.load(f))
+
+    def test_asave_and_areload(self):
+        async def run():
+            storage = self.open()
+            storage.new(State(id="a"))
+            await storage.asave()
+            reloaded = self.open()
+            await reloaded.areload()
+            return reloaded
+
+        reloaded = asyncio.run(run())
+        self.assertIsNotNone(reloaded.get(State, "a"))
+        self.assertEqual(self.saved(), {"State.a"})
+
+    def test_coalesces(self):
+        async def run(storage):
+            storage.new(State(id="first"))
+            first = asyncio.ensure_future(storage.asave())
+            await asyncio.sleep(0)
+            others = []
+            for number in range(10):
+                storage.new(State(id=str(number)))
+                others.append(asyncio.ensure_future(storage.asave()))
+            await asyncio.gather(first, *others)
+
+        for options in ({}, {"thread_safe": True}):
+            storage = self.open(**options)
+            with mock.patch("models.engine.file_storage.atomic_write",
+                            wraps=atomic_write) as write:
+                asyncio.run(run(storage))
+            self.assertEqual(write.call_count, 2)
+            self.assertEqual(len(self.saved()), 11)
+
+    def test_loop_runs_during_save(self):
+        async def run(storage):
+            ticks = []
+
+            async def tick():
+                while True:
+                    ticks.append(None)
+                    await asyncio.sleep(0.01)
+
+            ticker = asyncio.ensure_future(tick())
+            await asyncio.sleep(0)
+            await storage.asave()
+            ticker.cancel()
+            return len(ticks)
+
+        storage = self.open()
+        storage.new(State(id="a"))
+        dump = storage._FileStorage__dump
+
+        def slow_dump(f, items):
+            time.sleep(0.1)
+            dump(f, items)
+
+        storage._FileStorage__dump = slow_dump
+        self.assertGreater(asyncio.run(run(storage)), 3)
+
+    def test_asave_error(self):
+        async def run(storage):
+            await asyncio.gather(storage.asave(), storage.asave(),
+                                 return_exceptions=True)
+            return await asyncio.gather(storage.asave(),
+                                        return_exceptions=True)
+
+        storage = self.open()
+        storage.new(State(id="a"))
+        with mock.patch("models.engine.file_storage.atomic_write",
+                        side_effect=OSError("disk full")):
+            errors = asyncio.run(run(storage))
+        self.assertIsInstance(errors[0], OSError)
+        self.assertEqual(storage.save_status()["changes"], 1)
+
+    def test_aall(self):
+        async def run(storage, cls=None):
+            found = []
+            async for obj in storage.aall(cls, chunk_size=2):
+                found.append(obj.id)
+                if obj.id == "b":
+                    storage.new(State(id="z"))
+            return found
+
+        for options in ({}, {"thread_safe": True}):
+            storage = self.open(**options)
+            for obj_id in "abc":
+                storage.new(State(id=obj_id))
+            storage.new(User(id="u"))
+            self.assertEqual(asyncio.run(run(storage)),
+                             ["a", "b", "c", "u"])
+            self.assertEqual(asyncio.run(run(storage, "User")), ["u"])
+
+
+class TestFileStorageShards(unittest.TestCase):
+    """Unittests for the sharded mode of the FileStorage class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def open(self, shards=4, **options):
+        storage = FileStorage(file_path=self.path, durability="none",
+                              shards=shards, **options)
+        storage.reload()
+        return storage
+
+    def files(self):
+        return sorted(os.listdir(self.tmpdir.name))
+
+    def test_save_and_reload(self):
+        storage = self.open()
+        for number in range(40):
+            storage.new(State(id=str(number), name="s{}".format(number)))
+        storage.new(User(id="u", email="a@example.com"))
+        storage.save()
+        self.assertEqual(self.files(), ["file-00{}-of-004.ndjson".format(n)
+                                        for n in range(4)])
+        for options in ({"processes": 1}, {"processes": 2},
+                        {"lazy": True, "processes": 2}):
+            reloaded = self.open(**options)
+            self.assertEqual(reloaded.count(), 41)
+            self.assertEqual(reloaded.get(State, "7").name, "s7")
+            self.assertEqual(reloaded.get_by(User, email="A@example.com").id,
+                             "u")
+
+    def test_rewrites_changed_shards(self):
+        storage = self.open()
+        for number in range(40):
+            storage.new(State(id=str(number)))
+        storage.save()
+        state = storage.get(State, "3")
+        with mock.patch("models.engine.file_storage.atomic_write",
+                        wraps=atomic_write) as write:
+            storage.delete(state)
+            storage.save()
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(write.call_args[0][0],
+                         os.path.join(self.tmpdir.name, "file-{:03d}-of-004"
+                                      ".ndjson".format(shard_of("State.3",
+                                                                4))))
+        self.assertIsNone(self.open().get(State, "3"))
+        self.assertEqual(self.open().count(), 39)
+
+    def test_rewrites_shards_with_lists(self):
+        storage = self.open()
+        place = Place(id="p", amenity_ids=["a"])
+        storage.new(place)
+        storage.save()
+        place.amenity_ids.append("b")
+        storage.save()
+        self.assertEqual(self.open().get(Place, "p").amenity_ids, ["a", "b"])
+
+    def test_splits_single_file(self):
+        storage = FileStorage(file_path=self.path, durability="none")
+        storage.new(State(id="a"))
+        storage.save()
+        sharded = self.open(shards=2)
+        self.assertIsNotNone(sharded.get(State, "a"))
+        sharded.save()
+        self.assertIn("file-000-of-002.ndjson", self.files())
+        self.assertIsNotNone(self.open(shards=2).get(State, "a"))
+
+    def test_change_of_count(self):
+        storage = self.open(shards=3)
+        for number in range(10):
+            storage.new(State(id=str(number)))
+        storage.save()
+        storage = self.open(shards=2)
+        self.assertEqual(storage.count(), 10)
+        storage.save()
+        self.assertEqual(self.files(), ["file-000-of-002.ndjson",
+                                        "file-001-of-002.ndjson"])
+        self.assertEqual(self.open(shards=2).count(), 10)
+
+    def test_opened_without_shards(self):
+        storage = self.open(shards=2)
+        storage.new(State(id="a", name="old"))
+        storage.save()
+        plain = self.open(shards=None)
+        self.assertEqual(plain.get(State, "a").name, "old")
+        self.assertEqual(self.files(), ["file.json"])
+        state = plain.get(State, "a")
+        state.name = "new"
+        plain.new(state)
+        plain.save()
+        self.assertEqual(self.open(shards=2).get(State, "a").name, "new")
+        self.assertEqual(self.files(), ["file-000-of-002.ndjson",
+                                        "file-001-of-002.ndjson"])
+
+    def test_last_written_wins(self):
+        storage = self.open(shards=2)
+        storage.new(State(id="a", name="sharded"))
+        storage.save()
+        plain = FileStorage(file_path=self.path, durability="none")
+        plain.new(State(id="a", name="single"))
+        plain.save()
+        paths = [os.path.join(self.tmpdir.name, name)
+                 for name in self.files()]
+        for age, path in enumerate(sorted(paths, key=len)):
+            os.utime(path, (1000 + age, 1000 + age))
+        self.assertEqual(self.open(shards=None).get(State, "a").name,
+                         "sharded")
+        self.assertEqual(self.files(), ["file.json"])
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            FileStorage(file_path=self.path, shards=0)
+        with self.assertRaises(ValueError):
+            FileStorage(file_path=self.path, shards=2, journal=True)
+
+
 if __name__ == '__main__':
     unittest.main()
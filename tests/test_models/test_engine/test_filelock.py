@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the file locks of the engine package
+    file: AirBnB_clone/models/engine/filelock.py
+
+It tests various aspects of the file locks, including:
+    - file signatures
+    - exclusion between locks on the same file
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from models.engine.filelock import FileLock, signature
+
+
+class TestSignature(unittest.TestCase):
+    """Unittests for the signature function"""
+
+    def test_changes_on_replace(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "file.json")
+            self.assertIsNone(signature(path))
+            with open(path, "w") as f:
+                f.write("{}")
+            first = signature(path)
+            self.assertEqual(signature(path), first)
+            with open(path + ".tmp", "w") as f:
+                f.write("{}")
+            os.replace(path + ".tmp", path)
+            self.assertNotEqual(signature(path), first)
+            with open(path, "r") as f:
+                self.assertEqual(signature(f.fileno()), signature(path))
+
+
+class TestFileLock(unittest.TestCase):
+    """Unittests for the FileLock class"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, "file.json")
+        self.first = FileLock(path)
+        self.second = FileLock(path)
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+        self.tmpdir.cleanup()
+
+    def test_lock_file(self):
+        with self.first.shared():
+            self.assertTrue(os.path.exists(self.first.path))
+        self.assertTrue(self.first.path.endswith("file.json.lock"))
+
+    def test_exclusive(self):
+        events = []
+
+        def read():
+            with self.second.shared():
+                events.append("read")
+
+        with self.first.exclusive():
+            reader = threading.Thread(target=read)
+            reader.start()
+            time.sleep(0.05)
+            events.append("write")
+        reader.join()
+        self.assertEqual(events, ["write", "read"])
+
+    def test_shared(self):
+        with self.first.shared():
+            with self.second.shared():
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the full text index of the engine package
+    file: AirBnB_clone/models/engine/fulltext.py
+
+It tests various aspects of the full text index, including:
+    - tokenizing
+    - adding, removing and reindexing documents
+    - ranking
+"""
+
+import unittest
+from models.engine.fulltext import TextIndex, tokenize
+from models.place import Place
+from models.review import Review
+
+
+class TestTokenize(unittest.TestCase):
+    """Unittests for the tokenize function"""
+
+    def test_words(self):
+        self.assertEqual(tokenize("Cozy LOFT, near the Nile!"),
+                         ["cozy", "loft", "near", "the", "nile"])
+        self.assertEqual(tokenize("café 2-bed"), ["café", "2", "bed"])
+        self.assertEqual(tokenize(""), [])
+
+
+class TestTextIndex(unittest.TestCase):
+    """Unittests for the TextIndex class"""
+
+    def setUp(self):
+        self.index = TextIndex(Place, ("name", "description"))
+        self.index.add("Place.1", {"name": "Loft",
+                                   "description": "cozy loft by the river"})
+        self.index.add("Place.2", {"name": "Villa",
+                                   "description": "large villa, pool"})
+        self.index.add("Place.3", {"name": "Room",
+                                   "description": "cozy room, cozy bed"})
+
+    def test_attributes(self):
+        self.assertEqual(self.index.classname, "Place")
+        self.assertEqual(self.index.fields, ("name", "description"))
+        self.assertEqual(len(self.index), 3)
+
+    def test_search(self):
+        keys = [key for _, key in self.index.search("cozy")]
+        self.assertEqual(keys, ["Place.3", "Place.1"])
+        self.assertEqual(self.index.search("pool")[0][1], "Place.2")
+        self.assertEqual(self.index.search("castle"), [])
+        self.assertEqual(self.index.search(""), [])
+
+    def test_rare_words_rank_higher(self):
+        keys = [key for _, key in self.index.search("cozy river")]
+        self.assertEqual(keys[0], "Place.1")
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search("cozy", limit=1)), 1)
+
+    def test_scores_positive_and_sorted(self):
+        scores = [score for score, _ in self.index.search("cozy loft")]
+        self.assertTrue(all(score > 0 for score in scores))
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_empty_documents_not_indexed(self):
+        self.index.add("Place.4", {})
+        self.index.add("Place.5", {"name": "", "description": "..."})
+        self.assertEqual(len(self.index), 3)
+
+    def test_remove(self):
+        self.index.remove("Place.3", {})
+        self.index.remove("Place.9", {})
+        self.assertEqual([key for _, key in self.index.search("cozy")],
+                         ["Place.1"])
+        self.assertEqual(self.index.search("bed"), [])
+
+    def test_changed(self):
+        self.index.changed("Place.2", {"name": "Villa",
+                                       "description": "cozy villa"},
+                           "description", "large villa, pool")
+        self.assertEqual(self.index.search("pool"), [])
+        self.assertEqual(len(self.index.search("cozy")), 3)
+
+    def test_non_string_values(self):
+        index = TextIndex(Review, ("text",))
+        index.add("Review.1", {"text": 42})
+        self.assertEqual(index.search("42")[0][1], "Review.1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the indexes of the engine package
+    file: AirBnB_clone/models/engine/indexes.py
+
+It tests various aspects of the indexes, including:
+    - reading attributes of instances and records
+    - adding, removing and moving keys
+    - distances, bounding boxes and geographic queries
+    - range queries and search conditions
+"""
+
+import unittest
+from models.engine.indexes import GeoIndex, HashIndex, SortedIndex
+from models.engine.indexes import UniqueIndex
+from models.engine.indexes import bounding_box, distance_km, in_box
+from models.engine.indexes import matches, range_of, value_of
+from models.city import City
+from models.place import Place
+from models.user import User
+
+
+class TestValueOf(unittest.TestCase):
+    """Unittests for reading attributes of instances and records"""
+
+    def test_instance(self):
+        my_city = City()
+        my_city.name = "Khartoum"
+        self.assertEqual(value_of(my_city, "name"), "Khartoum")
+        self.assertIsNone(value_of(my_city, "missing"))
+
+    def test_record(self):
+        self.assertEqual(value_of({"name": "Omdurman"}, "name"), "Omdurman")
+        self.assertEqual(value_of({}, "name", ""), "")
+
+
+class TestHashIndex(unittest.TestCase):
+    """Unittests for the HashIndex class"""
+
+    def setUp(self):
+        self.index = HashIndex(City, "state_id")
+
+    def test_attributes(self):
+        self.assertEqual(self.index.classname, "City")
+        self.assertEqual(self.index.field, "state_id")
+        self.assertEqual(self.index.default, "")
+
+    def test_add_and_lookup(self):
+        self.index.add("City.1", {"state_id": "s1"})
+        self.index.add("City.2", {"state_id": "s1"})
+        self.index.add("City.3", {"state_id": "s2"})
+        self.assertEqual(self.index.lookup("s1"), ["City.1", "City.2"])
+        self.assertEqual(self.index.lookup("s3"), [])
+
+    def test_empty_value_not_indexed(self):
+        self.index.add("City.1", {})
+        self.index.add("City.2", {"state_id": ""})
+        self.assertEqual(self.index.lookup(""), [])
+
+    def test_remove(self):
+        self.index.add("City.1", {"state_id": "s1"})
+        self.index.remove("City.1", {"state_id": "s1"})
+        self.index.remove("City.2", {"state_id": "s2"})
+        self.assertEqual(self.index.lookup("s1"), [])
+
+    def test_update(self):
+        self.index.add("City.1", {"state_id": "s1"})
+        self.index.update("City.1", "s1", "s2")
+        self.assertEqual(self.index.lookup("s1"), [])
+        self.assertEqual(self.index.lookup("s2"), ["City.1"])
+
+    def test_changed(self):
+        self.index.add("City.1", {"state_id": "s1"})
+        self.index.changed("City.1", {"state_id": "s2"}, "state_id", "s1")
+        self.assertEqual(self.index.lookup("s2"), ["City.1"])
+
+
+class TestUniqueIndex(unittest.TestCase):
+    """Unittests for the UniqueIndex class"""
+
+    def setUp(self):
+        self.index = UniqueIndex(User, "email", normalize=str.lower)
+        self.index.add("User.1", {"email": "Betty@Example.com"})
+
+    def test_lookup_normalized(self):
+        self.assertEqual(self.index.lookup("betty@example.com"), ["User.1"])
+        self.assertEqual(self.index.lookup("BETTY@EXAMPLE.COM"), ["User.1"])
+        self.assertEqual(self.index.normalize(42), 42)
+
+    def test_conflict(self):
+        self.assertEqual(self.index.conflict("User.2", "betty@example.com"),
+                         "User.1")
+        self.assertIsNone(self.index.conflict("User.1", "betty@example.com"))
+        self.assertIsNone(self.index.conflict("User.2", "bob@example.com"))
+        self.assertIsNone(self.index.conflict("User.2", ""))
+
+    def test_duplicates_tolerated(self):
+        self.index.add("User.2", {"email": "betty@example.com"})
+        self.assertEqual(self.index.lookup("betty@example.com"),
+                         ["User.1", "User.2"])
+
+    def test_update(self):
+        self.index.update("User.1", "Betty@Example.com", "b@example.com")
+        self.assertEqual(self.index.lookup("betty@example.com"), [])
+        self.assertEqual(self.index.lookup("B@example.com"), ["User.1"])
+
+
+class TestGeometry(unittest.TestCase):
+    """Unittests for the distance and bounding box functions"""
+
+    def test_distance(self):
+        self.assertEqual(distance_km(10, 20, 10, 20), 0)
+        self.assertAlmostEqual(distance_km(0, 0, 1, 0), 111.2, places=1)
+        self.assertAlmostEqual(distance_km(0, 179.5, 0, -179.5),
+                               distance_km(0, 0, 0, 1))
+
+    def test_bounding_box(self):
+        south, west, north, east = bounding_box(0, 0, 111.2)
+        self.assertAlmostEqual(south, -1, places=2)
+        self.assertAlmostEqual(east, 1, places=2)
+        self.assertTrue(in_box(0.5, -0.5, south, west, north, east))
+
+    def test_bounding_box_across_meridian(self):
+        south, west, north, east = bounding_box(0, 179.9, 50)
+        self.assertGreater(west, east)
+        self.assertTrue(in_box(0, -179.9, south, west, north, east))
+        self.assertFalse(in_box(0, 0, south, west, north, east))
+
+    def test_bounding_box_around_pole(self):
+        self.assertEqual(bounding_box(89.9, 0, 50)[1:4:2], (-180, 180))
+
+
+class TestGeoIndex(unittest.TestCase):
+    """Unittests for the GeoIndex class"""
+
+    def setUp(self):
+        self.index = GeoIndex(Place)
+        self.index.add("Place.paris", {"latitude": 48.8566,
+                                       "longitude": 2.3522})
+        self.index.add("Place.versailles", {"latitude": 48.8049,
+                                            "longitude": 2.1204})
+        self.index.add("Place.london", {"latitude": 51.5074,
+                                        "longitude": -0.1278})
+
+    def test_attributes(self):
+        self.assertEqual(self.index.classname, "Place")
+        self.assertEqual(self.index.fields, ("latitude", "longitude"))
+        self.assertEqual(len(self.index), 3)
+
+    def test_unset_or_invalid_not_indexed(self):
+        self.index.add("Place.1", {})
+        self.index.add("Place.2", {"latitude": "north", "longitude": 2})
+        self.index.add("Place.3", {"latitude": 95.0, "longitude": 2})
+        self.assertEqual(len(self.index), 3)
+
+    def test_near(self):
+        found = self.index.near(48.85, 2.35, 30)
+        self.assertEqual([key for _, key in found],
+                         ["Place.paris", "Place.versailles"])
+        self.assertLess(found[0][0], 1)
+        self.assertEqual(len(self.index.near(48.85, 2.35, 500)), 3)
+        self.assertEqual(self.index.near(48.85, 2.35, 500, 1)[0][1],
+                         "Place.paris")
+
+    def test_near_negative_radius(self):
+        with self.assertRaises(ValueError):
+            self.index.near(0, 0, -1)
+
+    def test_not_finite(self):
+        nan, inf = float("nan"), float("inf")
+        for args in ((nan, 0, 10), (0, inf, 10), (0, 0, inf)):
+            with self.assertRaises(ValueError):
+                self.index.near(*args)
+        for args in ((0, inf, 1, 1), (nan, 0, 1, 1), (0, 0, 1, -inf)):
+            with self.assertRaises(ValueError):
+                self.index.within(*args)
+
+    def test_within(self):
+        self.assertEqual(sorted(self.index.within(48, 2, 49, 3)),
+                         ["Place.paris", "Place.versailles"])
+        self.assertEqual(self.index.within(-10, -10, 10, 10), [])
+
+    def test_within_across_meridian(self):
+        self.index.add("Place.fiji", {"latitude": -17.7,
+                                      "longitude": 179.9})
+        self.index.add("Place.samoa", {"latitude": -13.8,
+                                       "longitude": -171.8})
+        self.assertEqual(sorted(self.index.within(-20, 170, -10, -170)),
+                         ["Place.fiji", "Place.samoa"])
+
+    def test_remove_and_changed(self):
+        self.index.remove("Place.london", {})
+        self.assertEqual(len(self.index), 2)
+        self.index.changed("Place.paris", {"latitude": 51.5,
+                                           "longitude": -0.12},
+                           "latitude", 48.8566)
+        self.assertEqual(self.index.within(51, -1, 52, 0), ["Place.paris"])
+        self.assertEqual(self.index.within(48, 2.3, 49, 3), [])
+
+
+class TestConditions(unittest.TestCase):
+    """Unittests for the matches and range_of functions"""
+
+    def test_matches(self):
+        self.assertTrue(matches({"max_guest": 4}, "max_guest", ">=", 4))
+        self.assertFalse(matches({"max_guest": 4}, "max_guest", "<", 4))
+        self.assertTrue(matches({}, "max_guest", "=", 0, 0))
+        self.assertFalse(matches({"max_guest": "4"}, "max_guest", "<", 5))
+
+    def test_range_of(self):
+        self.assertEqual(range_of("=", 3), {"low": 3, "high": 3})
+        self.assertEqual(range_of("<", 3),
+                         {"high": 3, "include_high": False})
+        self.assertEqual(range_of(">=", 3), {"low": 3, "include_low": True})
+        self.assertIsNone(range_of("!=", 3))
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Unittests for the SortedIndex class"""
+
+    def setUp(self):
+        self.index = SortedIndex(Place, "price_by_night")
+        for key, price in (("Place.1", 100), ("Place.2", 50),
+                           ("Place.3", 150), ("Place.4", 100)):
+            self.index.add(key, {"price_by_night": price})
+
+    def test_attributes(self):
+        self.assertEqual(self.index.fields, ("price_by_night",))
+        self.assertEqual(self.index.default, 0)
+        self.assertEqual(len(self.index), 4)
+
+    def test_between(self):
+        self.assertEqual(self.index.between(),
+                         ["Place.2", "Place.1", "Place.4", "Place.3"])
+        self.assertEqual(self.index.between(100, 100),
+                         ["Place.1", "Place.4"])
+        self.assertEqual(self.index.between(high=100, include_high=False),
+                         ["Place.2"])
+        self.assertEqual(self.index.between(low=100, include_low=False),
+                         ["Place.3"])
+        self.assertEqual(self.index.count_between(60, 150), 3)
+        self.assertEqual(self.index.between(200), [])
+
+    def test_incomparable_bound(self):
+        self.assertEqual(self.index.between("cheap"), [])
+        self.assertEqual(self.index.count_between(high="cheap"), 0)
+
+    def test_values_converted(self):
+        self.index.add("Place.5", {"price_by_night": "75"})
+        self.index.add("Place.6", {"price_by_night": "free"})
+        self.index.add("Place.7", {"price_by_night": None})
+        self.assertEqual(self.index.between(70, 80), ["Place.5"])
+        self.assertEqual(len(self.index), 5)
+
+    def test_floats_kept(self):
+        self.index.add("Place.5", {"price_by_night": 99.5})
+        self.index.add("Place.6", {"price_by_night": 100.5})
+        self.assertEqual(self.index.between(99.2, 99.9), ["Place.5"])
+        self.assertEqual(self.index.between(low=100, include_low=False),
+                         ["Place.6", "Place.3"])
+        self.assertFalse(SortedIndex.holds(float("nan")))
+        self.assertFalse(SortedIndex.holds("99"))
+
+    def test_default_indexed(self):
+        self.index.add("Place.5", {})
+        self.assertEqual(self.index.between(high=0), ["Place.5"])
+
+    def test_remove_and_changed(self):
+        self.index.remove("Place.1", {})
+        self.index.remove("Place.9", {})
+        self.index.changed("Place.2", {"price_by_night": 500},
+                           "price_by_night", 50)
+        self.assertEqual(self.index.between(),
+                         ["Place.4", "Place.3", "Place.2"])
+
+    def test_bulk_add(self):
+        index = SortedIndex(Place, "max_guest")
+        for i in range(1000):
+            index.add("Place.{}".format(i), {"max_guest": (i * 7) % 1000})
+        self.assertEqual(index.between(10, 12),
+                         ["Place.430", "Place.573", "Place.716"])
+        index.remove("Place.573", {})
+        self.assertEqual(index.count_between(10, 12), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the Journal class in the engine package
+    file: AirBnB_clone/models/engine/journal.py
+
+It tests various aspects of the Journal class, including:
+    - appending and replaying records
+    - rotation and compaction of the log
+    - recovery from a torn last line
+"""
+
+import unittest
+import os
+import tempfile
+from models.engine.journal import Journal
+
+
+class TestJournal(unittest.TestCase):
+    """Unittests for appending and replaying journal records"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.journal = Journal(os.path.join(self.tmpdir.name, "log"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_empty_replay(self):
+        self.assertEqual(list(self.journal.replay()), [])
+        self.assertEqual(self.journal.size(), 0)
+
+    def test_append_and_replay(self):
+        records = [
+                {"op": "put", "key": "User.1", "obj": {"id": "1"}},
+                {"op": "del", "key": "User.1"}
+            ]
+        self.journal.append(records[:1])
+        self.journal.append(records[1:])
+        self.assertEqual(list(self.journal.replay()), records)
+        self.assertGreater(self.journal.size(), 0)
+
+    def test_rotate_keeps_records(self):
+        self.journal.append([{"op": "del", "key": "User.1"}])
+        self.journal.rotate()
+        self.journal.append([{"op": "del", "key": "User.2"}])
+        keys = [record["key"] for record in self.journal.replay()]
+        self.assertEqual(keys, ["User.1", "User.2"])
+        self.journal.discard()
+        keys = [record["key"] for record in self.journal.replay()]
+        self.assertEqual(keys, ["User.2"])
+
+    def test_rotate_extends_frozen_log(self):
+        self.journal.append([{"op": "del", "key": "User.1"}])
+        self.journal.rotate()
+        self.journal.append([{"op": "del", "key": "User.2"}])
+        self.journal.rotate()
+        self.assertFalse(os.path.exists(self.journal.path))
+        keys = [record["key"] for record in self.journal.replay()]
+        self.assertEqual(keys, ["User.1", "User.2"])
+
+    def test_torn_last_line(self):
+        self.journal.append([{"op": "del", "key": "User.1"}])
+        with open(self.journal.path, 'a') as f:
+            f.write('{"op": "put", "ke')
+        keys = [record["key"] for record in self.journal.replay()]
+        self.assertEqual(keys, ["User.1"])
+        self.journal.append([{"op": "del", "key": "User.2"}])
+        keys = [record["key"] for record in self.journal.replay()]
+        self.assertEqual(keys, ["User.1", "User.2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the JSON stream readers of the engine
+    file: AirBnB_clone/models/engine/json_stream.py
+
+It tests various aspects of the readers, including:
+    - reading a JSON object one record at a time
+    - reading a NDJSON file
+    - rejecting invalid content
+    - writing encoded records
+"""
+
+import unittest
+import io
+import json
+from models.engine.json_stream import iter_lines, iter_object
+from models.engine.json_stream import write_lines, write_object
+
+
+class TestIterObject(unittest.TestCase):
+    """Unittests for reading a JSON object one record at a time"""
+
+    def setUp(self):
+        self.info = {
+                "User.1": {"id": "1", "__class__": "User", "n": 12345},
+                "Place.2": {"id": "2", "tags": ["a", "b"], "x": 1.5e3},
+                "Ré.3": {"text": 'quote " and brace }'}
+            }
+
+    def read(self, text, chunk_size=1 << 16):
+        return list(iter_object(io.StringIO(text), chunk_size))
+
+    def test_matches_json_load(self):
+        text = json.dumps(self.info)
+        self.assertEqual(dict(self.read(text)), self.info)
+
+    def test_small_chunks(self):
+        text = json.dumps(self.info, indent=2)
+        for chunk_size in (1, 2, 3, 7):
+            self.assertEqual(dict(self.read(text, chunk_size)), self.info)
+
+    def test_number_at_chunk_boundary(self):
+        self.assertEqual(self.read('{"a": 12345}', 3), [("a", 12345)])
+
+    def test_empty_object(self):
+        self.assertEqual(self.read(" { } "), [])
+
+    def test_empty_file(self):
+        with self.assertRaises(ValueError):
+            self.read("")
+
+    def test_invalid_content(self):
+        for text in ("Invalid JSON content", '{"a": }', '{"a": 1',
+                     '{"a" 1}', '{1: 1}', '{"a": 1} x', '[]'):
+            with self.assertRaises(ValueError):
+                self.read(text, 2)
+
+
+class TestIterLines(unittest.TestCase):
+    """Unittests for reading a NDJSON file"""
+
+    def test_records(self):
+        text = '{"__class__": "User", "id": "1"}\n\n' \
+            '{"__class__": "City", "id": "2", "name": "Kassala"}\n'
+        self.assertEqual(
+                [key for key, record in iter_lines(io.StringIO(text))],
+                ["User.1", "City.2"])
+
+    def test_invalid_line(self):
+        with self.assertRaises(ValueError):
+            list(iter_lines(io.StringIO("Invalid JSON content\n")))
+
+
+class TestWriters(unittest.TestCase):
+    """Unittests for writing encoded records"""
+
+    def setUp(self):
+        self.info = {
+                "User.1": {"id": "1", "__class__": "User"},
+                "City.2": {"id": "2", "__class__": "City", "name": "Wad"}
+            }
+        self.parts = [(key, json.dumps(value))
+                      for key, value in self.info.items()]
+
+    def test_write_object_matches_json_dump(self):
+        f = io.StringIO()
+        write_object(f, iter(self.parts))
+        self.assertEqual(f.getvalue(), json.dumps(self.info))
+
+    def test_write_object_empty(self):
+        f = io.StringIO()
+        write_object(f, [])
+        self.assertEqual(f.getvalue(), "{}")
+
+    def test_write_lines_round_trip(self):
+        f = io.StringIO()
+        write_lines(f, iter(self.parts))
+        f.seek(0)
+        self.assertEqual(dict(iter_lines(f)), self.info)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the LazyObjects class in the engine package
+    file: AirBnB_clone/models/engine/lazy.py
+
+It tests various aspects of the LazyObjects class, including:
+    - building instances on first access
+    - dictionary methods and views
+    - copies, which hold instances and never records
+"""
+
+import unittest
+from models.engine.lazy import LazyObjects, to_record
+from models.user import User
+
+
+class TestLazyObjects(unittest.TestCase):
+    """Unittests for building instances on first access"""
+
+    def setUp(self):
+        self.built = []
+        self.record = User().to_dict()
+        self.key = "User." + self.record["id"]
+        self.objects = LazyObjects(self.build)
+        self.objects[self.key] = self.record
+
+    def build(self, key, value):
+        self.built.append(key)
+        return User(**value)
+
+    def test_is_dict(self):
+        self.assertIsInstance(self.objects, dict)
+        self.assertIn(self.key, self.objects)
+        self.assertEqual(len(self.objects), 1)
+
+    def test_not_built_until_accessed(self):
+        self.assertFalse(self.objects.is_loaded(self.key))
+        self.assertEqual(list(self.objects), [self.key])
+        self.assertEqual(self.built, [])
+
+    def test_getitem_builds_once(self):
+        first = self.objects[self.key]
+        second = self.objects[self.key]
+        self.assertIsInstance(first, User)
+        self.assertIs(first, second)
+        self.assertTrue(self.objects.is_loaded(self.key))
+        self.assertEqual(self.built, [self.key])
+
+    def test_get(self):
+        self.assertIsInstance(self.objects.get(self.key), User)
+        self.assertIsNone(self.objects.get("User.missing"))
+
+    def test_views(self):
+        self.assertIsInstance(list(self.objects.values())[0], User)
+        key, value = list(self.objects.items())[0]
+        self.assertEqual(key, self.key)
+        self.assertIsInstance(value, User)
+
+    def test_pop(self):
+        self.assertIsInstance(self.objects.pop(self.key), User)
+        self.assertNotIn(self.key, self.objects)
+        self.assertIsNone(self.objects.pop(self.key, None))
+        with self.assertRaises(KeyError):
+            self.objects.pop(self.key)
+
+    def test_copies(self):
+        for copy in (dict(self.objects), self.objects.copy(),
+                     {**self.objects}, self.objects | {}, {} | self.objects):
+            self.assertIs(type(copy), dict)
+            self.assertIsInstance(copy[self.key], User)
+        other = {}
+        other.update(self.objects)
+        self.assertIsInstance(other[self.key], User)
+
+    def test_compare_and_repr(self):
+        self.assertEqual(self.objects, {self.key: self.objects[self.key]})
+        self.assertNotEqual(self.objects, {self.key: self.record})
+        self.assertNotIn("__class__", repr(self.objects))
+
+    def test_popitem_and_setdefault(self):
+        self.assertIsInstance(self.objects.setdefault(self.key), User)
+        self.assertIsNone(self.objects.setdefault("User.x"))
+        self.assertEqual(self.objects.popitem(), ("User.x", None))
+        key, value = self.objects.popitem()
+        self.assertIsInstance(value, User)
+        with self.assertRaises(KeyError):
+            self.objects.popitem()
+
+    def test_to_record(self):
+        self.assertIs(to_record(self.record), self.record)
+        self.assertEqual(to_record(self.objects[self.key]), self.record)
+
+
+if __name__ == '__main__':
+    unittest.main()
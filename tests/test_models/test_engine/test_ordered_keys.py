@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the OrderedKeys class in the engine package
+    file: AirBnB_clone/models/engine/ordered_keys.py
+
+It tests various aspects of the OrderedKeys class, including:
+    - insertion order, removals and keys added again
+    - resuming after a key
+    - rebuilding the list without its holes
+"""
+
+import unittest
+from models.engine.ordered_keys import OrderedKeys
+
+
+class TestOrderedKeys(unittest.TestCase):
+    """Unittests for the OrderedKeys class"""
+
+    def setUp(self):
+        self.keys = OrderedKeys()
+        for key in ("a", "b", "c", "d"):
+            self.keys.add(key)
+
+    def test_order(self):
+        self.assertEqual(list(self.keys), ["a", "b", "c", "d"])
+        self.assertEqual(len(self.keys), 4)
+        self.assertIn("b", self.keys)
+        self.assertNotIn("e", self.keys)
+
+    def test_discard_and_add_again(self):
+        self.keys.discard("b")
+        self.keys.discard("missing")
+        self.assertEqual(list(self.keys), ["a", "c", "d"])
+        self.keys.add("b")
+        self.keys.add("a")
+        self.assertEqual(list(self.keys), ["a", "c", "d", "b"])
+        self.assertEqual(len(self.keys), 4)
+
+    def test_after(self):
+        self.assertEqual(list(self.keys.after("a")), ["b", "c", "d"])
+        self.keys.discard("c")
+        self.assertEqual(list(self.keys.after("b")), ["d"])
+        self.assertEqual(list(self.keys.after("d")), [])
+        with self.assertRaises(KeyError):
+            self.keys.after("c")
+
+    def test_rebuilt_without_holes(self):
+        for number in range(100):
+            self.keys.add(str(number))
+        for number in range(95):
+            self.keys.discard(str(number))
+        self.assertEqual(list(self.keys),
+                         ["a", "b", "c", "d", "95", "96", "97", "98", "99"])
+        self.assertEqual(list(self.keys.after("d")),
+                         ["95", "96", "97", "98", "99"])
+        self.assertLess(len(self.keys._OrderedKeys__keys), 2 * 9 + 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
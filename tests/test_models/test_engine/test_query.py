@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the queries of the engine package
+    file: AirBnB_clone/models/engine/query.py
+
+It tests various aspects of the queries, including:
+    - where() suffixes and filter() conditions
+    - ordering, limits and offsets
+    - the plan chosen and its explain() description
+    - lazy evaluation over a lazy storage
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+import models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+
+
+class TestQuery(unittest.TestCase):
+    """Unittests for FileStorage.query()"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        self.storage = FileStorage(file_path=self.path)
+        rows = [("loft", 90, 4, "c1"), ("room", 60, 1, "c1"),
+                ("suite", 150, 2, "c2"), ("villa", 300, 8, "c2"),
+                ("flat", 120, 3, "c1")]
+        for name, price, guests, city in rows:
+            place = Place(id=name, name=name, price_by_night=price,
+                          max_guest=guests, city_id=city)
+            self.storage.new(place)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def names(self, query):
+        return [place.name for place in query]
+
+    def test_where(self):
+        query = self.storage.query(Place).where(city_id="c1",
+                                                price_by_night__lt=100)
+        self.assertEqual(sorted(self.names(query)), ["loft", "room"])
+        query = self.storage.query(Place).where(max_guest__gte=4,
+                                                name__ne="villa")
+        self.assertEqual(self.names(query), ["loft"])
+
+    def test_filter(self):
+        query = self.storage.query("Place").filter(("max_guest", ">", 2))
+        self.assertEqual(sorted(self.names(query)),
+                         ["flat", "loft", "villa"])
+        with self.assertRaises(ValueError):
+            self.storage.query(Place).filter(("max_guest", "~", 2))
+
+    def test_order_by(self):
+        query = self.storage.query(Place).order_by("price_by_night")
+        self.assertEqual(self.names(query),
+                         ["room", "loft", "flat", "suite", "villa"])
+        query = self.storage.query(Place).where(city_id="c1") \
+            .order_by("-price_by_night")
+        self.assertEqual(self.names(query), ["flat", "loft", "room"])
+        query = self.storage.query(Place).order_by("city_id", "-max_guest")
+        self.assertEqual(self.names(query),
+                         ["loft", "flat", "room", "villa", "suite"])
+
+    def test_limit_and_offset(self):
+        query = self.storage.query(Place).order_by("-price_by_night")
+        self.assertEqual(self.names(query.limit(2)), ["villa", "suite"])
+        self.assertEqual(self.names(query.offset(1).limit(2)),
+                         ["suite", "flat"])
+        self.assertEqual(query.first().name, "villa")
+        self.assertIsNone(query.where(max_guest__gt=10).first())
+
+    def test_chaining_copies(self):
+        query = self.storage.query(Place).where(city_id="c1")
+        query.where(max_guest=4).limit(1)
+        self.assertEqual(len(self.names(query)), 3)
+
+    def test_generator(self):
+        query = self.storage.query(Place).order_by("price_by_night")
+        found = iter(query)
+        self.assertEqual(next(found).name, "room")
+        self.assertEqual(next(found).name, "loft")
+
+    def test_text(self):
+        review = Review(id="r1", text="A quiet loft")
+        self.storage.new(review)
+        self.storage.new(Review(id="r2", text="Noisy street"))
+        query = self.storage.query(Review).text("quiet")
+        self.assertEqual([obj.id for obj in query], ["r1"])
+        with self.assertRaises(LookupError):
+            list(self.storage.query("State").text("quiet"))
+
+    def test_explain_index(self):
+        plan = self.storage.query(Place).where(
+            city_id="c2", price_by_night__gt=200).explain()
+        self.assertIn("Place: ", plan)
+        self.assertIn("index on price_by_night > 200 (~1 candidates)", plan)
+        plan = self.storage.query(Place).where(
+            city_id="c2", price_by_night__gt=50).explain()
+        self.assertIn("hash index on city_id", plan)
+        self.assertIn("filter: price_by_night > 50", plan)
+
+    def test_explain_scan_and_order(self):
+        plan = self.storage.query(Place).where(name="villa") \
+            .order_by("name").limit(3).explain()
+        self.assertIn("scan of 5 instances", plan)
+        self.assertIn("order by: name (sort)", plan)
+        self.assertIn("limit: 3", plan)
+        plan = self.storage.query(Place).order_by("-max_guest").explain()
+        self.assertIn("sorted index on max_guest in order", plan)
+        self.assertIn("order by: -max_guest (index order)", plan)
+
+    def test_ordered_index_with_limit(self):
+        for number in range(200):
+            self.storage.new(Place(id="p{}".format(number),
+                                   city_id="c{}".format(number % 2),
+                                   price_by_night=number))
+        query = self.storage.query(Place).where(city_id="c1") \
+            .order_by("-price_by_night")
+        self.assertIn("hash index on city_id", query.explain())
+        query = query.limit(3)
+        self.assertIn("in order", query.explain())
+        self.assertEqual([obj.id for obj in query],
+                         ["p199", "p197", "p195"])
+
+    def test_float_values(self):
+        for name, price in (("half", 99.5), ("half_more", 100.5)):
+            self.storage.new(Place(id=name, name=name, price_by_night=price))
+        query = self.storage.query(Place).where(price_by_night__gt=99,
+                                                price_by_night__lt=101)
+        self.assertIn("sorted index", query.explain())
+        self.assertEqual(sorted(self.names(query)), ["half", "half_more"])
+        query = self.storage.query(Place).where(price_by_night__gte=99.2)
+        self.assertIn("half", self.names(query))
+        query = self.storage.query(Place).order_by("price_by_night")
+        self.assertEqual(self.names(query.limit(4)),
+                         ["room", "loft", "half", "half_more"])
+
+    def test_string_condition(self):
+        self.storage.new(Place(id="odd", name="odd", price_by_night="n/a"))
+        query = self.storage.query(Place).where(price_by_night="n/a")
+        self.assertIn("scan", query.explain())
+        self.assertEqual(self.names(query), ["odd"])
+
+    def test_follows_updates(self):
+        with mock.patch.object(models, "storage", self.storage):
+            place = self.storage.get(Place, "room")
+            place.price_by_night = 500
+            query = self.storage.query(Place).order_by("-price_by_night")
+            self.assertEqual(query.first().name, "room")
+            self.storage.delete(place)
+            self.assertEqual(query.first().name, "villa")
+
+    def test_lazy(self):
+        self.storage.save()
+        storage = FileStorage(file_path=self.path, lazy=True)
+        storage.reload()
+        with mock.patch.object(Place, "from_dict",
+                               wraps=Place.from_dict) as build:
+            query = storage.query(Place).where(price_by_night__gte=100)
+            self.assertEqual(self.names(query.order_by("name")),
+                             ["flat", "suite", "villa"])
+        self.assertEqual(build.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
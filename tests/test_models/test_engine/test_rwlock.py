@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the locks of the engine package
+    file: AirBnB_clone/models/engine/rwlock.py
+
+It tests various aspects of the locks, including:
+    - parallel readers and exclusive writers
+    - reentrancy
+    - writer preference
+"""
+
+import threading
+import time
+import unittest
+from models.engine.rwlock import NullLock, RWLock
+
+
+class TestRWLock(unittest.TestCase):
+    """Unittests for the RWLock class"""
+
+    def setUp(self):
+        self.lock = RWLock()
+
+    def test_parallel_readers(self):
+        inside = threading.Barrier(3, timeout=5)
+
+        def read():
+            with self.lock.read():
+                inside.wait()
+
+        threads = [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        inside.wait()
+        for thread in threads:
+            thread.join()
+
+    def test_writer_excludes_readers(self):
+        events = []
+        with self.lock.write():
+            reader = threading.Thread(target=self.read, args=(events,))
+            reader.start()
+            time.sleep(0.05)
+            events.append("write")
+        reader.join()
+        self.assertEqual(events, ["write", "read"])
+
+    def test_waiting_writer_blocks_new_readers(self):
+        events = []
+        with self.lock.read():
+            writer = threading.Thread(target=self.write, args=(events,))
+            writer.start()
+            time.sleep(0.05)
+            reader = threading.Thread(target=self.read, args=(events,))
+            reader.start()
+            time.sleep(0.05)
+            self.assertEqual(events, [])
+        writer.join()
+        reader.join()
+        self.assertEqual(events, ["write", "read"])
+
+    def test_reentrant(self):
+        with self.lock.read():
+            with self.lock.read():
+                pass
+        with self.lock.write():
+            with self.lock.write():
+                with self.lock.read():
+                    pass
+        events = []
+        self.write(events)
+        self.assertEqual(events, ["write"])
+
+    def test_upgrade(self):
+        with self.lock.read():
+            with self.assertRaises(RuntimeError):
+                with self.lock.write():
+                    pass
+
+    def read(self, events):
+        with self.lock.read():
+            events.append("read")
+
+    def write(self, events):
+        with self.lock.write():
+            events.append("write")
+
+
+class TestNullLock(unittest.TestCase):
+    """Unittests for the NullLock class"""
+
+    def test_no_op(self):
+        lock = NullLock()
+        with lock.read():
+            with lock.write():
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
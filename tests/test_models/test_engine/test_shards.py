@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+This script contains unittests for the shards of the engine package
+    file: AirBnB_clone/models/engine/shards.py
+
+It tests various aspects of the shards, including:
+    - shard names and the shard of a key
+    - finding the shards of a storage file
+    - reading shards in this process and in worker processes
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from models.engine.shards import find_shards, read_shard, read_shards
+from models.engine.shards import shard_of, shard_paths
+
+
+class TestShards(unittest.TestCase):
+    """Unittests for the functions of the shards module"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, path, ids):
+        with open(path, "w") as f:
+            for obj_id in ids:
+                f.write(json.dumps({"__class__": "State", "id": obj_id}))
+                f.write("\n")
+
+    def test_shard_of(self):
+        self.assertEqual(shard_of("State.a", 4), shard_of("State.a", 4))
+        found = {shard_of("State.{}".format(n), 4) for n in range(100)}
+        self.assertEqual(found, {0, 1, 2, 3})
+
+    def test_shard_paths(self):
+        paths = shard_paths(self.path, 2)
+        self.assertEqual([os.path.basename(path) for path in paths],
+                         ["file-000-of-002.ndjson", "file-001-of-002.ndjson"])
+
+    def test_find_shards(self):
+        self.assertEqual(find_shards(self.path), {})
+        for path in shard_paths(self.path, 2) + shard_paths(self.path, 3):
+            self.write(path, [])
+        self.write(os.path.join(self.tmpdir.name, "file-x-of-002.ndjson"),
+                   [])
+        found = find_shards(self.path)
+        self.assertEqual(found, {2: shard_paths(self.path, 2),
+                                 3: shard_paths(self.path, 3)})
+
+    def test_read_shard(self):
+        path = shard_paths(self.path, 1)[0]
+        self.assertEqual(read_shard(path), [])
+        self.write(path, ["a", "b"])
+        self.assertEqual([key for key, record in read_shard(path)],
+                         ["State.a", "State.b"])
+
+    def test_read_shards(self):
+        paths = shard_paths(self.path, 3)
+        self.write(paths[0], ["a", "b"])
+        self.write(paths[2], ["c"])
+        for processes in (1, 2):
+            keys = [key for key, record in read_shards(paths, processes)]
+            self.assertEqual(keys, ["State.a", "State.b", "State.c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
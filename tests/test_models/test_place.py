@@ -13,8 +13,10 @@ It tests various aspects of the Place class, including:
 """
 
 import unittest
+import models
 from models.base_model import BaseModel
 from models.place import Place
+from models.review import Review
 from datetime import datetime
 
 
@@ -112,6 +114,13 @@ class TestPlaceMethods(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.place.to_dict(None)
 
+    def test_reviews(self):
+        my_review = Review()
+        my_review.place_id = self.place.id
+        self.assertEqual(self.place.reviews, [my_review])
+        models.storage.delete(my_review)
+        self.assertEqual(self.place.reviews, [])
+
 
 class TestPlaceInstances(unittest.TestCase):
     """Test cases for instances of the Place class"""
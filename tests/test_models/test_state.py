@@ -15,6 +15,7 @@ It tests various aspects of the State class, including:
 import unittest
 from models.base_model import BaseModel
 from models.state import State
+from models.city import City
 from datetime import datetime
 
 
@@ -82,6 +83,12 @@ class TestStateMethods(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.state.to_dict(None)
 
+    def test_cities(self):
+        my_city = City()
+        self.assertNotIn(my_city, self.state.cities)
+        my_city.state_id = self.state.id
+        self.assertEqual(self.state.cities, [my_city])
+
 
 class TestStateInstances(unittest.TestCase):
     """Test cases for instances of the State class"""
@@ -15,6 +15,8 @@ It tests various aspects of the User class, including:
 import unittest
 from models.base_model import BaseModel
 from models.user import User
+from models.place import Place
+from models.review import Review
 from datetime import datetime
 
 
@@ -92,6 +94,14 @@ class TestUserMethods(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.user.to_dict(None)
 
+    def test_places_and_reviews(self):
+        my_place = Place()
+        my_review = Review()
+        my_place.user_id = self.user.id
+        my_review.user_id = self.user.id
+        self.assertEqual(self.user.places, [my_place])
+        self.assertEqual(self.user.reviews, [my_review])
+
 
 class TestUserInstances(unittest.TestCase):
     """Test cases for instances of the User class"""